@@ -57,6 +57,32 @@ class ScrobbleDataAdapter:
             db: sqlite_utils Database instance
         """
         self.db = db
+        # Track counts by (filter_text, filter_column), valid for the
+        # data version they were counted at
+        self._count_cache: Dict[tuple, int] = {}
+        self._count_version: Optional[tuple] = None
+
+    # Maximum number of cached track counts
+    COUNT_CACHE_SIZE = 64
+
+    def _data_version(self) -> tuple:
+        """
+        Get a token that changes whenever the database contents change.
+
+        PRAGMA data_version moves when another connection (such as an
+        ingest) commits, and total_changes counts this connection's own
+        writes, so together they cover every change at O(1) cost.
+
+        Returns:
+            Tuple of (data_version, total_changes)
+        """
+        conn = self.db.conn
+        return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+    def clear_caches(self) -> None:
+        """Forget all cached track counts."""
+        self._count_cache.clear()
+        self._count_version = None
 
     def _build_filter_where_clause(
         self, filter_text: str, filter_column: str = "all"
@@ -97,6 +123,35 @@ class ScrobbleDataAdapter:
         """
         Get total count of tracks, optionally filtered.
 
+        Args:
+            filter_text: Optional filter string to match against specified column(s)
+            filter_column: Column to filter on ('all', 'artist', 'album', 'track')
+
+        Returns:
+            Total count of matching tracks, or 0 if database is empty/uninitialized
+
+        Counts are cached until the database changes, so paging and
+        re-sorting the same filter do not recount.
+        """
+        version = self._data_version()
+        if version != self._count_version:
+            self._count_cache.clear()
+            self._count_version = version
+
+        key = (filter_text or None, filter_column)
+        if key not in self._count_cache:
+            if len(self._count_cache) >= self.COUNT_CACHE_SIZE:
+                # Evict the oldest entry
+                del self._count_cache[next(iter(self._count_cache))]
+            self._count_cache[key] = self._count_tracks(filter_text, filter_column)
+        return self._count_cache[key]
+
+    def _count_tracks(
+        self, filter_text: Optional[str] = None, filter_column: str = "all"
+    ) -> int:
+        """
+        Count tracks, optionally filtered, without the cache.
+
         Args:
             filter_text: Optional filter string to match against specified column(s)
             filter_column: Column to filter on ('all', 'artist', 'album', 'track')
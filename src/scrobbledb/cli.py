@@ -22,6 +22,7 @@ from rich.progress import (
 from rich.panel import Panel
 from rich.table import Table
 from . import lastfm
+from . import domain_queries
 from . import sql as sql_commands
 from . import export as export_command
 from .commands import stats as stats_command
@@ -673,10 +674,11 @@ def _ingest_no_batch(db, history, expected_count):
     ) as progress:
         task = progress.add_task("[cyan]Ingesting tracks", total=expected_count)
         for track in history:
-            lastfm.save_artist(db, track["artist"])
-            lastfm.save_album(db, track["album"])
-            lastfm.save_track(db, track["track"])
-            lastfm.save_play(db, track["play"])
+            with lastfm.transaction(db):
+                lastfm.save_artist(db, track["artist"])
+                lastfm.save_album(db, track["album"])
+                lastfm.save_track(db, track["track"])
+                lastfm.save_play(db, track["play"])
             
             # Track timestamp range
             timestamp = track["play"]["timestamp"]
@@ -714,10 +716,11 @@ def _ingest_batch(db, history, expected_count, batch_size):
     def flush_batch():
         """Flush the current batch to the database."""
         if batch["artists"]:
-            lastfm.save_artists_batch(db, batch["artists"])
-            lastfm.save_albums_batch(db, batch["albums"])
-            lastfm.save_tracks_batch(db, batch["tracks"])
-            lastfm.save_plays_batch(db, batch["plays"])
+            with lastfm.transaction(db):  # one commit per batch
+                lastfm.save_artists_batch(db, batch["artists"])
+                lastfm.save_albums_batch(db, batch["albums"])
+                lastfm.save_tracks_batch(db, batch["tracks"])
+                lastfm.save_plays_batch(db, batch["plays"])
             batch["artists"].clear()
             batch["albums"].clear()
             batch["tracks"].clear()
@@ -903,23 +906,33 @@ def ingest(ctx, database, auth, since_date, until_date, limit, batch_size, no_ba
             f"[cyan]Ingesting tracks from {auth_data['lastfm_username']}...[/cyan]"
         )
 
+    # WAL with synchronous=NORMAL syncs on checkpoints rather than on
+    # every commit, and the larger page cache keeps the indexes hot
+    domain_queries.tune_connection(db)
+
     # Start timing the ingest operation
     start_time = time.time()
 
-    # Ingest tracks using the appropriate mode
-    if no_batch:
-        min_timestamp, max_timestamp, track_count = _ingest_no_batch(db, history, expected_count)
-    else:
-        min_timestamp, max_timestamp, track_count = _ingest_batch(db, history, expected_count, batch_size)
-
-    # Calculate elapsed time
-    elapsed_time = time.time() - start_time
+    # The index is rebuilt in one pass afterwards, so per-row trigger
+    # updates during the ingest would be wasted work
+    lastfm.drop_fts5_triggers(db)
+    try:
+        # Ingest tracks using the appropriate mode
+        if no_batch:
+            min_timestamp, max_timestamp, track_count = _ingest_no_batch(db, history, expected_count)
+        else:
+            min_timestamp, max_timestamp, track_count = _ingest_batch(db, history, expected_count, batch_size)
 
-    # Ensure FTS5 triggers are set up now that tables exist
-    # This handles the case where setup_fts5() was called during init before tables existed
-    console.print("[cyan]Updating search index...[/cyan]")
-    lastfm.setup_fts5(db)  # Idempotent: creates missing triggers
-    lastfm.rebuild_fts5(db)  # Populate index with ingested data
+        # Calculate elapsed time
+        elapsed_time = time.time() - start_time
+    finally:
+        # Ensure FTS5 triggers are set up now that tables exist, and
+        # restored if the ingest failed part way
+        console.print("[cyan]Updating search index...[/cyan]")
+        lastfm.setup_indexes(db)
+        lastfm.setup_fts5(db)  # Idempotent: creates missing triggers
+        lastfm.rebuild_fts5(db)  # Populate index with ingested data
+    domain_queries.refresh_rollups(db)  # Precompute monthly/yearly stats
 
     console.print(
         f"[green]✓[/green] Successfully ingested tracks to: [cyan]{database}[/cyan]"
@@ -1334,19 +1347,23 @@ def import_data(
 
             else:  # CSV or TSV
                 import csv
-                import io
+                import itertools
 
-                # Combine first line with rest of file
-                full_content = first_line + input_file.read()
+                # Stream the first line and then the rest of the file, rather
+                # than reading the whole input into memory first
                 delimiter = "\t" if format == "tsv" else ","
 
-                reader = csv.DictReader(io.StringIO(full_content), delimiter=delimiter)
+                reader = csv.DictReader(
+                    itertools.chain([first_line], input_file), delimiter=delimiter
+                )
+                # Every row shares the header, so normalize its names once
+                fields = lastfm.field_map(reader.fieldnames or [])
 
                 for line_num, row in enumerate(
                     reader, start=2
                 ):  # Line 2 because of header
                     try:
-                        yield lastfm.parse_scrobble_dict(row, line_num)
+                        yield lastfm.parse_scrobble_dict(row, line_num, fields)
                     except ValueError as e:
                         if not skip_errors:
                             raise click.ClickException(str(e))
@@ -1366,8 +1383,16 @@ def import_data(
             f"[cyan]{'Validating' if dry_run else 'Adding'} scrobbles{mode_str}...[/cyan]\n"
         )
 
+        # Update FTS5 index if requested or auto
+        should_update_index = update_index
+        if should_update_index is None:
+            # Auto: update if index exists
+            should_update_index = "tracks_fts" in db.table_names()
+
         # Process scrobbles
         if not dry_run:
+            # WAL and synchronous=NORMAL for the batched writes
+            domain_queries.tune_connection(db)
             stats = lastfm.add_scrobbles(
                 db,
                 parse_input(),
@@ -1376,6 +1401,8 @@ def import_data(
                 sample=sample,
                 seed=seed,
                 no_duplicates=no_duplicates,
+                # Rebuilds the index once instead of per-row trigger updates
+                bulk=should_update_index,
             )
         else:
             # Dry run: just parse and count
@@ -1388,16 +1415,18 @@ def import_data(
                 "limit_reached": False,
             }
 
+            # Draws as add_scrobbles() does, so a seeded dry run selects
+            # the same records the import would
+            import random
+
+            draw = random.Random(seed).random
+
             for scrobble in parse_input():
                 stats["total_processed"] += 1
 
                 # Apply sampling logic (but don't actually import)
                 if sample is not None:
-                    import random
-
-                    if seed is not None:
-                        random.seed(seed + stats["total_processed"])  # Vary seed
-                    if random.random() >= sample:
+                    if draw() >= sample:
                         continue
                     stats["sampled"] += 1
 
@@ -1470,20 +1499,14 @@ def import_data(
         if not dry_run:
             console.print(f"\n[dim]Database:[/dim] [cyan]{database}[/cyan]")
 
-            # Update FTS5 index if requested or auto
-            should_update_index = update_index
-            if should_update_index is None:
-                # Auto: update if index exists
-                should_update_index = "tracks_fts" in db.table_names()
-
+            # add_scrobbles(bulk=True) has already rebuilt the index
             if should_update_index and stats["added"] > 0:
-                console.print("[cyan]Updating search index...[/cyan]")
-                # Always call setup_fts5 to ensure triggers exist
-                # This is idempotent and will create any missing triggers
-                lastfm.setup_fts5(db)
-                lastfm.rebuild_fts5(db)
                 console.print("[green]✓[/green] Search index updated")
 
+            if stats["added"] > 0:
+                lastfm.setup_indexes(db)
+                domain_queries.refresh_rollups(db)
+
     finally:
         # Close file if we opened it
         if file and file != "-":
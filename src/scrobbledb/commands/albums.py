@@ -97,6 +97,7 @@ def search_albums(ctx, query, database, limit, artist, format, fields, select):
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any albums
     if "albums" not in db.table_names():
@@ -302,6 +303,7 @@ def list_albums(ctx, database, limit, artist, artist_id, sort, order, min_plays,
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any albums
     if "albums" not in db.table_names():
@@ -389,6 +391,12 @@ def list_albums(ctx, database, limit, artist, artist_id, sort, order, min_plays,
     default=None,
     help="Artist name (to disambiguate albums with same title)",
 )
+@click.option(
+    "--show-plays",
+    is_flag=True,
+    default=False,
+    help="Show recent play timestamps for each track",
+)
 @click.option(
     "--format",
     type=click.Choice(["table", "json", "jsonl"], case_sensitive=False),
@@ -397,7 +405,7 @@ def list_albums(ctx, database, limit, artist, artist_id, sort, order, min_plays,
     show_default=True,
 )
 @click.pass_context
-def show_album(ctx, album_title, database, album_id, artist, format):
+def show_album(ctx, album_title, database, album_id, artist, show_plays, format):
     """
     Display detailed information about a specific album and list its tracks.
 
@@ -411,6 +419,9 @@ def show_album(ctx, album_title, database, album_id, artist, format):
         # Disambiguate by artist
         scrobbledb albums show "Rubber Soul" --artist "The Beatles"
 
+        # Show each track's recent plays
+        scrobbledb albums show "Abbey Road" --show-plays
+
         # Use album ID
         scrobbledb albums show --album-id 42
     """
@@ -432,6 +443,7 @@ def show_album(ctx, album_title, database, album_id, artist, format):
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any albums
     if "albums" not in db.table_names():
@@ -476,11 +488,25 @@ def show_album(ctx, album_title, database, album_id, artist, format):
         console.print(f"[red]✗[/red] Failed to get tracks: {e}")
         ctx.exit(1)
 
+    # Get plays if requested, for every track in one query
+    plays = None
+    if show_plays:
+        try:
+            # Limit to the 10 most recent plays per track
+            plays = domain_queries.get_tracks_plays(
+                db, [track["track_id"] for track in tracks], limit=10
+            )
+        except Exception as e:
+            console.print(f"[red]✗[/red] Failed to get play history: {e}")
+            ctx.exit(1)
+
     # Output results
     if format == "table":
-        domain_format.format_album_details(album, tracks, console)
+        domain_format.format_album_details(album, tracks, console, plays)
     else:
         # For JSON output, combine album and tracks
+        if plays is not None:
+            tracks = [{**track, "plays": plays[track["track_id"]]} for track in tracks]
         output_data = {**album, "tracks": tracks}
         if format == "json":
             import json
@@ -92,6 +92,7 @@ def search_artists(ctx, query, database, limit, format, fields, select):
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any artists
     if "artists" not in db.table_names():
@@ -280,6 +281,7 @@ def list_artists(ctx, database, limit, sort, order, min_plays, format, fields):
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any artists
     if "artists" not in db.table_names():
@@ -417,6 +419,7 @@ def top_artists(ctx, database, limit, since, until, period, format, fields):
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any plays
     if "plays" not in db.table_names() or db["plays"].count == 0:
@@ -552,6 +555,7 @@ def show_artist(ctx, artist_name, database, artist_id, format):
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any artists
     if "artists" not in db.table_names():
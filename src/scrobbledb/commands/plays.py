@@ -56,6 +56,12 @@ def plays():
     default=None,
     help="Show plays until date/time (ISO 8601 format)",
 )
+@click.option(
+    "--before",
+    type=str,
+    default=None,
+    help="Show plays strictly before this timestamp (pass the last timestamp of the previous page)",
+)
 @click.option(
     "--artist",
     type=str,
@@ -88,7 +94,7 @@ def plays():
     help="Fields to include in output (comma-separated or repeated). Available: timestamp, artist, track, album",
 )
 @click.pass_context
-def list_plays(ctx, database, limit, since, until, artist, album, track, format, fields):
+def list_plays(ctx, database, limit, since, until, before, artist, album, track, format, fields):
     """
     List recent plays with filtering and pagination.
 
@@ -111,6 +117,9 @@ def list_plays(ctx, database, limit, since, until, artist, album, track, format,
         # List plays in a specific date range
         scrobbledb plays list --since 2024-01-01 --until 2024-12-31
 
+        # Next page: plays before the last timestamp shown
+        scrobbledb plays list --before 2024-06-01T18:23:05+00:00
+
         # Export to CSV
         scrobbledb plays list --format csv > my_plays.csv
     """
@@ -126,6 +135,7 @@ def list_plays(ctx, database, limit, since, until, artist, album, track, format,
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any plays
     if "plays" not in db.table_names() or db["plays"].count == 0:
@@ -161,6 +171,18 @@ def list_plays(ctx, database, limit, since, until, artist, album, track, format,
             )
             ctx.exit(1)
 
+    before_dt = None
+    if before:
+        before_dt = domain_queries.parse_relative_time(before)
+        if not before_dt:
+            console.print(
+                f"[red]✗[/red] Invalid date format: [yellow]{before}[/yellow]"
+            )
+            console.print(
+                "[yellow]→[/yellow] Use ISO 8601 format (YYYY-MM-DD) or relative time expressions"
+            )
+            ctx.exit(1)
+
     # Validate limit
     if limit < 1:
         console.print("[red]✗[/red] Limit must be at least 1")
@@ -176,6 +198,7 @@ def list_plays(ctx, database, limit, since, until, artist, album, track, format,
             artist=artist,
             album=album,
             track=track,
+            before=before_dt,
         )
     except Exception as e:
         console.print(f"[red]✗[/red] Query failed: {e}")
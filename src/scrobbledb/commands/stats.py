@@ -7,21 +7,27 @@ This module provides CLI commands for viewing scrobble statistics:
 - stats yearly: Yearly rollup statistics
 """
 
+import json
+
 import click
 import sqlite_utils
 from pathlib import Path
 from rich.console import Console
 
 from ..domain_queries import (
+    get_dashboard_bundle,
     get_overview_stats,
     get_monthly_rollup,
     get_yearly_rollup,
     parse_relative_time,
+    tune_connection,
 )
 from ..domain_format import (
     format_output,
     format_overview_stats,
     format_monthly_rollup,
+    format_top_artists,
+    format_top_tracks,
     format_yearly_rollup,
 )
 
@@ -69,6 +75,7 @@ def validate_database(db_path: str) -> sqlite_utils.Database:
             "Run 'scrobbledb config init' to initialize the database."
         )
 
+    tune_connection(db, query_only=True)
     return db
 
 
@@ -104,6 +111,25 @@ def stats():
     default=None,
     help="Database path (default: XDG data dir)",
 )
+@click.option(
+    "--since",
+    "-s",
+    default=None,
+    help="Start date (ISO 8601 or relative like '7 days ago')",
+)
+@click.option(
+    "--until",
+    "-u",
+    default=None,
+    help="End date (ISO 8601 or relative)",
+)
+@click.option(
+    "--top",
+    "-t",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Also show the top N artists and tracks",
+)
 @click.option(
     "--format",
     "-f",
@@ -112,28 +138,71 @@ def stats():
     default="table",
     help="Output format (default: table)",
 )
-def overview(database, output_format):
+def overview(database, since, until, top, output_format):
     """
     Display overall scrobble statistics.
 
     Shows total scrobbles, unique artists, albums, and tracks,
-    plus the date range of your listening history.
+    plus the date range of your listening history. With --since,
+    --until or --top, the overview and the top artists and tracks are
+    read together in a single query over the plays in range.
 
     Examples:
 
         # View statistics as a table
         scrobbledb stats overview
 
+        # View last month with the top 5 artists and tracks
+        scrobbledb stats overview --since "1 month ago" --top 5
+
         # Export to JSON
         scrobbledb stats overview --format json
     """
+    if top and output_format == "csv":
+        raise click.UsageError("--top cannot be combined with --format csv")
+
     db_path = database or get_default_db_path()
     db = validate_database(db_path)
 
-    stats_data = get_overview_stats(db)
+    # Parse date filters
+    since_dt = None
+    until_dt = None
+
+    if since:
+        since_dt = parse_relative_time(since)
+        if since_dt is None:
+            raise click.ClickException(
+                f"Invalid date format: {since}\n"
+                "Use ISO 8601 (YYYY-MM-DD) or relative time (e.g., '7 days ago')"
+            )
+
+    if until:
+        until_dt = parse_relative_time(until)
+        if until_dt is None:
+            raise click.ClickException(
+                f"Invalid date format: {until}\n"
+                "Use ISO 8601 (YYYY-MM-DD) or relative time (e.g., '7 days ago')"
+            )
+
+    if since_dt is None and until_dt is None and not top:
+        # The all-time overview alone is served from the rollups
+        stats_data = get_overview_stats(db)
+        bundle = None
+    else:
+        bundle = get_dashboard_bundle(db, since=since_dt, until=until_dt, limit=top or 0)
+        stats_data = bundle["overview"]
 
     if output_format == "table":
         format_overview_stats(stats_data, console)
+        if top:
+            assert bundle is not None  # Type narrowing for type checker
+            top_fields = ["rank", "artist", "plays", "percentage"]
+            format_top_artists(bundle["top_artists"], console, since=since, until=until, fields=top_fields)
+            format_top_tracks(bundle["top_tracks"], console, since=since, until=until)
+    elif top:
+        assert bundle is not None  # Type narrowing for type checker
+        indent = 2 if output_format == "json" else None
+        console.print(json.dumps(bundle, indent=indent, default=str))
     else:
         output = format_output([stats_data], output_format)
         console.print(output)
@@ -103,6 +103,7 @@ def search_tracks(ctx, query, database, limit, artist, album, format, fields, se
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any tracks
     if "tracks" not in db.table_names():
@@ -297,6 +298,7 @@ def top_tracks(ctx, database, limit, since, until, period, artist, format, field
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any plays
     if "plays" not in db.table_names() or db["plays"].count == 0:
@@ -405,6 +407,18 @@ def top_tracks(ctx, database, limit, since, until, period, artist, format, field
     default=None,
     help="Album title (to disambiguate further)",
 )
+@click.option(
+    "--artist-id",
+    type=str,
+    default=None,
+    help="Artist ID (exact alternative to --artist)",
+)
+@click.option(
+    "--album-id",
+    type=str,
+    default=None,
+    help="Album ID (exact alternative to --album)",
+)
 @click.option(
     "--show-plays",
     is_flag=True,
@@ -419,7 +433,7 @@ def top_tracks(ctx, database, limit, since, until, period, artist, format, field
     show_default=True,
 )
 @click.pass_context
-def show_track(ctx, track_title, database, track_id, artist, album, show_plays, format):
+def show_track(ctx, track_title, database, track_id, artist, album, artist_id, album_id, show_plays, format):
     """
     Display detailed information about a specific track.
 
@@ -433,6 +447,9 @@ def show_track(ctx, track_title, database, track_id, artist, album, show_plays,
         # Disambiguate by artist
         scrobbledb tracks show "Here Comes the Sun" --artist "The Beatles"
 
+        # Disambiguate by an artist ID from an earlier search
+        scrobbledb tracks show "Here Comes the Sun" --artist-id 123
+
         # Show with full play history
         scrobbledb tracks show "Comfortably Numb" --show-plays
 
@@ -457,6 +474,7 @@ def show_track(ctx, track_title, database, track_id, artist, album, show_plays,
         ctx.exit(1)
 
     db = sqlite_utils.Database(database)
+    domain_queries.tune_connection(db, query_only=True)
 
     # Check if we have any tracks
     if "tracks" not in db.table_names():
@@ -474,12 +492,14 @@ def show_track(ctx, track_title, database, track_id, artist, album, show_plays,
             track_title=track_title,
             artist_name=artist,
             album_title=album,
+            artist_id=artist_id,
+            album_id=album_id,
         )
     except ValueError as e:
         if "Multiple tracks match" in str(e):
             console.print(f"[yellow]![/yellow] {e}")
             console.print(
-                "\n[dim]Use --artist and/or --album to narrow down, or use --track-id for exact selection.[/dim]"
+                "\n[dim]Use --artist/--artist-id and/or --album/--album-id to narrow down, or use --track-id for exact selection.[/dim]"
             )
             ctx.exit(1)
         else:
@@ -501,7 +521,9 @@ def show_track(ctx, track_title, database, track_id, artist, album, show_plays,
     if show_plays:
         try:
             # Limit to 100 most recent plays
-            plays = domain_queries.get_track_plays(db, track["track_id"], limit=100)
+            plays = domain_queries.get_tracks_plays(db, [track["track_id"]], limit=100)[
+                track["track_id"]
+            ]
         except Exception as e:
             console.print(f"[red]✗[/red] Failed to get play history: {e}")
             ctx.exit(1)
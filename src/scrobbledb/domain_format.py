@@ -7,9 +7,12 @@ including Rich console output and multiple export formats.
 
 import json
 import csv as csv_module
+from datetime import datetime
 from io import StringIO
 from typing import Optional
 
+import dateutil.parser
+
 
 from rich.console import Console
 from rich.table import Table
@@ -221,6 +224,14 @@ def _get_month_name(month: int) -> str:
     return str(month)
 
 
+def _parse_timestamp(ts: str) -> datetime:
+    """Parse a stored timestamp, trying the fast ISO 8601 parser first."""
+    try:
+        return datetime.fromisoformat(ts)
+    except ValueError:
+        return dateutil.parser.parse(ts)
+
+
 def format_timestamp(ts: str) -> str:
     """
     Format timestamp consistently across commands.
@@ -231,14 +242,11 @@ def format_timestamp(ts: str) -> str:
     Returns:
         Formatted timestamp string (YYYY-MM-DD HH:MM:SS)
     """
-    import dateutil.parser
-    from datetime import datetime
-
     if isinstance(ts, datetime):
         return ts.strftime("%Y-%m-%d %H:%M:%S")
 
     try:
-        dt = dateutil.parser.parse(ts)
+        dt = _parse_timestamp(ts)
         return dt.strftime("%Y-%m-%d %H:%M:%S")
     except (ValueError, TypeError):
         return str(ts)
@@ -513,7 +521,12 @@ def format_albums_search(albums: list[dict], console: Console, fields: Optional[
     console.print(table)
 
 
-def format_album_details(album: dict, tracks: list[dict], console: Console) -> None:
+def format_album_details(
+    album: dict,
+    tracks: list[dict],
+    console: Console,
+    plays: Optional[dict[int, list[dict]]] = None,
+) -> None:
     """
     Format album details with track listing.
 
@@ -521,6 +534,7 @@ def format_album_details(album: dict, tracks: list[dict], console: Console) -> N
         album: Album details dictionary
         tracks: List of track dictionaries
         console: Rich Console instance for output
+        plays: Optional dict mapping track IDs to their recent plays
     """
     # Album summary panel
     summary = f"""[bold]{album['album_title']}[/bold]
@@ -540,16 +554,27 @@ def format_album_details(album: dict, tracks: list[dict], console: Console) -> N
         table.add_column("Track", style="green")
         table.add_column("Plays", justify="right", style="yellow")
         table.add_column("Last Played", style="blue")
+        if plays is not None:
+            table.add_column("Recent Plays", style="cyan")
 
         for i, track in enumerate(tracks, 1):
-            table.add_row(
+            row = [
                 str(i),
                 track["track_title"],
                 f"{track['play_count']:,}",
                 format_timestamp(track["last_played"])
                 if track.get("last_played")
                 else "-",
-            )
+            ]
+            if plays is not None:
+                row.append(
+                    "\n".join(
+                        format_timestamp(play["timestamp"])
+                        for play in plays.get(track["track_id"], [])
+                    )
+                    or "-"
+                )
+            table.add_row(*row)
 
         console.print(table)
 
@@ -810,10 +835,8 @@ def format_track_details(
 
     # Calculate avg plays per month if we have enough data
     if track.get("first_played") and track.get("last_played"):
-        import dateutil.parser
-
-        first = dateutil.parser.parse(track["first_played"]) if isinstance(track["first_played"], str) else track["first_played"]
-        last = dateutil.parser.parse(track["last_played"]) if isinstance(track["last_played"], str) else track["last_played"]
+        first = _parse_timestamp(track["first_played"]) if isinstance(track["first_played"], str) else track["first_played"]
+        last = _parse_timestamp(track["last_played"]) if isinstance(track["last_played"], str) else track["last_played"]
         months = ((last.year - first.year) * 12 + (last.month - first.month)) or 1
         if months >= 1:
             avg_per_month = track["play_count"] / months
@@ -835,10 +858,8 @@ def format_track_details(
             # Calculate days since previous play
             days_since = ""
             if prev_ts:
-                import dateutil.parser
-
-                current = dateutil.parser.parse(timestamp) if isinstance(timestamp, str) else timestamp
-                previous = dateutil.parser.parse(prev_ts) if isinstance(prev_ts, str) else prev_ts
+                current = _parse_timestamp(timestamp) if isinstance(timestamp, str) else timestamp
+                previous = _parse_timestamp(prev_ts) if isinstance(prev_ts, str) else prev_ts
                 delta = (previous - current).days
                 if delta > 0:
                     days_since = str(delta)
@@ -5,9 +5,99 @@ This module provides shared query functions for domain-specific CLI commands,
 including statistics, filtering, and aggregation queries.
 """
 
-from datetime import datetime
-from typing import Optional
+import json
+import re
+import sqlite3
+import weakref
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterator, Optional, Union, cast
+import dateutil.parser
 import sqlite_utils
+from dateutil.relativedelta import relativedelta
+from rapidfuzz import fuzz
+
+
+# Connection-level tuning for the read-heavy query functions: a 256MB mmap
+# window, a 128MB page cache, and in-memory temp b-trees for GROUP BY /
+# ORDER BY.
+READ_PRAGMAS = (
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-131072",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Applied only on connections that may write: WAL so reads don't block on
+# ingest. journal_mode is stored in the database file, so read-only
+# commands leave it alone.
+WRITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+)
+
+# Databases that have already had READ_PRAGMAS applied. Held weakly so
+# a new Database can't inherit a stale entry through a reused id().
+_tuned_databases: "weakref.WeakSet[sqlite_utils.Database]" = weakref.WeakSet()
+
+
+def tune_connection(db: sqlite_utils.Database, query_only: bool = False) -> None:
+    """
+    Apply READ_PRAGMAS to the database connection, once per connection.
+
+    Commands that only read should pass query_only=True, which also makes
+    SQLite refuse any write on the connection. Other connections get
+    WRITE_PRAGMAS as well.
+
+    Failures (e.g. a read-only file that can't switch to WAL) are ignored;
+    the pragmas only affect speed, never results.
+    """
+    if db in _tuned_databases:
+        return
+    conn = db.conn
+    pragmas = READ_PRAGMAS + (("PRAGMA query_only=ON",) if query_only else WRITE_PRAGMAS)
+    for pragma in pragmas:
+        try:
+            conn.execute(pragma)
+        except sqlite3.OperationalError:
+            pass
+    _tuned_databases.add(db)
+
+
+def _is_reversed_range(since, until) -> bool:
+    """Return True when both bounds are given and since falls after until."""
+    if not since or not until:
+        return False
+    try:
+        return since > until
+    except TypeError:
+        # Mixed naive/aware datetimes can't be ordered; let SQL decide
+        return False
+
+
+def _change_version(conn: sqlite3.Connection) -> Optional[int]:
+    """
+    Return a token that changes whenever the rollups' source data does.
+
+    The token is the counter the rollup triggers bump on every write to
+    plays, and on the writes to tracks, albums and artists that change
+    which plays join through them. Without all of the triggers there is no
+    reliable token and None is returned.
+    """
+    placeholders = ", ".join("?" * len(_CHANGE_TRIGGERS))
+    try:
+        row = conn.execute(
+            f"""
+            SELECT version FROM rollup_changes
+            WHERE (
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type = 'trigger' AND name IN ({placeholders})
+            ) = ?
+            """,
+            [*_CHANGE_TRIGGERS, len(_CHANGE_TRIGGERS)],
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
 
 
 def get_overview_stats(db: sqlite_utils.Database) -> dict:
@@ -22,7 +112,8 @@ def get_overview_stats(db: sqlite_utils.Database) -> dict:
     - first_scrobble: Earliest play timestamp
     - last_scrobble: Most recent play timestamp
     """
-    result = db.execute(
+    conn = db.conn
+    result = conn.execute(
         """
         SELECT
             (SELECT COUNT(*) FROM plays) as total_scrobbles,
@@ -44,6 +135,730 @@ def get_overview_stats(db: sqlite_utils.Database) -> dict:
     }
 
 
+# Materialized rollup tables maintained by refresh_rollups(). Alongside the
+# counts each row keeps the first and last play timestamp it covers, so a
+# ranged query can tell exactly which periods it only partially overlaps.
+_ROLLUP_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS rollup_month (
+        period TEXT,
+        year INTEGER,
+        month INTEGER,
+        scrobbles INTEGER,
+        unique_artists INTEGER,
+        unique_albums INTEGER,
+        unique_tracks INTEGER,
+        first_played TEXT,
+        last_played TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_year (
+        period TEXT,
+        year INTEGER,
+        scrobbles INTEGER,
+        unique_artists INTEGER,
+        unique_albums INTEGER,
+        unique_tracks INTEGER,
+        first_played TEXT,
+        last_played TEXT
+    )
+    """,
+    # Per-month play counts for each artist and track; top-N queries sum
+    # these instead of grouping every play. Track rows carry their album
+    # and artist, so per-artist totals need no join back through albums.
+    """
+    CREATE TABLE IF NOT EXISTS agg_artist_month (
+        period TEXT,
+        year INTEGER,
+        month INTEGER,
+        artist_id,
+        plays INTEGER,
+        last_played TEXT
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS agg_artist_month_period
+    ON agg_artist_month (period, artist_id, plays, last_played)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agg_track_month (
+        period TEXT,
+        year INTEGER,
+        month INTEGER,
+        track_id,
+        plays INTEGER,
+        last_played TEXT,
+        album_id,
+        artist_id
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS agg_track_month_period
+    ON agg_track_month (period, track_id, plays, last_played, album_id, artist_id)
+    """,
+    # All-time per-artist totals, as shown by `artists show`
+    """
+    CREATE TABLE IF NOT EXISTS artist_stats (
+        artist_id PRIMARY KEY,
+        play_count INTEGER,
+        track_count INTEGER,
+        album_count INTEGER,
+        first_played TEXT,
+        last_played TEXT
+    )
+    """,
+    # All-time per-track totals; album totals sum these over the album's
+    # tracks instead of grouping its plays
+    """
+    CREATE TABLE IF NOT EXISTS track_stats (
+        track_id PRIMARY KEY,
+        album_id,
+        play_count INTEGER,
+        first_played TEXT,
+        last_played TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS track_stats_album ON track_stats (album_id)",
+    "CREATE TABLE IF NOT EXISTS rollup_state (version INTEGER NOT NULL)",
+)
+
+# Months that need rebuilding, and a counter bumped with every change.
+# Triggers maintain both: writes to plays mark the months of the rows
+# written; writes to tracks, albums and artists mark the months of the plays
+# that join through the row, found through the setup_indexes() indexes.
+# Renames don't fire them, as the rollup tables hold ids, not names.
+# rollup_state records the counter the tables match, so readers can tell at
+# a glance whether they are stale.
+_TRACK_MONTHS = "SELECT strftime('%Y-%m', timestamp) FROM plays WHERE track_id = {row}.id"
+_ALBUM_MONTHS = (
+    "SELECT strftime('%Y-%m', plays.timestamp) FROM plays "
+    "JOIN tracks ON plays.track_id = tracks.id WHERE tracks.album_id = {row}.id"
+)
+_ARTIST_MONTHS = (
+    "SELECT strftime('%Y-%m', plays.timestamp) FROM plays "
+    "JOIN tracks ON plays.track_id = tracks.id "
+    "JOIN albums ON tracks.album_id = albums.id WHERE albums.artist_id = {row}.id"
+)
+
+# Trigger name -> (when it fires, query for the months it marks)
+_CHANGE_TRIGGERS = {
+    "rollup_plays_insert": (
+        "AFTER INSERT ON plays",
+        "SELECT strftime('%Y-%m', NEW.timestamp)",
+    ),
+    "rollup_plays_update": (
+        "AFTER UPDATE ON plays",
+        (
+            "SELECT strftime('%Y-%m', OLD.timestamp) "
+            "UNION SELECT strftime('%Y-%m', NEW.timestamp)"
+        ),
+    ),
+    "rollup_plays_delete": (
+        "AFTER DELETE ON plays",
+        "SELECT strftime('%Y-%m', OLD.timestamp)",
+    ),
+    "rollup_tracks_insert": (
+        "AFTER INSERT ON tracks",
+        _TRACK_MONTHS.format(row="NEW"),
+    ),
+    "rollup_tracks_update": (
+        (
+            "AFTER UPDATE OF id, album_id ON tracks "
+            "WHEN OLD.id IS NOT NEW.id OR OLD.album_id IS NOT NEW.album_id"
+        ),
+        f"{_TRACK_MONTHS.format(row='OLD')} UNION {_TRACK_MONTHS.format(row='NEW')}",
+    ),
+    "rollup_tracks_delete": (
+        "AFTER DELETE ON tracks",
+        _TRACK_MONTHS.format(row="OLD"),
+    ),
+    "rollup_albums_insert": (
+        "AFTER INSERT ON albums",
+        _ALBUM_MONTHS.format(row="NEW"),
+    ),
+    "rollup_albums_update": (
+        (
+            "AFTER UPDATE OF id, artist_id ON albums "
+            "WHEN OLD.id IS NOT NEW.id OR OLD.artist_id IS NOT NEW.artist_id"
+        ),
+        f"{_ALBUM_MONTHS.format(row='OLD')} UNION {_ALBUM_MONTHS.format(row='NEW')}",
+    ),
+    "rollup_albums_delete": (
+        "AFTER DELETE ON albums",
+        _ALBUM_MONTHS.format(row="OLD"),
+    ),
+    "rollup_artists_insert": (
+        "AFTER INSERT ON artists",
+        _ARTIST_MONTHS.format(row="NEW"),
+    ),
+    "rollup_artists_update": (
+        "AFTER UPDATE OF id ON artists WHEN OLD.id IS NOT NEW.id",
+        f"{_ARTIST_MONTHS.format(row='OLD')} UNION {_ARTIST_MONTHS.format(row='NEW')}",
+    ),
+    "rollup_artists_delete": (
+        "AFTER DELETE ON artists",
+        _ARTIST_MONTHS.format(row="OLD"),
+    ),
+}
+
+_CHANGE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS rollup_changes (version INTEGER NOT NULL)",
+    """
+    INSERT INTO rollup_changes (version)
+    SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM rollup_changes)
+    """,
+    "CREATE TABLE IF NOT EXISTS rollup_dirty_months (month TEXT PRIMARY KEY)",
+    *(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {trigger} {timing} BEGIN
+            INSERT OR IGNORE INTO rollup_dirty_months (month) {months};
+            UPDATE rollup_changes SET version = version + 1;
+        END
+        """
+        for trigger, (timing, months) in _CHANGE_TRIGGERS.items()
+    ),
+)
+
+_MONTH_COLUMNS = {
+    "year": "CAST(substr(period, 1, 4) AS INTEGER)",
+    "month": "CAST(substr(period, 6, 2) AS INTEGER)",
+}
+
+# Rollup table -> (strftime period format, key columns derived from period)
+_ROLLUP_PERIODS = {
+    "rollup_month": ("%Y-%m", _MONTH_COLUMNS),
+    "rollup_year": ("%Y", {"year": "CAST(period AS INTEGER)"}),
+}
+
+def _artist_stats_query(where_clause: str = "") -> str:
+    """Build the query that fills artist_stats, in column order."""
+    return f"""
+        SELECT
+            albums.artist_id,
+            COUNT(*),
+            COUNT(DISTINCT tracks.id),
+            COUNT(DISTINCT albums.id),
+            MIN(plays.timestamp),
+            MAX(plays.timestamp)
+        FROM plays
+        JOIN tracks ON plays.track_id = tracks.id
+        JOIN albums ON tracks.album_id = albums.id
+        {where_clause}
+        GROUP BY albums.artist_id
+    """
+
+
+def _track_stats_query(where_clause: str = "") -> str:
+    """Build the query that fills track_stats, in column order."""
+    return f"""
+        SELECT
+            plays.track_id,
+            tracks.album_id,
+            COUNT(*),
+            MIN(plays.timestamp),
+            MAX(plays.timestamp)
+        FROM plays
+        JOIN tracks ON plays.track_id = tracks.id
+        {where_clause}
+        GROUP BY plays.track_id
+    """
+
+
+# Period format -> the same period derived from a 'YYYY-MM' month key
+_PERIOD_FROM_MONTH = {
+    "%Y-%m": "month",
+    "%Y": "substr(month, 1, 4)",
+}
+
+# Cube table -> (id column, expression it groups plays on, extra columns
+# stored alongside each id and the expressions they come from)
+_PLAY_CUBES = {
+    "agg_artist_month": ("artist_id", "albums.artist_id", {}),
+    "agg_track_month": (
+        "track_id",
+        "tracks.id",
+        {"album_id": "tracks.album_id", "artist_id": "albums.artist_id"},
+    ),
+}
+
+# Lets the rollup builds group plays by (month, track) without sorting.
+# Carrying timestamp as well makes it covering for their MIN/MAX, so the
+# scan never visits the plays table itself. It only lives for the length
+# of a build: one sort shared by the month and year rollups, rather than a
+# cost paid on every insert into plays.
+_BUILD_INDEX = """
+    CREATE INDEX IF NOT EXISTS plays_month_track_time
+    ON plays (strftime('%Y-%m', timestamp), track_id, timestamp)
+"""
+
+# Tables refresh_rollups() owns outright; a full build drops and rebuilds
+# them, so their definitions can change between versions.
+_ROLLUP_TABLES = (
+    "rollup_month",
+    "rollup_year",
+    "agg_artist_month",
+    "agg_track_month",
+    "artist_stats",
+    "track_stats",
+    "rollup_state",
+)
+
+
+def _rollup_query(period_format: str, where_clause: str = "") -> str:
+    """
+    Build the per-period aggregate over plays shared by all rollups.
+
+    Plays are first collapsed to one row per (month, track), which the
+    _BUILD_INDEX index lets SQLite do as a streaming scan. The joins
+    and the distinct counts then run over those rows rather than every play.
+    """
+    return f"""
+        WITH monthly_tracks AS (
+            SELECT
+                strftime('%Y-%m', plays.timestamp) as month,
+                plays.track_id,
+                COUNT(*) as scrobbles,
+                MIN(plays.timestamp) as first_played,
+                MAX(plays.timestamp) as last_played
+            FROM plays
+            {where_clause}
+            GROUP BY month, plays.track_id
+        )
+        SELECT
+            {_PERIOD_FROM_MONTH[period_format]} as period,
+            SUM(monthly_tracks.scrobbles) as scrobbles,
+            COUNT(DISTINCT artists.id) as unique_artists,
+            COUNT(DISTINCT albums.id) as unique_albums,
+            COUNT(DISTINCT tracks.id) as unique_tracks,
+            MIN(monthly_tracks.first_played) as first_played,
+            MAX(monthly_tracks.last_played) as last_played
+        FROM monthly_tracks
+        JOIN tracks ON monthly_tracks.track_id = tracks.id
+        JOIN albums ON tracks.album_id = albums.id
+        JOIN artists ON albums.artist_id = artists.id
+        GROUP BY period
+    """
+
+
+def _play_count_query(
+    key: str,
+    where_clause: str = "",
+    by_month: bool = False,
+    extra: Optional[dict] = None,
+) -> str:
+    """
+    Build a (id, plays, last_played) aggregate of plays grouped on key.
+
+    extra maps further column names to expressions that depend only on
+    key, e.g. a track's album, and appends them to each row.
+    """
+    period = "strftime('%Y-%m', plays.timestamp) as period, " if by_month else ""
+    extra_columns = "".join(
+        f", {expression} as {column}" for column, expression in (extra or {}).items()
+    )
+    return f"""
+        SELECT
+            {period}{key} as id,
+            COUNT(*) as plays,
+            MAX(plays.timestamp) as last_played{extra_columns}
+        FROM plays
+        JOIN tracks ON plays.track_id = tracks.id
+        JOIN albums ON tracks.album_id = albums.id
+        JOIN artists ON albums.artist_id = artists.id
+        {where_clause}
+        GROUP BY {"period, " if by_month else ""}{key}
+    """
+
+
+def _period_bounds(period: str) -> tuple[str, str]:
+    """Return the [start, end) plays.timestamp bounds of a 'YYYY' or 'YYYY-MM' period."""
+    if len(period) == 4:
+        return period, f"{int(period) + 1:04d}"
+    year, month = int(period[:4]), int(period[5:7])
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return period, f"{year:04d}-{month:02d}"
+
+
+_PERIOD_WHERE = "WHERE plays.timestamp >= ? AND plays.timestamp < ?"
+
+
+def _insert_rollup(
+    conn: sqlite3.Connection, table: str, where_clause: str = "", params=()
+) -> None:
+    """Fill a rollup table from the plays matching where_clause."""
+    period_format, key_columns = _ROLLUP_PERIODS[table]
+    columns = ", ".join(["period", *key_columns])
+    expressions = ", ".join(["period", *key_columns.values()])
+    stats = (
+        "scrobbles, unique_artists, unique_albums, unique_tracks, "
+        "first_played, last_played"
+    )
+    conn.execute(
+        f"INSERT INTO {table} ({columns}, {stats}) "
+        f"SELECT {expressions}, {stats} "
+        f"FROM ({_rollup_query(period_format, where_clause)})",
+        params,
+    )
+
+
+def _insert_cube(
+    conn: sqlite3.Connection, table: str, where_clause: str = "", params=()
+) -> None:
+    """Fill a per-month cube table from the plays matching where_clause."""
+    id_column, key, extra = _PLAY_CUBES[table]
+    extra_columns = "".join(f", {column}" for column in extra)
+    conn.execute(
+        f"INSERT INTO {table} "
+        f"(period, year, month, {id_column}, plays, last_played{extra_columns}) "
+        f"SELECT period, {', '.join(_MONTH_COLUMNS.values())}, "
+        f"id, plays, last_played{extra_columns} "
+        f"FROM ({_play_count_query(key, where_clause, by_month=True, extra=extra)})",
+        params,
+    )
+
+
+def _build_rollups(conn: sqlite3.Connection) -> None:
+    """Drop the rollup tables and build them from all of plays."""
+    for table in _ROLLUP_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    for statement in (*_CHANGE_SCHEMA, *_ROLLUP_SCHEMA, _BUILD_INDEX):
+        conn.execute(statement)
+    for table in _ROLLUP_PERIODS:
+        _insert_rollup(conn, table)
+    for table in _PLAY_CUBES:
+        _insert_cube(conn, table)
+    conn.execute(f"INSERT INTO artist_stats {_artist_stats_query()}")
+    conn.execute(f"INSERT INTO track_stats {_track_stats_query()}")
+    conn.execute("DROP INDEX plays_month_track_time")
+
+
+def _cube_ids(conn: sqlite3.Connection, table: str, column: str, months: str) -> set:
+    """Return the ids a cube table holds in column for a JSON list of months."""
+    return {
+        row[0]
+        for row in conn.execute(
+            f"SELECT DISTINCT {column} FROM {table} "
+            "WHERE period IN (SELECT value FROM json_each(?))",
+            [months],
+        )
+    }
+
+
+# Stats table -> (its id column, the cube holding that id per month, the
+# plays expression the id comes from, and the query that fills the table)
+_ALL_TIME_STATS = {
+    "artist_stats": (
+        "artist_id",
+        "agg_artist_month",
+        "albums.artist_id",
+        _artist_stats_query,
+    ),
+    "track_stats": (
+        "track_id",
+        "agg_track_month",
+        "plays.track_id",
+        _track_stats_query,
+    ),
+}
+
+
+def _update_rollups(conn: sqlite3.Connection) -> None:
+    """
+    Rebuild the rollup rows for the months listed in rollup_dirty_months.
+
+    Month rollups and cubes are rebuilt for each listed month, year rollups
+    for each year those fall in, and the all-time stats for every artist and
+    track the cubes held in those months, before or after. Each month or
+    year is read as a timestamp range over the plays primary key.
+    """
+    months = sorted(
+        row[0] for row in conn.execute("SELECT month FROM rollup_dirty_months") if row[0]
+    )
+    if not months:
+        return
+    months_json = json.dumps(months)
+    stale_ids = {
+        table: _cube_ids(conn, cube, column, months_json)
+        for table, (column, cube, _, _) in _ALL_TIME_STATS.items()
+    }
+
+    for month in months:
+        for table in ("rollup_month", *_PLAY_CUBES):
+            conn.execute(f"DELETE FROM {table} WHERE period = ?", [month])
+        _insert_rollup(conn, "rollup_month", _PERIOD_WHERE, _period_bounds(month))
+        for table in _PLAY_CUBES:
+            _insert_cube(conn, table, _PERIOD_WHERE, _period_bounds(month))
+    for year in sorted({month[:4] for month in months}):
+        conn.execute("DELETE FROM rollup_year WHERE period = ?", [year])
+        _insert_rollup(conn, "rollup_year", _PERIOD_WHERE, _period_bounds(year))
+
+    for table, (column, cube, source, query) in _ALL_TIME_STATS.items():
+        ids = stale_ids[table] | _cube_ids(conn, cube, column, months_json)
+        params = [json.dumps(sorted(ids))]
+        in_ids = "IN (SELECT value FROM json_each(?))"
+        conn.execute(f"DELETE FROM {table} WHERE {column} {in_ids}", params)
+        conn.execute(f"INSERT INTO {table} {query(f'WHERE {source} {in_ids}')}", params)
+
+
+def _built_version(conn: sqlite3.Connection) -> Optional[int]:
+    """Return the change version the rollup tables were built at, if any."""
+    try:
+        row = conn.execute("SELECT version FROM rollup_state").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def refresh_rollups(db: sqlite_utils.Database) -> None:
+    """
+    Bring the rollup, per-month cube and artist/track stats tables up to date.
+
+    Run after ingest or import. The first run builds the tables from all of
+    plays and installs the triggers that record which months later writes
+    touch; after that only those months are rebuilt. rollup_state records
+    the change version the tables match, and readers scan plays instead
+    whenever it differs, so stale tables are never used.
+    """
+    if not {"plays", "tracks", "albums", "artists"}.issubset(db.table_names()):
+        return
+
+    # sqlite-utils types Database.conn as optional
+    conn = cast(sqlite3.Connection, db.conn)
+    with conn:
+        if _built_version(conn) is None or _change_version(conn) is None:
+            _build_rollups(conn)
+        else:
+            _update_rollups(conn)
+        conn.execute("DELETE FROM rollup_dirty_months")
+        conn.execute("DELETE FROM rollup_state")
+        conn.execute(
+            "INSERT INTO rollup_state (version) VALUES (?)", [_change_version(conn)]
+        )
+
+
+def _rollups_fresh(conn: sqlite3.Connection) -> bool:
+    """Return True when the rollup tables exist and match the current data."""
+    version = _built_version(conn)
+    return version is not None and version == _change_version(conn)
+
+
+def _timestamp_param(value):
+    """
+    Format a range bound for comparison with plays.timestamp.
+
+    Plays are stored as ISO 8601 text in UTC, so aware datetimes are moved
+    to UTC first; the comparison then stays a plain text range over the
+    (timestamp, track_id) primary key index.
+    """
+    if not isinstance(value, datetime):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.isoformat()
+
+
+def _timestamp_conditions(since, until) -> tuple[list[str], list]:
+    """Build the plays.timestamp conditions and params for a since/until range."""
+    conditions = []
+    params = []
+    if since:
+        conditions.append("plays.timestamp >= ?")
+        params.append(_timestamp_param(since))
+    if until:
+        conditions.append("plays.timestamp <= ?")
+        params.append(_timestamp_param(until))
+    return conditions, params
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    """Check for one table by name, without listing the whole schema."""
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", [name]
+        ).fetchone()
+        is not None
+    )
+
+
+def _name_filter(
+    db: sqlite_utils.Database, table: str, column: str, value: str
+) -> tuple[str, str]:
+    """
+    Build a substring filter on table.column, as (condition, param).
+
+    Goes through the trigram index lastfm.setup_name_indexes() keeps for the
+    column when there is one and the value is long enough to narrow it (a
+    trigram is three characters); otherwise it is a plain LIKE scan. Either
+    way the value is a LIKE pattern, so % and _ keep their meaning.
+    """
+    pattern = f"%{value}%"
+    index = f"{table}_{column}_fts"
+    if len(value) >= 3 and _has_table(db.conn, index):
+        return (
+            f"{table}.rowid IN (SELECT rowid FROM {index} WHERE {column} LIKE ?)",
+            pattern,
+        )
+    return f"{table}.{column} LIKE ?", pattern
+
+
+def _dict_factory(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    """Row factory that keys each value by its result column name."""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def _execute_dicts(db: sqlite_utils.Database, sql: str, params=()) -> sqlite3.Cursor:
+    """
+    Execute a query on a fresh cursor whose rows come back as dicts.
+
+    The row factory is set on the cursor only, so other users of the shared
+    connection keep getting tuples. Query aliases become the dict keys.
+    """
+    cursor = db.conn.cursor()
+    cursor.row_factory = _dict_factory
+    return cursor.execute(sql, params)
+
+
+def _execute_rows(db: sqlite_utils.Database, sql: str, params=()) -> sqlite3.Cursor:
+    """
+    Execute a query on a fresh cursor whose rows come back as sqlite3.Row.
+
+    Row is built in C and reads by column name or index without a per-row
+    dict; use it where the caller streams rows straight into output.
+    """
+    cursor = db.conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    return cursor.execute(sql, params)
+
+
+def _split_periods(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: str,
+    since,
+    until,
+) -> tuple[list[tuple], list]:
+    """
+    Sort the periods of a rollup table by how much of them a range covers.
+
+    Returns the requested columns for every period whose plays all fall
+    inside since/until, and the keys of periods the range only partially
+    covers. At least one bound must be given.
+    """
+    _, params = _timestamp_conditions(since, until)
+    # A period is complete when all of its plays fall inside the range, and
+    # worth looking at when its plays straddle or touch the range at all.
+    complete = []
+    overlaps = []
+    if since:
+        complete.append("first_played >= ?")
+        overlaps.append("last_played >= ?")
+    if until:
+        complete.append("last_played <= ?")
+        overlaps.append("first_played <= ?")
+    query = f"""
+        SELECT period, {columns}, {" AND ".join(complete)} as complete
+        FROM {table}
+        WHERE {" AND ".join(overlaps)}
+    """
+    rows = []
+    partial = []
+    for row in conn.execute(query, [*params, *params]):
+        if row[-1]:
+            rows.append(row[1:-1])
+        else:
+            partial.append(row[0])
+    return rows, partial
+
+
+def _in_periods(period_format: str) -> str:
+    """Condition matching plays whose period is in a JSON array parameter."""
+    return (
+        f"strftime('{period_format}', plays.timestamp) IN "
+        "(SELECT value FROM json_each(?))"
+    )
+
+
+def _get_rollup(
+    conn: sqlite3.Connection,
+    table: str,
+    since,
+    until,
+    limit: int,
+) -> list[tuple]:
+    """
+    Return (period, scrobbles, artists, albums, tracks) rows, newest first.
+
+    Reads the materialized table when it is fresh. Periods the since/until
+    range only partially covers are recounted from plays, since distinct
+    counts can't be trimmed after the fact; everything else comes straight
+    from the table. Without fresh tables this is a single scan of plays.
+    """
+    period_format = _ROLLUP_PERIODS[table][0]
+    conditions, params = _timestamp_conditions(since, until)
+
+    if not _rollups_fresh(conn):
+        where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+        query = f"{_rollup_query(period_format, where_clause)} ORDER BY period DESC LIMIT ?"
+        return [row[:5] for row in conn.execute(query, [*params, limit])]
+
+    columns = "period, scrobbles, unique_artists, unique_albums, unique_tracks"
+    if not conditions:
+        query = f"SELECT {columns} FROM {table} ORDER BY period DESC LIMIT ?"
+        return conn.execute(query, [limit]).fetchall()
+
+    rows, partial = _split_periods(conn, table, columns, since, until)
+    if partial:
+        conditions.append(_in_periods(period_format))
+        params.append(json.dumps(partial))
+        where_clause = "WHERE " + " AND ".join(conditions)
+        rows.extend(
+            row[:5] for row in conn.execute(_rollup_query(period_format, where_clause), params)
+        )
+
+    rows.sort(key=lambda row: row[0] or "", reverse=True)
+    return rows if limit < 0 else rows[:limit]
+
+
+def _play_counts(
+    conn: sqlite3.Connection,
+    cube: str,
+    since,
+    until,
+) -> tuple[str, list]:
+    """
+    Build a subquery of (id, plays, last_played) rows covering a range.
+
+    Rows also carry the cube's extra columns. An id may appear more than
+    once, so callers SUM/MAX over it. With fresh
+    rollups the rows come from the cube table, plus a recount from plays of
+    months the range only partially covers; otherwise plays is grouped
+    directly.
+    """
+    id_column, key, extra = _PLAY_CUBES[cube]
+    conditions, params = _timestamp_conditions(since, until)
+
+    if not _rollups_fresh(conn):
+        where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return _play_count_query(key, where_clause, extra=extra), params
+
+    extra_columns = "".join(f", {column}" for column in extra)
+    cube_query = f"SELECT {id_column} as id, plays, last_played{extra_columns} FROM {cube}"
+    if not conditions:
+        return cube_query, []
+
+    complete, partial = _split_periods(conn, "rollup_month", "period", since, until)
+    query = f"{cube_query} WHERE period IN (SELECT value FROM json_each(?))"
+    cube_params = [json.dumps([row[0] for row in complete])]
+    if partial:
+        conditions.append(_in_periods("%Y-%m"))
+        params.append(json.dumps(partial))
+        where_clause = "WHERE " + " AND ".join(conditions)
+        query += f" UNION ALL {_play_count_query(key, where_clause, extra=extra)}"
+        cube_params.extend(params)
+    return query, cube_params
+
+
 def get_monthly_rollup(
     db: sqlite_utils.Database,
     since: Optional[datetime] = None,
@@ -53,6 +868,9 @@ def get_monthly_rollup(
     """
     Get scrobble statistics rolled up by month.
 
+    Served from the rollup_month table when refresh_rollups() has run since
+    the last change to plays, otherwise computed from plays directly.
+
     Args:
         db: Database connection
         since: Optional start date filter
@@ -67,54 +885,25 @@ def get_monthly_rollup(
     - unique_albums: Distinct albums played that month
     - unique_tracks: Distinct tracks played that month
     """
-    conditions = []
-    params = []
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be a positive integer")
 
-    if since:
-        conditions.append("plays.timestamp >= ?")
-        params.append(since.isoformat() if isinstance(since, datetime) else since)
-
-    if until:
-        conditions.append("plays.timestamp <= ?")
-        params.append(until.isoformat() if isinstance(until, datetime) else until)
-
-    where_clause = ""
-    if conditions:
-        where_clause = "WHERE " + " AND ".join(conditions)
-
-    limit_clause = ""
-    if limit is not None:
-        if limit <= 0:
-            raise ValueError("limit must be a positive integer")
-        limit_clause = f"LIMIT {limit}"
-
-    query = f"""
-        SELECT
-            CAST(strftime('%Y', plays.timestamp) AS INTEGER) as year,
-            CAST(strftime('%m', plays.timestamp) AS INTEGER) as month,
-            COUNT(*) as scrobbles,
-            COUNT(DISTINCT artists.id) as unique_artists,
-            COUNT(DISTINCT albums.id) as unique_albums,
-            COUNT(DISTINCT tracks.id) as unique_tracks
-        FROM plays
-        JOIN tracks ON plays.track_id = tracks.id
-        JOIN albums ON tracks.album_id = albums.id
-        JOIN artists ON albums.artist_id = artists.id
-        {where_clause}
-        GROUP BY year, month
-        ORDER BY year DESC, month DESC
-        {limit_clause}
-    """
+    # A reversed range can never match; skip the scan entirely
+    if _is_reversed_range(since, until):
+        return []
 
-    rows = db.execute(query, params).fetchall()
+    # -1 means no limit to SQLite
+    rows = _get_rollup(
+        db.conn, "rollup_month", since, until, int(limit) if limit is not None else -1
+    )
     return [
         {
-            "year": row[0],
-            "month": row[1],
-            "scrobbles": row[2],
-            "unique_artists": row[3],
-            "unique_albums": row[4],
-            "unique_tracks": row[5],
+            "year": int(row[0][:4]) if row[0] else None,
+            "month": int(row[0][5:7]) if row[0] else None,
+            "scrobbles": row[1],
+            "unique_artists": row[2],
+            "unique_albums": row[3],
+            "unique_tracks": row[4],
         }
         for row in rows
     ]
@@ -129,6 +918,9 @@ def get_yearly_rollup(
     """
     Get scrobble statistics rolled up by year.
 
+    Served from the rollup_year table when refresh_rollups() has run since
+    the last change to plays, otherwise computed from plays directly.
+
     Args:
         db: Database connection
         since: Optional start date filter
@@ -142,48 +934,21 @@ def get_yearly_rollup(
     - unique_albums: Distinct albums played that year
     - unique_tracks: Distinct tracks played that year
     """
-    conditions = []
-    params = []
-
-    if since:
-        conditions.append("plays.timestamp >= ?")
-        params.append(since.isoformat() if isinstance(since, datetime) else since)
-
-    if until:
-        conditions.append("plays.timestamp <= ?")
-        params.append(until.isoformat() if isinstance(until, datetime) else until)
-
-    where_clause = ""
-    if conditions:
-        where_clause = "WHERE " + " AND ".join(conditions)
-
-    limit_clause = ""
-    if limit is not None:
-        limit_value = int(limit)
-        if limit_value > 0:
-            limit_clause = f"LIMIT {limit_value}"
-
-    query = f"""
-        SELECT
-            CAST(strftime('%Y', plays.timestamp) AS INTEGER) as year,
-            COUNT(*) as scrobbles,
-            COUNT(DISTINCT artists.id) as unique_artists,
-            COUNT(DISTINCT albums.id) as unique_albums,
-            COUNT(DISTINCT tracks.id) as unique_tracks
-        FROM plays
-        JOIN tracks ON plays.track_id = tracks.id
-        JOIN albums ON tracks.album_id = albums.id
-        JOIN artists ON albums.artist_id = artists.id
-        {where_clause}
-        GROUP BY year
-        ORDER BY year DESC
-        {limit_clause}
-    """
+    # A reversed range can never match; skip the scan entirely
+    if _is_reversed_range(since, until):
+        return []
 
-    rows = db.execute(query, params).fetchall()
+    # -1 means no limit to SQLite; a non-positive limit is treated the same
+    rows = _get_rollup(
+        db.conn,
+        "rollup_year",
+        since,
+        until,
+        int(limit) if limit is not None and int(limit) > 0 else -1,
+    )
     return [
         {
-            "year": row[0],
+            "year": int(row[0]) if row[0] else None,
             "scrobbles": row[1],
             "unique_artists": row[2],
             "unique_albums": row[3],
@@ -193,6 +958,22 @@ def get_yearly_rollup(
     ]
 
 
+# Relative time expressions understood by parse_relative_time
+_RELATIVE_TIME_RE = re.compile(
+    r"(?P<day>today|yesterday)$"
+    r"|last\s+(?P<last_unit>week|month|year)"
+    r"|(?P<amount>\d+)\s+(?P<ago_unit>day|week|month|year)s?\s+ago"
+)
+
+# Maps a unit name to its relativedelta keyword
+_UNIT_DELTA = {
+    "day": "days",
+    "week": "weeks",
+    "month": "months",
+    "year": "years",
+}
+
+
 def parse_relative_time(time_str: str) -> Optional[datetime]:
     """
     Parse relative time expressions like '7 days ago' or absolute dates.
@@ -206,57 +987,76 @@ def parse_relative_time(time_str: str) -> Optional[datetime]:
     Returns:
         datetime object or None if parsing fails
     """
-    import re
-    from datetime import timedelta
-    from dateutil.relativedelta import relativedelta
-    import dateutil.parser
-
     time_str = time_str.strip().lower()
 
-    # Handle "today" and "yesterday"
-    if time_str == "today":
-        now = datetime.now()
-        return datetime(now.year, now.month, now.day)
-
-    if time_str == "yesterday":
-        now = datetime.now()
-        yesterday = now - timedelta(days=1)
-        return datetime(yesterday.year, yesterday.month, yesterday.day)
-
-    # Handle "last week/month/year"
-    last_pattern = re.match(r"last\s+(week|month|year)", time_str)
-    if last_pattern:
-        unit = last_pattern.group(1)
-        now = datetime.now()
-        if unit == "week":
-            return now - timedelta(weeks=1)
-        elif unit == "month":
-            return now - relativedelta(months=1)
-        elif unit == "year":
-            return now - relativedelta(years=1)
-
-    # Handle "N days/weeks/months/years ago"
-    ago_pattern = re.match(r"(\d+)\s+(day|week|month|year)s?\s+ago", time_str)
-    if ago_pattern:
-        amount = int(ago_pattern.group(1))
-        unit = ago_pattern.group(2)
-        now = datetime.now()
-        if unit == "day":
-            return now - timedelta(days=amount)
-        elif unit == "week":
-            return now - timedelta(weeks=amount)
-        elif unit == "month":
-            return now - relativedelta(months=amount)
-        elif unit == "year":
-            return now - relativedelta(years=amount)
-
-    # Fall back to dateutil parser for absolute dates
+    offset = _relative_offset(time_str)
+    if offset is None:
+        return _parse_absolute_time(time_str)
+
+    now = datetime.now()
+    if isinstance(offset, relativedelta):
+        return now - offset
+
+    start = now - timedelta(days=1) if offset == "yesterday" else now
+    return datetime(start.year, start.month, start.day)
+
+
+@lru_cache(maxsize=128)
+def _relative_offset(time_str: str) -> Union[str, relativedelta, None]:
+    """
+    Classify a (lowercased) time expression, independent of the clock.
+
+    Returns "today" or "yesterday", the relativedelta to subtract from now,
+    or None for an absolute date. Only this part is cached; the offset is
+    applied to a fresh datetime.now() on every call.
+    """
+    # One scan classifies the expression; no match means an absolute date
+    match = _RELATIVE_TIME_RE.match(time_str)
+    if not match:
+        return None
+
+    day = match.group("day")
+    if day:
+        return day
+
+    last_unit = match.group("last_unit")
+    if last_unit:
+        return relativedelta(**{_UNIT_DELTA[last_unit]: 1})
+
+    amount = int(match.group("amount"))
+    return relativedelta(**{_UNIT_DELTA[match.group("ago_unit")]: amount})
+
+
+@lru_cache(maxsize=128)
+def _parse_absolute_time(time_str: str) -> Optional[datetime]:
+    """
+    Parse an absolute (lowercased) date string.
+
+    Tries the C-implemented datetime.fromisoformat first, which covers the
+    usual ISO 8601 input, and only falls back to the much slower dateutil
+    parser for anything else.
+    """
+    iso_str = time_str[:-1] + "+00:00" if time_str.endswith("z") else time_str
+    try:
+        return datetime.fromisoformat(iso_str)
+    except ValueError:
+        pass
+
     try:
         return dateutil.parser.parse(time_str)
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, OverflowError):
         return None
 
 
+# Named periods accepted by parse_period_to_dates, in days back from now
+_PERIOD_DAYS = {
+    "week": 7,
+    "month": 30,
+    "quarter": 90,
+    "year": 365,
+}
+
+
 def parse_period_to_dates(period: str) -> tuple[Optional[datetime], Optional[datetime]]:
     """
     Convert period string to since/until dates.
@@ -271,24 +1071,15 @@ def parse_period_to_dates(period: str) -> tuple[Optional[datetime], Optional[dat
     Returns:
         Tuple of (since, until) datetime objects
     """
-    from datetime import timedelta
-
-    now = datetime.now()
     period = period.lower().strip()
-
-    if period == "week":
-        return (now - timedelta(days=7), now)
-    elif period == "month":
-        return (now - timedelta(days=30), now)
-    elif period == "quarter":
-        return (now - timedelta(days=90), now)
-    elif period == "year":
-        return (now - timedelta(days=365), now)
-    elif period == "all-time":
+    if period == "all-time":
         return (None, None)
-    else:
+    if period not in _PERIOD_DAYS:
         raise ValueError(f"Unknown period: {period}")
 
+    now = datetime.now()
+    return (now - timedelta(days=_PERIOD_DAYS[period]), now)
+
 
 def get_plays_with_filters(
     db: sqlite_utils.Database,
@@ -298,10 +1089,48 @@ def get_plays_with_filters(
     artist: Optional[str] = None,
     album: Optional[str] = None,
     track: Optional[str] = None,
+    before: Optional[datetime] = None,
 ) -> list[dict]:
     """
     Query plays with various filters.
 
+    See iter_plays_with_filters() for the arguments; this collects its rows
+    as dicts.
+    """
+    return [
+        dict(row)
+        for row in iter_plays_with_filters(
+            db,
+            limit=limit,
+            since=since,
+            until=until,
+            artist=artist,
+            album=album,
+            track=track,
+            before=before,
+        )
+    ]
+
+
+def iter_plays_with_filters(
+    db: sqlite_utils.Database,
+    limit: int = 20,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    artist: Optional[str] = None,
+    album: Optional[str] = None,
+    track: Optional[str] = None,
+    before: Optional[datetime] = None,
+) -> Iterator[sqlite3.Row]:
+    """
+    Stream plays matching various filters, most recent first.
+
+    Rows are yielded as SQLite produces them, as sqlite3.Row (use
+    row["artist_name"] or dict(row)), so a large history can be walked
+    without holding it all in memory or building a dict per play. For paging, pass the last
+    timestamp of one page as `before` for the next: the query resumes
+    from that point in the timestamp index instead of skipping rows.
+
     Args:
         db: Database connection
         limit: Maximum number of plays to return
@@ -310,38 +1139,50 @@ def get_plays_with_filters(
         artist: Artist name filter (partial match)
         album: Album title filter (partial match)
         track: Track title filter (partial match)
+        before: Only plays strictly before this timestamp
 
-    Returns:
-        List of dicts with play information
+    Yields:
+        Rows with play information
     """
-    conditions = []
-    params = []
+    conditions, params = _timestamp_conditions(since, until)
 
-    if since:
-        conditions.append("plays.timestamp >= ?")
-        params.append(since.isoformat() if isinstance(since, datetime) else since)
-
-    if until:
-        conditions.append("plays.timestamp <= ?")
-        params.append(until.isoformat() if isinstance(until, datetime) else until)
+    if before:
+        conditions.append("plays.timestamp < ?")
+        params.append(_timestamp_param(before))
 
     if artist:
-        conditions.append("artists.name LIKE ?")
-        params.append(f"%{artist}%")
+        condition, param = _name_filter(db, "artists", "name", artist)
+        conditions.append(condition)
+        params.append(param)
 
     if album:
-        conditions.append("albums.title LIKE ?")
-        params.append(f"%{album}%")
+        condition, param = _name_filter(db, "albums", "title", album)
+        conditions.append(condition)
+        params.append(param)
 
     if track:
-        conditions.append("tracks.title LIKE ?")
-        params.append(f"%{track}%")
+        condition, param = _name_filter(db, "tracks", "title", track)
+        conditions.append(condition)
+        params.append(param)
+
+    params.append(limit)
+
+    yield from _execute_rows(db, _plays_query(tuple(conditions)), params)
 
+
+@lru_cache(maxsize=64)
+def _plays_query(conditions: tuple[str, ...]) -> str:
+    """
+    Assemble the plays listing query for a combination of filter conditions.
+
+    There are only a few dozen combinations, each always the same SQL
+    text, so the string is built once per combination.
+    """
     where_clause = ""
     if conditions:
         where_clause = "WHERE " + " AND ".join(conditions)
 
-    query = f"""
+    return f"""
         SELECT
             plays.timestamp,
             artists.name as artist_name,
@@ -355,18 +1196,6 @@ def get_plays_with_filters(
         ORDER BY plays.timestamp DESC
         LIMIT ?
     """
-    params.append(limit)
-
-    rows = db.execute(query, params).fetchall()
-    return [
-        {
-            "timestamp": row[0],
-            "artist_name": row[1],
-            "track_title": row[2],
-            "album_title": row[3],
-        }
-        for row in rows
-    ]
 
 
 def get_artists_with_stats(
@@ -393,22 +1222,6 @@ def get_artists_with_stats(
     Returns:
         List of dicts with artist statistics
     """
-    conditions = []
-    params = []
-
-    # Date filters apply to plays
-    if since:
-        conditions.append("plays.timestamp >= ?")
-        params.append(since.isoformat() if isinstance(since, datetime) else since)
-
-    if until:
-        conditions.append("plays.timestamp <= ?")
-        params.append(until.isoformat() if isinstance(until, datetime) else until)
-
-    where_clause = ""
-    if conditions:
-        where_clause = "WHERE " + " AND ".join(conditions)
-
     # Determine ORDER BY clause
     if sort_by == "plays":
         order_clause = f"ORDER BY play_count {order.upper()}"
@@ -419,19 +1232,39 @@ def get_artists_with_stats(
     else:
         raise ValueError(f"Unknown sort_by: {sort_by}")
 
+    # All-time totals are already kept per artist
+    if since is None and until is None and _rollups_fresh(db.conn):
+        query = f"""
+            SELECT
+                artists.id as artist_id,
+                artists.name as artist_name,
+                artist_stats.play_count,
+                artist_stats.track_count,
+                artist_stats.album_count,
+                artist_stats.last_played
+            FROM artist_stats
+            JOIN artists ON artist_stats.artist_id = artists.id
+            WHERE artist_stats.play_count >= ?
+            {order_clause}
+            LIMIT ?
+        """
+        return list(_execute_dicts(db, query, [min_plays, limit]))
+
+    # Date filters apply to plays; counts are per track, with each track's
+    # album and artist alongside, so distinct track/album counts can still
+    # be taken over them without joining back through tracks and albums.
+    counts, params = _play_counts(db.conn, "agg_track_month", since, until)
+
     query = f"""
         SELECT
             artists.id as artist_id,
-            artists.name as artist_name,
-            COUNT(*) as play_count,
-            COUNT(DISTINCT tracks.id) as track_count,
-            COUNT(DISTINCT albums.id) as album_count,
-            MAX(plays.timestamp) as last_played
-        FROM plays
-        JOIN tracks ON plays.track_id = tracks.id
-        JOIN albums ON tracks.album_id = albums.id
-        JOIN artists ON albums.artist_id = artists.id
-        {where_clause}
+            artists.name as artist_name,
+            SUM(counts.plays) as play_count,
+            COUNT(DISTINCT counts.id) as track_count,
+            COUNT(DISTINCT counts.album_id) as album_count,
+            MAX(counts.last_played) as last_played
+        FROM ({counts}) as counts
+        JOIN artists ON counts.artist_id = artists.id
         GROUP BY artists.id, artists.name
         HAVING play_count >= ?
         {order_clause}
@@ -439,18 +1272,7 @@ def get_artists_with_stats(
     """
     params.extend([min_plays, limit])
 
-    rows = db.execute(query, params).fetchall()
-    return [
-        {
-            "artist_id": row[0],
-            "artist_name": row[1],
-            "play_count": row[2],
-            "track_count": row[3],
-            "album_count": row[4],
-            "last_played": row[5],
-        }
-        for row in rows
-    ]
+    return list(_execute_dicts(db, query, params))
 
 
 def get_albums_by_search(
@@ -471,12 +1293,14 @@ def get_albums_by_search(
     Returns:
         List of dicts with album information
     """
-    conditions = ["albums.title LIKE ?"]
-    params = [f"%{query}%"]
+    condition, param = _name_filter(db, "albums", "title", query)
+    conditions = [condition]
+    params = [param]
 
     if artist:
-        conditions.append("artists.name LIKE ?")
-        params.append(f"%{artist}%")
+        condition, param = _name_filter(db, "artists", "name", artist)
+        conditions.append(condition)
+        params.append(param)
 
     where_clause = "WHERE " + " AND ".join(conditions)
 
@@ -499,18 +1323,7 @@ def get_albums_by_search(
     """
     params.append(limit)
 
-    rows = db.execute(sql, params).fetchall()
-    return [
-        {
-            "album_id": row[0],
-            "album_title": row[1],
-            "artist_name": row[2],
-            "track_count": row[3],
-            "play_count": row[4],
-            "last_played": row[5],
-        }
-        for row in rows
-    ]
+    return list(_execute_dicts(db, sql, params))
 
 
 def get_tracks_by_search(
@@ -533,16 +1346,19 @@ def get_tracks_by_search(
     Returns:
         List of dicts with track information
     """
-    conditions = ["tracks.title LIKE ?"]
-    params = [f"%{query}%"]
+    condition, param = _name_filter(db, "tracks", "title", query)
+    conditions = [condition]
+    params = [param]
 
     if artist:
-        conditions.append("artists.name LIKE ?")
-        params.append(f"%{artist}%")
+        condition, param = _name_filter(db, "artists", "name", artist)
+        conditions.append(condition)
+        params.append(param)
 
     if album:
-        conditions.append("albums.title LIKE ?")
-        params.append(f"%{album}%")
+        condition, param = _name_filter(db, "albums", "title", album)
+        conditions.append(condition)
+        params.append(param)
 
     where_clause = "WHERE " + " AND ".join(conditions)
 
@@ -565,18 +1381,7 @@ def get_tracks_by_search(
     """
     params.append(limit)
 
-    rows = db.execute(sql, params).fetchall()
-    return [
-        {
-            "track_id": row[0],
-            "track_title": row[1],
-            "artist_name": row[2],
-            "album_title": row[3],
-            "play_count": row[4],
-            "last_played": row[5],
-        }
-        for row in rows
-    ]
+    return list(_execute_dicts(db, sql, params))
 
 
 def get_albums_list(
@@ -607,8 +1412,9 @@ def get_albums_list(
     params = []
 
     if artist:
-        conditions.append("artists.name LIKE ?")
-        params.append(f"%{artist}%")
+        condition, param = _name_filter(db, "artists", "name", artist)
+        conditions.append(condition)
+        params.append(param)
 
     if artist_id:
         conditions.append("artists.id = ?")
@@ -652,18 +1458,12 @@ def get_albums_list(
         params.append(min_plays)
     params.append(limit)
 
-    rows = db.execute(sql, params).fetchall()
-    return [
-        {
-            "album_id": row[0],
-            "album_title": row[1],
-            "artist_name": row[2],
-            "track_count": row[3],
-            "play_count": row[4],
-            "last_played": row[5],
-        }
-        for row in rows
-    ]
+    return list(_execute_dicts(db, sql, params))
+
+
+def _fuzz_partial(query: str, name: str) -> float:
+    """Case-insensitive rapidfuzz partial_ratio, registered as fuzz_partial()."""
+    return fuzz.partial_ratio(query.lower(), name.lower())
 
 
 def get_artists_by_search(
@@ -682,10 +1482,8 @@ def get_artists_by_search(
     Returns:
         List of dicts with artist information
     """
-    from rapidfuzz import fuzz
-
     # First try FTS5 search if the tracks_fts table exists
-    if "tracks_fts" in db.table_names():
+    if _has_table(db.conn, "tracks_fts"):
         # Use FTS5 to search artist names
         fts_sql = """
             SELECT DISTINCT
@@ -707,13 +1505,14 @@ def get_artists_by_search(
 
     # If FTS5 didn't return enough results, supplement with LIKE search
     if len(artist_ids) < limit:
-        like_sql = """
+        condition, param = _name_filter(db, "artists", "name", query)
+        like_sql = f"""
             SELECT DISTINCT artists.id
             FROM artists
-            WHERE artists.name LIKE ?
+            WHERE {condition}
             LIMIT ?
         """
-        like_results = db.execute(like_sql, [f"%{query}%", limit * 2]).fetchall()
+        like_results = db.execute(like_sql, [param, limit * 2]).fetchall()
         like_ids = [row[0] for row in like_results]
 
         # Combine FTS and LIKE results, removing duplicates
@@ -723,45 +1522,30 @@ def get_artists_by_search(
     if not artist_ids:
         return []
 
-    # Get full artist details with play statistics
-    placeholders = ",".join("?" * len(artist_ids))
-    sql = f"""
+    # Get full artist details with play statistics, scored and ranked in
+    # SQL. The ids go in as one JSON array, so the SQL text never changes
+    # and the candidate count isn't bounded by SQLite's host parameter limit.
+    db.conn.create_function("fuzz_partial", 2, _fuzz_partial, deterministic=True)
+    sql = """
         SELECT
             artists.id as artist_id,
             artists.name as artist_name,
             COUNT(DISTINCT albums.id) as album_count,
             COUNT(DISTINCT tracks.id) as track_count,
             COUNT(plays.timestamp) as play_count,
-            MAX(plays.timestamp) as last_played
+            MAX(plays.timestamp) as last_played,
+            fuzz_partial(?, artists.name) as fuzzy_score
         FROM artists
         LEFT JOIN albums ON albums.artist_id = artists.id
         LEFT JOIN tracks ON tracks.album_id = albums.id
         LEFT JOIN plays ON plays.track_id = tracks.id
-        WHERE artists.id IN ({placeholders})
+        WHERE artists.id IN (SELECT value FROM json_each(?))
         GROUP BY artists.id, artists.name
+        ORDER BY fuzzy_score DESC, play_count DESC, artists.id
+        LIMIT ?
     """
 
-    rows = db.execute(sql, artist_ids).fetchall()
-    results = [
-        {
-            "artist_id": row[0],
-            "artist_name": row[1],
-            "album_count": row[2],
-            "track_count": row[3],
-            "play_count": row[4],
-            "last_played": row[5],
-        }
-        for row in rows
-    ]
-
-    # Use rapidfuzz to score and rank results
-    for result in results:
-        result["fuzzy_score"] = fuzz.partial_ratio(query.lower(), result["artist_name"].lower())
-
-    # Sort by fuzzy score (descending), then by play count
-    results.sort(key=lambda x: (x["fuzzy_score"], x["play_count"]), reverse=True)
-
-    return results[:limit]
+    return list(_execute_dicts(db, sql, [query, json.dumps(artist_ids), limit]))
 
 
 def get_top_artists(
@@ -782,45 +1566,33 @@ def get_top_artists(
     Returns:
         List of dicts with artist statistics including rank and percentage
     """
-    conditions = []
-    params = []
-
-    if since:
-        conditions.append("plays.timestamp >= ?")
-        params.append(since.isoformat() if isinstance(since, datetime) else since)
-
-    if until:
-        conditions.append("plays.timestamp <= ?")
-        params.append(until.isoformat() if isinstance(until, datetime) else until)
-
-    where_clause = ""
-    if conditions:
-        where_clause = "WHERE " + " AND ".join(conditions)
-
-    # First get total plays in period
-    total_query = f"""
-        SELECT COUNT(*) FROM plays {where_clause}
-    """
-    total_plays = db.execute(total_query, params).fetchone()[0]
-
-    # Get top artists
+    # Rank on the per-artist counts, then look up names for the winners only.
+    # The windowed SUM carries the total plays in period on every row, so
+    # ranking and total come out of a single pass over the counts.
+    counts, params = _play_counts(db.conn, "agg_artist_month", since, until)
     query = f"""
         SELECT
             artists.id as artist_id,
             artists.name as artist_name,
-            COUNT(*) as play_count
-        FROM plays
-        JOIN tracks ON plays.track_id = tracks.id
-        JOIN albums ON tracks.album_id = albums.id
-        JOIN artists ON albums.artist_id = artists.id
-        {where_clause}
-        GROUP BY artists.id, artists.name
-        ORDER BY play_count DESC
-        LIMIT ?
+            top.play_count,
+            top.total_plays
+        FROM (
+            SELECT
+                id,
+                SUM(plays) as play_count,
+                SUM(SUM(plays)) OVER () as total_plays
+            FROM ({counts})
+            GROUP BY id
+            ORDER BY play_count DESC
+            LIMIT ?
+        ) as top
+        JOIN artists ON top.id = artists.id
+        ORDER BY top.play_count DESC
     """
     params.append(limit)
 
     rows = db.execute(query, params).fetchall()
+    total_plays = rows[0][3] if rows else 0
 
     # Calculate days in period for avg plays/day
     if since and until:
@@ -831,8 +1603,6 @@ def get_top_artists(
         days = (until - datetime.now()).days or 1
     else:
         # All time - calculate from first to last play
-        import dateutil.parser
-
         date_range = db.execute(
             "SELECT MIN(timestamp), MAX(timestamp) FROM plays"
         ).fetchone()
@@ -876,48 +1646,29 @@ def get_top_tracks(
     Returns:
         List of dicts with track statistics including rank and percentage
     """
-    conditions = []
-    params = []
-
-    if since:
-        conditions.append("plays.timestamp >= ?")
-        params.append(since.isoformat() if isinstance(since, datetime) else since)
-
-    if until:
-        conditions.append("plays.timestamp <= ?")
-        params.append(until.isoformat() if isinstance(until, datetime) else until)
+    counts, params = _play_counts(db.conn, "agg_track_month", since, until)
 
+    artist_clause = ""
     if artist:
-        conditions.append("artists.name LIKE ?")
-        params.append(f"%{artist}%")
-
-    where_clause = ""
-    if conditions:
-        where_clause = "WHERE " + " AND ".join(conditions)
-
-    # First get total plays in period
-    total_query = f"""
-        SELECT COUNT(*) FROM plays
-        JOIN tracks ON plays.track_id = tracks.id
-        JOIN albums ON tracks.album_id = albums.id
-        JOIN artists ON albums.artist_id = artists.id
-        {where_clause}
-    """
-    total_plays = db.execute(total_query, params[:]).fetchone()[0]
+        condition, param = _name_filter(db, "artists", "name", artist)
+        artist_clause = f"WHERE {condition}"
+        params.append(param)
 
-    # Get top tracks
+    # The windowed SUM carries the total plays in period on every row,
+    # saving a second pass over the same counts.
     query = f"""
         SELECT
             tracks.id as track_id,
             tracks.title as track_title,
             artists.name as artist_name,
             albums.title as album_title,
-            COUNT(*) as play_count
-        FROM plays
-        JOIN tracks ON plays.track_id = tracks.id
+            SUM(counts.plays) as play_count,
+            SUM(SUM(counts.plays)) OVER () as total_plays
+        FROM ({counts}) as counts
+        JOIN tracks ON counts.id = tracks.id
         JOIN albums ON tracks.album_id = albums.id
         JOIN artists ON albums.artist_id = artists.id
-        {where_clause}
+        {artist_clause}
         GROUP BY tracks.id, tracks.title, artists.name, albums.title
         ORDER BY play_count DESC
         LIMIT ?
@@ -925,6 +1676,7 @@ def get_top_tracks(
     params.append(limit)
 
     rows = db.execute(query, params).fetchall()
+    total_plays = rows[0][5] if rows else 0
     return [
         {
             "rank": i + 1,
@@ -939,6 +1691,120 @@ def get_top_tracks(
     ]
 
 
+def get_dashboard_bundle(
+    db: sqlite_utils.Database,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 10,
+) -> dict:
+    """
+    Get overview counts, top artists and top tracks for a range in one query.
+
+    The filtered plays are joined once in a CTE that each section reads,
+    and the sections come back as one UNION ALL result tagged by kind.
+
+    Args:
+        db: Database connection
+        since: Start date filter
+        until: End date filter
+        limit: Number of top artists and of top tracks to return
+
+    Returns:
+        Dict with "overview" (the get_overview_stats keys, counted over
+        plays in range), "top_artists" and "top_tracks" (as from
+        get_top_artists/get_top_tracks, without avg_plays_per_day)
+    """
+    conditions, params = _timestamp_conditions(since, until)
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Columns: kind, id, name, artist_name, album_title, plays, then the
+    # overview-only unique counts and first/last play.
+    query = f"""
+        WITH filtered AS (
+            SELECT plays.timestamp, plays.track_id, tracks.album_id, albums.artist_id
+            FROM plays
+            JOIN tracks ON plays.track_id = tracks.id
+            JOIN albums ON tracks.album_id = albums.id
+            {where_clause}
+        )
+        SELECT
+            'overview', NULL, NULL, NULL, NULL, COUNT(*),
+            COUNT(DISTINCT artist_id), COUNT(DISTINCT album_id),
+            COUNT(DISTINCT track_id), MIN(timestamp), MAX(timestamp)
+        FROM filtered
+        UNION ALL
+        SELECT * FROM (
+            SELECT
+                'top_artist', artists.id, artists.name, NULL, NULL,
+                COUNT(*) as play_count, NULL, NULL, NULL, NULL, NULL
+            FROM filtered
+            JOIN artists ON filtered.artist_id = artists.id
+            GROUP BY artists.id
+            ORDER BY play_count DESC
+            LIMIT ?
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT
+                'top_track', tracks.id, tracks.title, artists.name, albums.title,
+                COUNT(*) as play_count, NULL, NULL, NULL, NULL, NULL
+            FROM filtered
+            JOIN tracks ON filtered.track_id = tracks.id
+            JOIN albums ON filtered.album_id = albums.id
+            JOIN artists ON filtered.artist_id = artists.id
+            GROUP BY tracks.id
+            ORDER BY play_count DESC
+            LIMIT ?
+        )
+    """
+    params.extend([limit, limit])
+
+    overview = {}
+    top_artists = []
+    top_tracks = []
+    for row in db.execute(query, params):
+        kind, item_id, name, artist_name, album_title, play_count = row[:6]
+        if kind == "overview":
+            overview = {
+                "total_scrobbles": play_count,
+                "unique_artists": row[6],
+                "unique_albums": row[7],
+                "unique_tracks": row[8],
+                "first_scrobble": row[9],
+                "last_scrobble": row[10],
+            }
+        elif kind == "top_artist":
+            top_artists.append(
+                {
+                    "rank": len(top_artists) + 1,
+                    "artist_id": item_id,
+                    "artist_name": name,
+                    "play_count": play_count,
+                }
+            )
+        else:
+            top_tracks.append(
+                {
+                    "rank": len(top_tracks) + 1,
+                    "track_id": item_id,
+                    "track_title": name,
+                    "artist_name": artist_name,
+                    "album_title": album_title,
+                    "play_count": play_count,
+                }
+            )
+
+    total_plays = overview["total_scrobbles"]
+    for item in top_artists + top_tracks:
+        item["percentage"] = item["play_count"] / total_plays * 100 if total_plays else 0
+
+    return {
+        "overview": overview,
+        "top_artists": top_artists,
+        "top_tracks": top_tracks,
+    }
+
+
 def get_artist_details(
     db: sqlite_utils.Database,
     artist_id: Optional[int] = None,
@@ -950,7 +1816,8 @@ def get_artist_details(
     Args:
         db: Database connection
         artist_id: Artist ID (exact match)
-        artist_name: Artist name (partial match if no ID provided)
+        artist_name: Artist name (exact, prefix, then partial match if no
+            ID provided)
 
     Returns:
         Dict with artist details or None if not found
@@ -962,13 +1829,21 @@ def get_artist_details(
             [artist_id],
         ).fetchone()
     elif artist_name:
-        # Partial match by name
-        matches = db.execute(
-            "SELECT id, name FROM artists WHERE name LIKE ? LIMIT 2",
-            [f"%{artist_name}%"],
-        ).fetchall()
-
-        if not matches:
+        # Match by name: exact, then prefix, then substring. The first two
+        # can use the artists_name_nocase index; only the last scans.
+        probes = (
+            ("name = ? COLLATE NOCASE", artist_name),
+            ("name LIKE ?", f"{artist_name}%"),
+            ("name LIKE ?", f"%{artist_name}%"),
+        )
+        for condition, param in probes:
+            matches = db.execute(
+                f"SELECT id, name FROM artists WHERE {condition} LIMIT 2",
+                [param],
+            ).fetchall()
+            if matches:
+                break
+        else:
             return None
         if len(matches) > 1:
             # Multiple matches - caller should handle disambiguation
@@ -984,22 +1859,32 @@ def get_artist_details(
     artist_id = artist_row[0]
     artist_name = artist_row[1]
 
-    # Get statistics
-    stats = db.execute(
-        """
-        SELECT
-            COUNT(*) as play_count,
-            COUNT(DISTINCT tracks.id) as track_count,
-            COUNT(DISTINCT albums.id) as album_count,
-            MIN(plays.timestamp) as first_played,
-            MAX(plays.timestamp) as last_played
-        FROM plays
-        JOIN tracks ON plays.track_id = tracks.id
-        JOIN albums ON tracks.album_id = albums.id
-        WHERE albums.artist_id = ?
-        """,
-        [artist_id],
-    ).fetchone()
+    # Get statistics; an artist without plays has no artist_stats row
+    if _rollups_fresh(db.conn):
+        stats = db.execute(
+            """
+            SELECT play_count, track_count, album_count, first_played, last_played
+            FROM artist_stats
+            WHERE artist_id = ?
+            """,
+            [artist_id],
+        ).fetchone() or (0, 0, 0, None, None)
+    else:
+        stats = db.execute(
+            """
+            SELECT
+                COUNT(*) as play_count,
+                COUNT(DISTINCT tracks.id) as track_count,
+                COUNT(DISTINCT albums.id) as album_count,
+                MIN(plays.timestamp) as first_played,
+                MAX(plays.timestamp) as last_played
+            FROM plays
+            JOIN tracks ON plays.track_id = tracks.id
+            JOIN albums ON tracks.album_id = albums.id
+            WHERE albums.artist_id = ?
+            """,
+            [artist_id],
+        ).fetchone()
 
     return {
         "artist_id": artist_id,
@@ -1044,17 +1929,7 @@ def get_artist_top_tracks(
         LIMIT ?
     """
 
-    rows = db.execute(query, [artist_id, limit]).fetchall()
-    return [
-        {
-            "track_id": row[0],
-            "track_title": row[1],
-            "album_title": row[2],
-            "play_count": row[3],
-            "last_played": row[4],
-        }
-        for row in rows
-    ]
+    return list(_execute_dicts(db, query, [artist_id, limit]))
 
 
 def get_artist_albums(
@@ -1086,17 +1961,23 @@ def get_artist_albums(
         ORDER BY play_count DESC
     """
 
-    rows = db.execute(query, [artist_id]).fetchall()
-    return [
-        {
-            "album_id": row[0],
-            "album_title": row[1],
-            "track_count": row[2],
-            "play_count": row[3],
-            "last_played": row[4],
-        }
-        for row in rows
-    ]
+    return list(_execute_dicts(db, query, [artist_id]))
+
+
+# Album statistics selected alongside an album row: its track count, then,
+# when the rollups are fresh, its play totals summed from track_stats
+# (tracks without plays have no track_stats row)
+_ALBUM_TRACK_COUNT_COLUMN = """,
+    (SELECT COUNT(*) FROM tracks WHERE tracks.album_id = albums.id)
+"""
+_ALBUM_PLAY_STATS_COLUMNS = """,
+    (SELECT COALESCE(SUM(play_count), 0) FROM track_stats
+        WHERE track_stats.album_id = albums.id),
+    (SELECT MIN(first_played) FROM track_stats
+        WHERE track_stats.album_id = albums.id),
+    (SELECT MAX(last_played) FROM track_stats
+        WHERE track_stats.album_id = albums.id)
+"""
 
 
 def get_album_details(
@@ -1117,11 +1998,18 @@ def get_album_details(
     Returns:
         Dict with album details or None if not found
     """
+    # The statistics come back on the same row as the album; only stale
+    # rollups need a second query, over plays
+    fresh = _rollups_fresh(db.conn)
+    stats_columns = _ALBUM_TRACK_COUNT_COLUMN
+    if fresh:
+        stats_columns += _ALBUM_PLAY_STATS_COLUMNS
+
     if album_id:
         # Exact match by ID
         album_row = db.execute(
-            """
-            SELECT albums.id, albums.title, artists.name
+            f"""
+            SELECT albums.id, albums.title, artists.name{stats_columns}
             FROM albums
             JOIN artists ON albums.artist_id = artists.id
             WHERE albums.id = ?
@@ -1129,29 +2017,26 @@ def get_album_details(
             [album_id],
         ).fetchone()
     elif album_title:
-        # Partial match by title
+        # Partial match by title, through the trigram indexes when present
+        condition, param = _name_filter(db, "albums", "title", album_title)
+        conditions = [condition]
+        params = [param]
+
         if artist_name:
-            matches = db.execute(
-                """
-                SELECT albums.id, albums.title, artists.name
-                FROM albums
-                JOIN artists ON albums.artist_id = artists.id
-                WHERE albums.title LIKE ? AND artists.name LIKE ?
-                LIMIT 2
-                """,
-                [f"%{album_title}%", f"%{artist_name}%"],
-            ).fetchall()
-        else:
-            matches = db.execute(
-                """
-                SELECT albums.id, albums.title, artists.name
-                FROM albums
-                JOIN artists ON albums.artist_id = artists.id
-                WHERE albums.title LIKE ?
-                LIMIT 2
-                """,
-                [f"%{album_title}%"],
-            ).fetchall()
+            condition, param = _name_filter(db, "artists", "name", artist_name)
+            conditions.append(condition)
+            params.append(param)
+
+        matches = db.execute(
+            f"""
+            SELECT albums.id, albums.title, artists.name{stats_columns}
+            FROM albums
+            JOIN artists ON albums.artist_id = artists.id
+            WHERE {" AND ".join(conditions)}
+            LIMIT 2
+            """,
+            params,
+        ).fetchall()
 
         if not matches:
             return None
@@ -1169,21 +2054,23 @@ def get_album_details(
     album_title = album_row[1]
     artist_name = album_row[2]
 
-    # Get statistics
-    stats = db.execute(
-        """
-        SELECT
-            COUNT(DISTINCT tracks.id) as track_count,
-            COUNT(plays.timestamp) as play_count,
-            MIN(plays.timestamp) as first_played,
-            MAX(plays.timestamp) as last_played
-        FROM albums
-        LEFT JOIN tracks ON tracks.album_id = albums.id
-        LEFT JOIN plays ON plays.track_id = tracks.id
-        WHERE albums.id = ?
-        """,
-        [album_id],
-    ).fetchone()
+    if fresh:
+        stats = album_row[3:]
+    else:
+        # Plays are aggregated apart from the album row: joining them repeats
+        # it once per play. Answered from the (track_id, timestamp) index.
+        play_stats = db.execute(
+            """
+            SELECT
+                COUNT(*) as play_count,
+                MIN(timestamp) as first_played,
+                MAX(timestamp) as last_played
+            FROM plays
+            WHERE track_id IN (SELECT id FROM tracks WHERE album_id = ?)
+            """,
+            [album_id],
+        ).fetchone()
+        stats = (album_row[3], *play_stats)
 
     return {
         "album_id": album_id,
@@ -1210,29 +2097,33 @@ def get_album_tracks(
     Returns:
         List of dicts with track information
     """
-    query = """
-        SELECT
-            tracks.id as track_id,
-            tracks.title as track_title,
-            COUNT(plays.timestamp) as play_count,
-            MAX(plays.timestamp) as last_played
-        FROM tracks
-        LEFT JOIN plays ON plays.track_id = tracks.id
-        WHERE tracks.album_id = ?
-        GROUP BY tracks.id, tracks.title
-        ORDER BY tracks.id ASC
-    """
+    if _rollups_fresh(db.conn):
+        query = """
+            SELECT
+                tracks.id as track_id,
+                tracks.title as track_title,
+                COALESCE(track_stats.play_count, 0) as play_count,
+                track_stats.last_played
+            FROM tracks
+            LEFT JOIN track_stats ON track_stats.track_id = tracks.id
+            WHERE tracks.album_id = ?
+            ORDER BY tracks.id ASC
+        """
+    else:
+        query = """
+            SELECT
+                tracks.id as track_id,
+                tracks.title as track_title,
+                COUNT(plays.timestamp) as play_count,
+                MAX(plays.timestamp) as last_played
+            FROM tracks
+            LEFT JOIN plays ON plays.track_id = tracks.id
+            WHERE tracks.album_id = ?
+            GROUP BY tracks.id, tracks.title
+            ORDER BY tracks.id ASC
+        """
 
-    rows = db.execute(query, [album_id]).fetchall()
-    return [
-        {
-            "track_id": row[0],
-            "track_title": row[1],
-            "play_count": row[2],
-            "last_played": row[3],
-        }
-        for row in rows
-    ]
+    return list(_execute_dicts(db, query, [album_id]))
 
 
 def get_track_details(
@@ -1241,6 +2132,8 @@ def get_track_details(
     track_title: Optional[str] = None,
     artist_name: Optional[str] = None,
     album_title: Optional[str] = None,
+    artist_id: Optional[int] = None,
+    album_id: Optional[int] = None,
 ) -> Optional[dict]:
     """
     Get detailed information about a specific track.
@@ -1251,43 +2144,75 @@ def get_track_details(
         track_title: Track title (partial match if no ID provided)
         artist_name: Artist name for disambiguation
         album_title: Album title for disambiguation
+        artist_id: Artist ID for disambiguation (exact; used over artist_name)
+        album_id: Album ID for disambiguation (exact; used over album_title)
 
     Returns:
         Dict with track details or None if not found
     """
+    # Play statistics come back on the same row as the track: from
+    # track_stats when fresh (a track without plays has no row there),
+    # otherwise seeks on the (track_id, timestamp) index
+    if _rollups_fresh(db.conn):
+        stats_columns = """
+            COALESCE(track_stats.play_count, 0),
+            track_stats.first_played,
+            track_stats.last_played
+        """
+        stats_join = "LEFT JOIN track_stats ON track_stats.track_id = tracks.id"
+    else:
+        stats_columns = """
+            (SELECT COUNT(*) FROM plays WHERE plays.track_id = tracks.id),
+            (SELECT MIN(timestamp) FROM plays WHERE plays.track_id = tracks.id),
+            (SELECT MAX(timestamp) FROM plays WHERE plays.track_id = tracks.id)
+        """
+        stats_join = ""
+
     if track_id:
         # Exact match by ID
         track_row = db.execute(
-            """
-            SELECT tracks.id, tracks.title, artists.name, albums.title
+            f"""
+            SELECT tracks.id, tracks.title, artists.name, albums.title, {stats_columns}
             FROM tracks
             JOIN albums ON tracks.album_id = albums.id
             JOIN artists ON albums.artist_id = artists.id
+            {stats_join}
             WHERE tracks.id = ?
             """,
             [track_id],
         ).fetchone()
     elif track_title:
-        # Build conditions
-        conditions = ["tracks.title LIKE ?"]
-        params = [f"%{track_title}%"]
-
-        if artist_name:
-            conditions.append("artists.name LIKE ?")
-            params.append(f"%{artist_name}%")
-
-        if album_title:
-            conditions.append("albums.title LIKE ?")
-            params.append(f"%{album_title}%")
+        # Build conditions, through the trigram indexes when present
+        condition, param = _name_filter(db, "tracks", "title", track_title)
+        conditions = [condition]
+        params = [param]
+
+        # Known ids narrow by primary key instead of matching names
+        if artist_id:
+            conditions.append("albums.artist_id = ?")
+            params.append(artist_id)
+        elif artist_name:
+            condition, param = _name_filter(db, "artists", "name", artist_name)
+            conditions.append(condition)
+            params.append(param)
+
+        if album_id:
+            conditions.append("tracks.album_id = ?")
+            params.append(album_id)
+        elif album_title:
+            condition, param = _name_filter(db, "albums", "title", album_title)
+            conditions.append(condition)
+            params.append(param)
 
         where_clause = " AND ".join(conditions)
 
         matches = db.execute(
             f"""
-            SELECT tracks.id, tracks.title, artists.name, albums.title
+            SELECT tracks.id, tracks.title, artists.name, albums.title, {stats_columns}
             FROM tracks
             JOIN albums ON tracks.album_id = albums.id
             JOIN artists ON albums.artist_id = artists.id
+            {stats_join}
             WHERE {where_clause}
             LIMIT 2
             """,
@@ -1310,19 +2235,7 @@ def get_track_details(
     track_title = track_row[1]
     artist_name = track_row[2]
     album_title = track_row[3]
-
-    # Get statistics
-    stats = db.execute(
-        """
-        SELECT
-            COUNT(*) as play_count,
-            MIN(timestamp) as first_played,
-            MAX(timestamp) as last_played
-        FROM plays
-        WHERE track_id = ?
-        """,
-        [track_id],
-    ).fetchone()
+    stats = track_row[4:]
 
     return {
         "track_id": track_id,
@@ -1351,15 +2264,53 @@ def get_track_plays(
     Returns:
         List of dicts with play timestamps
     """
-    limit_clause = f"LIMIT {limit}" if limit else ""
-
-    query = f"""
+    # Bind the limit so every call shares one SQL text (-1 means no limit)
+    query = """
         SELECT timestamp
         FROM plays
         WHERE track_id = ?
         ORDER BY timestamp DESC
-        {limit_clause}
+        LIMIT ?
+    """
+
+    return list(_execute_dicts(db, query, [track_id, int(limit) if limit else -1]))
+
+
+def get_tracks_plays(
+    db: sqlite_utils.Database,
+    track_ids: list[int],
+    limit: Optional[int] = None,
+) -> dict[int, list[dict]]:
+    """
+    Get play history for several tracks in one query.
+
+    Args:
+        db: Database connection
+        track_ids: Track IDs
+        limit: Optional limit on number of plays per track
+
+    Returns:
+        Dict mapping each track ID to a list of dicts with play timestamps,
+        newest first; tracks without plays map to an empty list
+    """
+    query = """
+        SELECT track_id, timestamp
+        FROM (
+            SELECT
+                track_id,
+                timestamp,
+                ROW_NUMBER() OVER (
+                    PARTITION BY track_id ORDER BY timestamp DESC
+                ) as position
+            FROM plays
+            WHERE track_id IN (SELECT value FROM json_each(?))
+        )
+        WHERE ? < 0 OR position <= ?
+        ORDER BY track_id, timestamp DESC
     """
+    limit = int(limit) if limit else -1
 
-    rows = db.execute(query, [track_id]).fetchall()
-    return [{"timestamp": row[0]} for row in rows]
+    plays = {track_id: [] for track_id in track_ids}
+    for track_id, timestamp in db.execute(query, [json.dumps(track_ids), limit, limit]):
+        plays[track_id].append({"timestamp": timestamp})
+    return plays
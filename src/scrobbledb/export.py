@@ -2,7 +2,7 @@
 Export scrobble data in various formats.
 
 This module provides export functionality for scrobbledb with support for:
-- Multiple output formats (JSONL, CSV, TSV, JSON)
+- Multiple output formats (JSONL, CSV, TSV, JSON, SQLite)
 - Preset exports for common scrobble queries
 - Custom SQL queries with validation
 - Sampling and limiting
@@ -11,9 +11,27 @@ This module provides export functionality for scrobbledb with support for:
 """
 
 import click
+import contextlib
+import csv as csv_module
+import itertools
+import json
+import os
 import random
+import re
+import sqlite3
 import sqlite_utils
+import stat
+import sys
+import tempfile
+import textwrap
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import StringIO
 from pathlib import Path
+from typing import Callable, Generator, Iterable, Optional, Sequence, TextIO
+
+from . import domain_queries
 
 
 # Preset queries for common scrobble exports
@@ -78,26 +96,92 @@ PRESET_QUERIES = {
 # Valid scrobble-related table names for validation
 SCROBBLE_TABLES = {"plays", "tracks", "albums", "artists"}
 
+# Shared encoders: json.dumps() with default= builds a new encoder per
+# call, which is a noticeable part of the per-row cost of a large export
+_JSON_ENCODER = json.JSONEncoder(default=str)
+_JSON_INDENT_ENCODER = json.JSONEncoder(default=str, indent=2)
+
+# Resolution of the --sample probability in the SQL sampling predicate
+SAMPLE_SCALE = 1_000_000
+
+
+# One SQL token per match: string literals and comments (skipped), then
+# quoted and bare identifiers (captured)
+_SQL_TOKEN = re.compile(
+    r"""'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/"""
+    r"""|"((?:[^"]|"")*)"|\[([^\]]*)\]|`([^`]*)`|([A-Za-z_][A-Za-z0-9_$]*)""",
+    re.DOTALL,
+)
+
 
 def validate_sql(sql: str) -> bool:
     """
     Validate that SQL query references scrobble-related tables.
 
     Returns True if the query references at least one scrobble table.
+    Only whole identifiers count, so e.g. plays_archive or a 'plays'
+    string literal doesn't.
     """
-    sql_lower = sql.lower()
-    return any(table in sql_lower for table in SCROBBLE_TABLES)
+    for match in _SQL_TOKEN.finditer(sql):
+        identifier = next((group for group in match.groups() if group is not None), None)
+        if identifier is not None and identifier.lower() in SCROBBLE_TABLES:
+            return True
+    return False
+
+
+def _split_select(sql: str) -> tuple[dict, str]:
+    """
+    Split a preset query into its output columns and everything from FROM on.
+
+    Returns ({output column name: select expression}, "FROM ..."). Only
+    meant for PRESET_QUERIES, whose select lists are plain expressions with
+    an optional "as" alias.
+    """
+    match = re.match(r"\s*SELECT\s+(.*?)\s+(FROM\s.*)", sql, re.IGNORECASE | re.DOTALL)
+    select_list, from_onwards = match.groups()
+
+    # Split on commas outside parentheses, e.g. not inside COUNT(a, b)
+    expressions, depth, start = [], 0, 0
+    for i, char in enumerate(select_list):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            expressions.append(select_list[start:i].strip())
+            start = i + 1
+    expressions.append(select_list[start:].strip())
+
+    columns = {}
+    for expression in expressions:
+        parts = re.split(r"\s+as\s+", expression, flags=re.IGNORECASE)
+        name = parts[-1] if len(parts) > 1 else expression.rsplit(".", 1)[-1]
+        columns[name] = parts[0]
+    return columns, from_onwards
+
+
+# Preset SQL -> its parsed select list, so --columns can rewrite the
+# projection in place instead of wrapping the query in a subquery
+_PRESET_SELECTS = {sql: _split_select(sql) for sql in PRESET_QUERIES.values()}
 
 
 def apply_column_filter(sql: str, columns: tuple) -> str:
     """
     Modify SQL to select only specified columns.
 
-    This wraps the original query in a SELECT to filter columns.
+    Preset queries get their select list rewritten, keeping the query flat
+    for the planner. Other queries, or columns a preset doesn't have, are
+    wrapped in a SELECT that filters the columns.
     """
     if not columns:
         return sql
 
+    if sql in _PRESET_SELECTS:
+        select_columns, from_onwards = _PRESET_SELECTS[sql]
+        if all(col in select_columns for col in columns):
+            column_list = ", ".join(f"{select_columns[col]} as [{col}]" for col in columns)
+            return f"SELECT {column_list} {from_onwards}"
+
     column_list = ", ".join(f"[{col}]" for col in columns)
     return f"SELECT {column_list} FROM ({sql})"
 
@@ -112,57 +196,263 @@ def apply_limit(sql: str, limit: int) -> str:
 
 def apply_sample(db: sqlite_utils.Database, sql: str, sample: float, seed: int = None) -> str:
     """
-    Apply random sampling to query results.
+    Wrap SQL so SQLite keeps each row with probability ``sample``.
 
-    Uses ORDER BY RANDOM() with optional seed for reproducibility.
+    Rows are dropped inside SQLite, so discarded rows never reach Python.
+    With a seed, draws come from a ``seeded_random()`` function registered
+    on the connection, so the same query and seed give the same sample.
     """
+    threshold = int(sample * SAMPLE_SCALE)
     if seed is not None:
-        # SQLite doesn't support RANDOM(seed), but we can use it in Python filtering
-        random.seed(seed)
-
-    # We'll handle sampling in Python after fetching results
-    # to support the seed parameter properly
-    return sql
+        rng = random.Random(seed)
+        db.conn.create_function("seeded_random", 0, lambda: rng.randrange(SAMPLE_SCALE))
+        draw = "seeded_random()"
+    else:
+        # Take the modulus before abs(): abs() of the smallest 64-bit
+        # integer overflows
+        draw = f"abs(random() % {SAMPLE_SCALE})"
+    return f"SELECT * FROM ({sql.rstrip().rstrip(';')}) WHERE {draw} < {threshold}"
 
 
 def format_output(rows: list, format: str, no_headers: bool = False) -> str:
     """Format rows according to specified format."""
-    if not rows:
-        if format == "jsonl":
-            return ""
-        elif format in ("csv", "tsv"):
-            return ""
-        else:  # json
-            return "[]"
-
-    import json
-    import csv as csv_module
-    from io import StringIO
+    output = StringIO()
+    write_output(rows, format, output, no_headers)
+    return output.getvalue()
+
+
+def write_output(
+    rows: Iterable,
+    format: str,
+    out: TextIO,
+    no_headers: bool = False,
+    columns: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Write rows to a text stream as they arrive, in the specified format.
+
+    Rows are dicts, or, when columns is given, sequences of values in that
+    column order, such as the rows of a cursor. CSV and TSV are written
+    straight from the values; dicts are only built for JSON.
+
+    Produces exactly what format_output() returns, without holding the rows
+    or the formatted text in memory. Returns the number of rows written.
+    """
+    if format not in ("json", "jsonl", "csv", "tsv"):
+        raise ValueError(f"Unsupported format: {format}")
+
+    if format in ("csv", "tsv"):
+        return _write_delimited(rows, format, out, no_headers, columns)
+
+    if format == "jsonl":
+        encode = _JSON_ENCODER.encode if columns is None else _jsonl_serializer(tuple(columns))
+    elif columns is not None:
+        rows = (dict(zip(columns, row)) for row in rows)
+
+    count = 0
+    for row in rows:
+        if format == "json":
+            out.write("[\n" if count == 0 else ",\n")
+            out.write(textwrap.indent(_JSON_INDENT_ENCODER.encode(row), "  "))
+        else:  # jsonl
+            if count:
+                out.write("\n")
+            out.write(encode(row))
+        count += 1
 
     if format == "json":
-        return json.dumps(rows, indent=2, default=str)
+        out.write("\n]" if count else "[]")
+    return count
 
-    elif format == "jsonl":
-        return "\n".join(json.dumps(row, default=str) for row in rows)
 
-    elif format in ("csv", "tsv"):
-        output = StringIO()
-        delimiter = "\t" if format == "tsv" else ","
+@contextlib.contextmanager
+def _replace_on_success(path: str) -> Generator[TextIO, None, None]:
+    """
+    Open path for writing, replacing a regular file only on success.
+
+    Regular files, and paths that don't exist yet, are written to a
+    temporary file beside them that is renamed into place once the block
+    succeeds, so a failed export leaves the old file as it was. Symlinks are
+    followed to their target, which keeps its mode and owner. Anything else,
+    such as /dev/null or a FIFO, is opened and written in place, as is a file
+    whose directory can't be written to.
+    """
+    target = os.path.realpath(path)
+    try:
+        existing = os.stat(target)
+    except FileNotFoundError:
+        existing = None
+    if existing is not None and not stat.S_ISREG(existing.st_mode):
+        with open(target, "w") as out:
+            yield out
+        return
 
-        if rows:
-            fieldnames = rows[0].keys()
-            writer = csv_module.DictWriter(output, fieldnames=fieldnames, delimiter=delimiter)
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(target), prefix=".scrobbledb-export-"
+        )
+    except OSError:
+        with open(target, "w") as out:
+            yield out
+        return
 
-            if not no_headers:
-                writer.writeheader()
+    try:
+        with open(fd, "w") as out:
+            if existing is None:
+                # mkstemp creates the file as 0600; give it the mode open() would
+                umask = os.umask(0)
+                os.umask(umask)
+                os.fchmod(fd, 0o666 & ~umask)
+            else:
+                os.fchmod(fd, stat.S_IMODE(existing.st_mode))
+                with contextlib.suppress(PermissionError):
+                    os.fchown(fd, existing.st_uid, existing.st_gid)
+            yield out
+        os.replace(temp_path, target)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+        raise
+
+
+def write_sqlite(db: sqlite_utils.Database, sql: str, path: str, table: str = "export") -> int:
+    """
+    Write the results of sql to a new table in the SQLite database at path.
+
+    The database is attached to db's connection and filled with CREATE
+    TABLE ... AS, so rows are copied by SQLite without passing through
+    Python. The file is created if needed; the table must not exist yet.
+    Returns the number of rows written.
+    """
+    conn = db.conn
+    conn.execute("ATTACH DATABASE ? AS export_dest", [path])
+    try:
+        conn.execute(f"CREATE TABLE export_dest.[{table}] AS {sql.rstrip().rstrip(';')}")
+        conn.commit()
+        return conn.execute(f"SELECT COUNT(*) FROM export_dest.[{table}]").fetchone()[0]
+    finally:
+        conn.execute("DETACH DATABASE export_dest")
 
-            writer.writerows(rows)
 
-        return output.getvalue()
+@lru_cache(maxsize=32)
+def _jsonl_serializer(columns: tuple) -> Callable[[Sequence], str]:
+    """
+    Build a function that encodes a row of values as a JSON object.
 
+    The keys are encoded once, up front, so each row only encodes its
+    values; no dict is built per row. The text is the same as encoding
+    dict(zip(columns, row)).
+    """
+    keys = [json.dumps(column) + ": " for column in columns]
+    encode = _JSON_ENCODER.encode
+
+    def serialize(row: Sequence) -> str:
+        return "{" + ", ".join([key + encode(value) for key, value in zip(keys, row)]) + "}"
+
+    return serialize
+
+
+def _write_delimited(
+    rows: Iterable,
+    format: str,
+    out: TextIO,
+    no_headers: bool,
+    columns: Optional[Sequence[str]],
+) -> int:
+    """Write rows as CSV or TSV; the header only goes out with the first row."""
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+
+    if columns is None:
+        columns = list(first)
+        rows = (row.values() for row in itertools.chain([first], rows))
     else:
+        rows = itertools.chain([first], rows)
+
+    writer = csv_module.writer(out, delimiter="\t" if format == "tsv" else ",")
+    if not no_headers:
+        writer.writerow(columns)
+
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def _encode_chunk(rows: list, columns: tuple, format: str) -> str:
+    """
+    Encode a chunk of cursor rows as the text write_output() puts between
+    its opening and closing: rows without separators at either end, and no
+    CSV header. Runs in a worker process for write_output_parallel().
+    """
+    if format == "jsonl":
+        serialize = _jsonl_serializer(columns)
+        return "\n".join(serialize(row) for row in rows)
+    if format == "json":
+        return ",\n".join(
+            textwrap.indent(_JSON_INDENT_ENCODER.encode(dict(zip(columns, row))), "  ")
+            for row in rows
+        )
+    out = StringIO()
+    csv_module.writer(out, delimiter="\t" if format == "tsv" else ",").writerows(rows)
+    return out.getvalue()
+
+
+def write_output_parallel(
+    cursor: sqlite3.Cursor,
+    format: str,
+    out: TextIO,
+    no_headers: bool,
+    columns: Sequence[str],
+    jobs: int,
+    chunk_size: int = 50_000,
+) -> int:
+    """
+    Write a cursor's rows like write_output(), encoding chunks in parallel.
+
+    Rows are fetched in chunks of chunk_size and encoded by a pool of jobs
+    worker processes; the encoded chunks are written in order. At most two
+    chunks per worker are in flight, so memory stays bounded. Returns the
+    number of rows written.
+    """
+    if format not in ("json", "jsonl", "csv", "tsv"):
         raise ValueError(f"Unsupported format: {format}")
 
+    columns = tuple(columns)
+    count = 0
+    pending = deque()
+
+    def write_next():
+        nonlocal count
+        rows, future = pending.popleft()
+        if count == 0:
+            if format == "json":
+                out.write("[\n")
+            elif format in ("csv", "tsv") and not no_headers:
+                delimiter = "\t" if format == "tsv" else ","
+                csv_module.writer(out, delimiter=delimiter).writerow(columns)
+        elif format == "json":
+            out.write(",\n")
+        elif format == "jsonl":
+            out.write("\n")
+        out.write(future.result())
+        count += rows
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while chunk := cursor.fetchmany(chunk_size):
+            pending.append((len(chunk), pool.submit(_encode_chunk, chunk, columns, format)))
+            if len(pending) >= 2 * jobs:
+                write_next()
+        while pending:
+            write_next()
+
+    if format == "json":
+        out.write("\n]" if count else "[]")
+    return count
+
 
 @click.command()
 @click.argument("preset", required=False, type=click.Choice(["plays", "tracks", "albums", "artists"]))
@@ -185,9 +475,9 @@ def format_output(rows: list, format: str, no_headers: bool = False) -> str:
 @click.option(
     "--format",
     "-f",
-    type=click.Choice(["jsonl", "json", "csv", "tsv"]),
+    type=click.Choice(["jsonl", "json", "csv", "tsv", "sqlite"]),
     default="jsonl",
-    help="Output format (default: jsonl)",
+    help="Output format (default: jsonl); sqlite writes an 'export' table to the --output database file",
 )
 @click.option(
     "--output",
@@ -226,7 +516,14 @@ def format_output(rows: list, format: str, no_headers: bool = False) -> str:
     is_flag=True,
     help="Show SQL query without executing",
 )
-def export(preset, database, sql, sql_file, format, output, limit, sample, seed, columns, no_headers, dry_run):
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Worker processes for encoding rows; worth raising for very large exports (default: 1)",
+)
+def export(preset, database, sql, sql_file, format, output, limit, sample, seed, columns, no_headers, dry_run, jobs):
     """
     Export scrobble data in various formats.
 
@@ -256,6 +553,12 @@ def export(preset, database, sql, sql_file, format, output, limit, sample, seed,
 
         # Select specific columns
         scrobbledb export plays --columns "timestamp,artist_name,track_title" --format csv
+
+        # Encode a very large export on four cores
+        scrobbledb export plays --jobs 4 --output plays.jsonl
+
+        # Copy plays into a table in another SQLite database
+        scrobbledb export plays --format sqlite --output plays-export.db
     """
     # Import here to avoid circular import
     from .cli import get_default_db_path
@@ -276,6 +579,9 @@ def export(preset, database, sql, sql_file, format, output, limit, sample, seed,
     if seed is not None and sample is None:
         raise click.UsageError("--seed requires --sample")
 
+    if format == "sqlite" and output == "-":
+        raise click.UsageError("--format sqlite requires --output FILE")
+
     # Get database path
     if database is None:
         database = get_default_db_path()
@@ -319,32 +625,43 @@ def export(preset, database, sql, sql_file, format, output, limit, sample, seed,
 
     # Execute query
     db = sqlite_utils.Database(database)
+    # Exports only read: tune for large scans and refuse writes. query_only
+    # would also block the attached output database, so --format sqlite
+    # runs on an untuned connection.
+    if format != "sqlite":
+        domain_queries.tune_connection(db, query_only=True)
 
-    try:
-        results = list(db.execute(query).fetchall())
-
-        # Convert to list of dicts
-        if results:
-            columns_from_query = [desc[0] for desc in db.execute(query).description]
-            rows = [dict(zip(columns_from_query, row)) for row in results]
-        else:
-            rows = []
-
-        # Apply sampling if specified
-        if sample is not None:
-            if seed is not None:
-                random.seed(seed)
-            rows = [row for row in rows if random.random() < sample]
+    # Apply sampling if specified
+    if sample is not None:
+        query = apply_sample(db, query, sample, seed)
 
-        # Format output
-        output_text = format_output(rows, format, no_headers)
+    try:
+        if format == "sqlite":
+            count = write_sqlite(db, query, output)
+            click.echo(f"Exported {count} rows to {output}", err=True)
+            return
+
+        # One pass over one cursor; rows are formatted and written as
+        # SQLite produces them
+        cursor = db.execute(query)
+        columns_from_query = [desc[0] for desc in cursor.description]
+
+        def write(out):
+            if jobs > 1:
+                return write_output_parallel(
+                    cursor, format, out, no_headers, columns_from_query, jobs
+                )
+            return write_output(cursor, format, out, no_headers, columns_from_query)
 
         # Write output
         if output == "-":
-            click.echo(output_text)
+            write(sys.stdout)
+            sys.stdout.write("\n")
+            sys.stdout.flush()
         else:
-            Path(output).write_text(output_text)
-            click.echo(f"Exported {len(rows)} rows to {output}", err=True)
+            with _replace_on_success(output) as out:
+                count = write(out)
+            click.echo(f"Exported {count} rows to {output}", err=True)
 
     except Exception as e:
         click.echo(f"Error executing query: {e}", err=True)
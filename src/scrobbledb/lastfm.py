@@ -1,9 +1,17 @@
+import contextlib
 import datetime as dt
 from datetime import timezone
+import functools
 import hashlib
+import html
 import json
 import random
-from typing import Dict, Optional, Iterator, Tuple
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Generator, Iterable, Optional, Iterator, Tuple, cast
 from xml.dom.minidom import Node
 
 import pylast
@@ -11,6 +19,95 @@ import dateutil.parser
 import stamina
 from loguru import logger
 from sqlite_utils import Database
+from sqlite_utils.db import jsonify_if_needed
+
+# orjson parses JSONL imports several times faster when it is installed;
+# its decode errors subclass json.JSONDecodeError, so handling is shared
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+class _RetryBudget:
+    """
+    Token bucket that caps how many retries all API requests share.
+
+    Each retry takes a token; tokens come back at refill_rate per second up
+    to capacity. Isolated failures are retried as before, but during an
+    outage the bucket runs dry and requests fail fast instead of every one
+    of them backing off through all its attempts against the server.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()  # shared with recent_tracks' prefetch thread
+
+    def take(self) -> bool:
+        """Take a token if one is available; return whether one was."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.refill_rate
+            )
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+# Ten retries in hand, one more every ten seconds
+_retry_budget = _RetryBudget(capacity=10, refill_rate=0.1)
+
+# Error codes Last.fm returns for requests that can't succeed on a retry
+# (bad key, method or parameters, auth and subscription problems)
+_PERMANENT_WS_ERRORS = {
+    str(status)
+    for status in (
+        pylast.STATUS_INVALID_SERVICE,
+        pylast.STATUS_INVALID_METHOD,
+        pylast.STATUS_AUTH_FAILED,
+        pylast.STATUS_INVALID_FORMAT,
+        pylast.STATUS_INVALID_PARAMS,
+        pylast.STATUS_INVALID_RESOURCE,
+        pylast.STATUS_INVALID_SK,
+        pylast.STATUS_INVALID_API_KEY,
+        pylast.STATUS_SUBSCRIBERS_ONLY,
+        pylast.STATUS_TOKEN_UNAUTHORIZED,
+        pylast.STATUS_TOKEN_EXPIRED,
+        pylast.STATUS_LOGIN_REQUIRED,
+        pylast.STATUS_TRIAL_EXPIRED,
+        pylast.STATUS_API_KEY_SUSPENDED,
+        pylast.STATUS_DEPRECATED,
+    )
+}
+
+# Seconds to back off after Last.fm reports its rate limit was exceeded
+RATE_LIMIT_WAIT = 20.0
+
+
+def _retry_backoff(exc: Exception):
+    """
+    Decide whether and how to retry a failed API request (a stamina hook).
+
+    Returns False to give up, True for the usual exponential backoff, or a
+    number of seconds to wait instead.
+    """
+    if not isinstance(exc, pylast.WSError):
+        return False
+    status = str(exc.status)
+    if status in _PERMANENT_WS_ERRORS:
+        return False
+    if not _retry_budget.take():
+        logger.warning("Retry budget exhausted, not retrying: {}", exc)
+        return False
+    if status == str(pylast.STATUS_RATE_LIMIT_EXCEEDED):
+        return RATE_LIMIT_WAIT
+    return True
 
 
 def _api_request_with_retry(user: pylast.User, method: str, cacheable: bool = True, params: dict = None):
@@ -18,7 +115,9 @@ def _api_request_with_retry(user: pylast.User, method: str, cacheable: bool = Tr
     Make a Last.fm API request with automatic retry on transient failures.
 
     Uses exponential backoff with up to 5 retry attempts to handle intermittent
-    HTTP 500 errors from the Last.fm API.
+    HTTP 500 errors from the Last.fm API. Errors that a retry can't fix are
+    raised at once, rate-limit errors wait RATE_LIMIT_WAIT seconds, and all
+    requests draw their retries from one shared budget (see _RetryBudget).
 
     Args:
         user: pylast.User instance
@@ -37,7 +136,7 @@ def _api_request_with_retry(user: pylast.User, method: str, cacheable: bool = Tr
     # Configure retry behavior: 5 attempts with exponential backoff
     # Delays: 1s, 2s, 4s, 8s, 16s (total ~31s max)
     for attempt in stamina.retry_context(
-        on=pylast.WSError,
+        on=_retry_backoff,
         attempts=5,
         wait_initial=1.0,
         wait_max=16.0,
@@ -78,49 +177,40 @@ def recent_tracks_count(user: pylast.User, since: dt.datetime, until: dt.datetim
         params["limit"] = 1
         doc = _api_request_with_retry(user, "user.getRecentTracks", cacheable=True, params=params)
 
-        # Safely navigate XML response structure
-        cleaned_doc = pylast.cleanup_nodes(doc)
-        if not cleaned_doc or not cleaned_doc.documentElement:
+        # With limit=1 the <recenttracks> element's total attribute is the
+        # count itself; read it off the root's first element rather than
+        # cleaning up and walking the whole document.
+        root = doc.documentElement if doc else None
+        if not root:
             logger.warning("Empty or invalid XML response from Last.fm API")
             return 0
 
-        child_nodes = cleaned_doc.documentElement.childNodes
-        if not child_nodes or len(child_nodes) == 0:
+        main = next(
+            (node for node in root.childNodes if node.nodeType == Node.ELEMENT_NODE),
+            None,
+        )
+        if main is None:
             logger.warning("No child nodes in Last.fm API response")
             return 0
 
-        main = child_nodes[0]
-
-        # Safely get and validate attributes
-        total_pages_str = main.getAttribute("totalPages")
-        plays_per_page_str = main.getAttribute("perPage")
-
-        if not total_pages_str or not plays_per_page_str:
-            logger.warning("Missing totalPages or perPage attributes in API response")
+        total_str = main.getAttribute("total")
+        if not total_str:
+            logger.warning("Missing total attribute in API response")
             return 0
 
         try:
-            total_pages = int(total_pages_str)
-            plays_per_page = int(plays_per_page_str)
+            total = int(total_str)
         except (ValueError, TypeError) as e:
-            logger.warning("Invalid totalPages or perPage values: {}", e)
+            logger.warning("Invalid total value: {}", e)
             return 0
 
-        if total_pages < 0 or plays_per_page < 0:
-            logger.warning(
-                "Negative totalPages ({}) or perPage ({})", total_pages, plays_per_page
-            )
+        if total < 0:
+            logger.warning("Negative total ({})", total)
             return 0
 
-        max_tracks = total_pages * plays_per_page
-        logger.info(
-            "Total pages: {}, plays per page: {}, max total plays: {}",
-            total_pages,
-            plays_per_page,
-            max_tracks,
-        )
+        logger.info("Total plays: {}", total)
 
-        return max_tracks
+        return total
 
     except (IndexError, AttributeError, KeyError) as e:
         logger.warning("Error parsing Last.fm API response: {}", e)
@@ -130,6 +220,10 @@ def recent_tracks_count(user: pylast.User, since: dt.datetime, until: dt.datetim
         return 0
 
 
+# Pages recent_tracks() requests ahead of the one being consumed
+RECENT_TRACKS_PREFETCH = 2
+
+
 def recent_tracks(user: pylast.User, since: dt.datetime, until: dt.datetime = None, limit: int = None):
     """
     This is similar to pylast.User.get_recent_tracks
@@ -148,6 +242,9 @@ def recent_tracks(user: pylast.User, since: dt.datetime, until: dt.datetime = No
         4. It's a generator so that the caller can display a progress bar.
 
         5. Accepts an optional limit parameter to cap the number of tracks returned.
+
+        6. Downloads the next pages in the background while the caller is
+           still working through the current one.
     """
 
     page = 1
@@ -168,49 +265,135 @@ def recent_tracks(user: pylast.User, since: dt.datetime, until: dt.datetime = No
     tracks_yielded = 0
     total_pages = None
 
-    while True:
-        params["page"] = page
+    def fetch(page_number):
         logger.info(
-            f"Fetching page {page}" + (f" of {total_pages}" if total_pages else "")
+            f"Fetching page {page_number}" + (f" of {total_pages}" if total_pages else "")
         )
-        doc = _api_request_with_retry(user, "user.getRecentTracks", cacheable=True, params=params)
-        main = pylast.cleanup_nodes(doc).documentElement.childNodes[0]
-
-        # Get total pages on first request
-        if total_pages is None:
-            total_pages = int(main.getAttribute("totalPages"))
-            logger.info(f"Total pages to fetch: {total_pages}")
-
-        tracks_in_page = 0
-        for node in main.childNodes:
-            if node.nodeType != Node.TEXT_NODE:
-                yield _extract_track_data(node)
-                tracks_yielded += 1
-                tracks_in_page += 1
-                if limit and tracks_yielded >= limit:
-                    logger.info(f"Reached limit of {limit} tracks")
-                    return
-
-        logger.info(
-            f"Yielded {tracks_in_page} tracks from page {page} (total: {tracks_yielded})"
+        return _api_request_with_retry(
+            user, "user.getRecentTracks", cacheable=True, params=dict(params, page=page_number)
         )
 
-        page += 1
-        if page > total_pages:
-            logger.info(f"Completed fetching all {tracks_yielded} tracks")
-            break
+    # Pages after the first are requested by one background thread, up to
+    # RECENT_TRACKS_PREFETCH pages ahead, so the next page downloads while
+    # the caller saves this one. One thread keeps the requests sequential,
+    # as pylast's rate limiter expects.
+    prefetched = deque()
+    next_page = 2
+    last_page = None
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    try:
+        while True:
+            doc = prefetched.popleft().result() if prefetched else fetch(page)
+            try:
+                main = pylast.cleanup_nodes(doc).documentElement.childNodes[0]
+
+                # Get total pages on first request
+                if total_pages is None:
+                    total_pages = int(main.getAttribute("totalPages"))
+                    logger.info(f"Total pages to fetch: {total_pages}")
+                    # Don't prefetch pages a limit will never reach
+                    last_page = total_pages
+                    if limit:
+                        last_page = min(total_pages, -(-limit // params["limit"]))
+
+                while next_page <= last_page and len(prefetched) < RECENT_TRACKS_PREFETCH:
+                    prefetched.append(pool.submit(fetch, next_page))
+                    next_page += 1
+
+                tracks_in_page = 0
+                for node in main.childNodes:
+                    if node.nodeType != Node.TEXT_NODE:
+                        yield _extract_track_data(node)
+                        tracks_yielded += 1
+                        tracks_in_page += 1
+                        if limit and tracks_yielded >= limit:
+                            logger.info(f"Reached limit of {limit} tracks")
+                            return
+            finally:
+                # minidom nodes point at their parents, so a page's DOM is only
+                # freed by the cycle collector; break the cycles as soon as the
+                # page's tracks are out, keeping one page in memory at a time
+                doc.unlink()
+
+            logger.info(
+                f"Yielded {tracks_in_page} tracks from page {page} (total: {tracks_yielded})"
+            )
+
+            page += 1
+            if page > total_pages:
+                logger.info(f"Completed fetching all {tracks_yielded} tracks")
+                break
+    finally:
+        _log_mbid_cache_stats()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _node_text(node: Optional[Node]) -> Optional[str]:
+    """Return an element's text the way pylast._extract() does, or None."""
+    if node is None or not node.firstChild:
+        return None
+    return html.unescape(node.firstChild.data.strip())
+
+
+# Artist and album names repeat heavily across scrobbles, so the
+# synthesized ids are memoized
+@functools.lru_cache(maxsize=65536)
+def _synth_artist_mbid(artist_name: str) -> str:
+    return "md5:" + hashlib.md5(
+        artist_name.encode("utf8"), usedforsecurity=False
+    ).hexdigest()
+
+
+@functools.lru_cache(maxsize=65536)
+def _synth_album_mbid(artist_mbid: str, album_title: str) -> str:
+    return "md5:" + hashlib.md5(
+        (artist_mbid + album_title).encode("utf8"), usedforsecurity=False
+    ).hexdigest()
+
+
+@functools.lru_cache(maxsize=65536)
+def _synth_track_mbid(album_mbid: str, track_title: str) -> str:
+    return "md5:" + hashlib.md5(
+        (album_mbid + track_title).encode("utf8"), usedforsecurity=False
+    ).hexdigest()
+
+
+def _log_mbid_cache_stats():
+    """Log hit rates of the synthesized id caches at debug level."""
+    for name, cached in (
+        ("artist", _synth_artist_mbid),
+        ("album", _synth_album_mbid),
+        ("track", _synth_track_mbid),
+    ):
+        info = cached.cache_info()
+        lookups = info.hits + info.misses
+        logger.debug(
+            "Synthesized {} id cache: {} hits of {} lookups, {} cached",
+            name,
+            info.hits,
+            lookups,
+            info.currsize,
+        )
 
 
 def _extract_track_data(track: Node):
-    track_mbid = pylast._extract(track, "mbid")
-    track_title = pylast._extract(track, "name")
+    # Index the track's child elements in one pass; pylast._extract() and
+    # getElementsByTagName() would each walk the whole <track> subtree
+    children = {}
+    for child in track.childNodes:
+        if child.nodeType == Node.ELEMENT_NODE:
+            children.setdefault(child.tagName, child)
+
+    track_mbid = _node_text(children.get("mbid"))
+    track_title = _node_text(children.get("name"))
     timestamp = dt.datetime.fromtimestamp(
-        int(track.getElementsByTagName("date")[0].getAttribute("uts")), tz=timezone.utc
+        int(children["date"].getAttribute("uts")), tz=timezone.utc
     )
-    artist_name = pylast._extract(track, "artist")
-    artist_mbid = track.getElementsByTagName("artist")[0].getAttribute("mbid")
-    album_title = pylast._extract(track, "album")
-    album_mbid = track.getElementsByTagName("album")[0].getAttribute("mbid")
+    artist_name = _node_text(children.get("artist"))
+    artist_mbid = children["artist"].getAttribute("mbid")
+    album_title = _node_text(children.get("album"))
+    album_mbid = children["album"].getAttribute("mbid")
 
     # TODO: could call track/album/artist.getInfo here, and get more info?
 
@@ -220,17 +403,11 @@ def _extract_track_data(track: Node):
 
     # If we don't have mbids, synthesize them
     if not artist_mbid:
-        artist_mbid = "md5:" + hashlib.md5(artist_name.encode("utf8")).hexdigest()
+        artist_mbid = _synth_artist_mbid(artist_name)
     if not album_mbid:
-        h = hashlib.md5()
-        h.update(artist_mbid.encode("utf8"))
-        h.update(album_title.encode("utf8"))
-        album_mbid = "md5:" + h.hexdigest()
+        album_mbid = _synth_album_mbid(artist_mbid, album_title)
     if not track_mbid:
-        h = hashlib.md5()
-        h.update(album_mbid.encode("utf8"))
-        h.update(track_title.encode("utf8"))
-        track_mbid = "md5:" + h.hexdigest()
+        track_mbid = _synth_track_mbid(album_mbid, track_title)
 
     return {
         "artist": {"id": artist_mbid, "name": artist_name},
@@ -240,24 +417,50 @@ def _extract_track_data(track: Node):
     }
 
 
-def get_network(name: str, key: str, secret: str, session_key: str = None):
+def get_network(
+    name: str, key: str, secret: str, session_key: str = None, cache_path: str = None
+):
+    """
+    Return a rate-limited pylast network with response caching enabled.
+
+    pylast keeps the cache in a shelve file; cache_path names that file,
+    otherwise a temporary one is used for the life of the process.
+    """
     cls = {"lastfm": pylast.LastFMNetwork, "librefm": pylast.LibreFMNetwork}[name]
     if session_key:
         network = cls(api_key=key, api_secret=secret, session_key=session_key)
     else:
         network = cls(api_key=key, api_secret=secret)
-    network.enable_caching()
+    network.enable_caching(file_path=cache_path)
     network.enable_rate_limit()
     return network
 
 
+@contextlib.contextmanager
+def transaction(db: Database) -> Generator[sqlite3.Connection, None, None]:
+    """
+    Run a block of writes as one transaction on db's connection.
+
+    Commits when the block succeeds and rolls back if it raises. The save_*
+    functions don't commit on their own; callers group them with this.
+    """
+    # sqlite-utils types Database.conn as optional
+    conn = cast(sqlite3.Connection, db.conn)
+    with conn:
+        yield conn
+
+
 def save_artist(db: Database, data: Dict):
     logger.debug("Saving artist: id={}, name={}", data.get("id"), data.get("name"))
+    if _upsert_batch(db, "artists", [data]):
+        return
     db["artists"].upsert(data, pk="id", column_order=["id", "name"], not_null=["name"])
 
 
 def save_album(db: Database, data: Dict):
     logger.debug("Saving album: id={}, title={}, artist_id={}", data.get("id"), data.get("title"), data.get("artist_id"))
+    if _upsert_batch(db, "albums", [data]):
+        return
     db["albums"].upsert(
         data, pk="id", foreign_keys=["artist_id"], not_null=["id", "artist_id", "title"]
     )
@@ -265,6 +468,8 @@ def save_album(db: Database, data: Dict):
 
 def save_track(db: Database, data: Dict):
     logger.debug("Saving track: id={}, title={}, album_id={}", data.get("id"), data.get("title"), data.get("album_id"))
+    if _upsert_batch(db, "tracks", [data]):
+        return
     db["tracks"].upsert(
         data, pk="id", foreign_keys=["album_id"], not_null=["id", "album_id", "title"]
     )
@@ -272,14 +477,101 @@ def save_track(db: Database, data: Dict):
 
 def save_play(db: Database, data: Dict):
     logger.debug("Saving play: track_id={}, timestamp={}", data.get("track_id"), data.get("timestamp"))
+    if _upsert_batch(db, "plays", [data]):
+        return
     db["plays"].upsert(data, pk=["timestamp", "track_id"], foreign_keys=["track_id"])
 
 
+# Columns and primary key of each table the savers write. Their upserts
+# are generated once per set of columns rather than by sqlite-utils, which
+# re-reads the table schema and rebuilds the SQL on every upsert() and
+# upsert_all().
+_BATCH_COLUMNS = {
+    "artists": (("id", "name"), ("id",)),
+    "albums": (("id", "title", "artist_id"), ("id",)),
+    "tracks": (("id", "title", "album_id"), ("id",)),
+    "plays": (("timestamp", "track_id"), ("timestamp", "track_id")),
+}
+
+
+# _upsert_batch only passes subsets of the _BATCH_COLUMNS columns, and in
+# practice each table sees a handful of row shapes; the bound keeps any
+# caller from growing it without limit.
+@functools.lru_cache(maxsize=64)
+def _upsert_sql(table: str, present: frozenset) -> str:
+    """
+    Build the upsert for rows of table carrying the present columns.
+
+    A partial row only updates the columns it carries. The others are
+    taken from the existing row, as NOT NULL is checked before ON CONFLICT
+    applies, so a new row still needs them all.
+    """
+    columns, pk = _BATCH_COLUMNS[table]
+    match = " AND ".join(f"[{c}] = ?" for c in pk)
+    values = ", ".join(
+        "?" if c in present else f"(SELECT [{c}] FROM [{table}] WHERE {match})"
+        for c in columns
+    )
+    updates = ", ".join(
+        f"[{c}] = excluded.[{c}]" for c in columns if c in present and c not in pk
+    )
+    return (
+        f"INSERT INTO [{table}] ({', '.join(f'[{c}]' for c in columns)}) "
+        f"VALUES ({values}) "
+        f"ON CONFLICT ({', '.join(f'[{c}]' for c in pk)}) "
+        + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+    )
+
+
+def _upsert_batch(db: Database, table: str, rows: list) -> bool:
+    """
+    Upsert rows with the prepared statement for table.
+
+    Returns False, having written nothing, when the table doesn't exist
+    yet (or lacks the key), or a row lacks a key column or has columns
+    outside the known schema; the caller then falls back to sqlite-utils,
+    which creates or reports on the table.
+
+    Doesn't commit: the caller's transaction() covers the whole batch.
+    """
+    columns, pk = _BATCH_COLUMNS[table]
+    known = set(columns)
+    if any(not (set(pk) <= row.keys() <= known) for row in rows):
+        return False
+    # One executemany per run of rows carrying the same columns, in order,
+    # so a later row for a key still wins over an earlier one
+    runs = []
+    for row in rows:
+        present = frozenset(row)
+        if not runs or runs[-1][0] != present:
+            runs.append((present, []))
+        key = [jsonify_if_needed(row[c]) for c in pk]
+        params = []
+        for column in columns:
+            if column in present:
+                params.append(jsonify_if_needed(row[column]))
+            else:
+                params.extend(key)
+        runs[-1][1].append(params)
+    try:
+        for present, params in runs:
+            db.conn.executemany(_upsert_sql(table, present), params)
+    except sqlite3.OperationalError as e:
+        # A missing table, or one created without the expected key; only
+        # possible on the first statement, before anything is written
+        if "no such table" in str(e) or "ON CONFLICT" in str(e):
+            return False
+        raise
+    return True
+
+
 def save_artists_batch(db: Database, artists: list):
     """Save a batch of artists to the database using upsert_all."""
     if not artists:
         return
     logger.debug("Saving batch of {} artists", len(artists))
+    if _upsert_batch(db, "artists", artists):
+        return
     db["artists"].upsert_all(
         artists, pk="id", column_order=["id", "name"], not_null=["name"]
     )
@@ -290,6 +582,8 @@ def save_albums_batch(db: Database, albums: list):
     if not albums:
         return
     logger.debug("Saving batch of {} albums", len(albums))
+    if _upsert_batch(db, "albums", albums):
+        return
     db["albums"].upsert_all(
         albums, pk="id", foreign_keys=["artist_id"], not_null=["id", "artist_id", "title"]
     )
@@ -300,6 +594,8 @@ def save_tracks_batch(db: Database, tracks: list):
     if not tracks:
         return
     logger.debug("Saving batch of {} tracks", len(tracks))
+    if _upsert_batch(db, "tracks", tracks):
+        return
     db["tracks"].upsert_all(
         tracks, pk="id", foreign_keys=["album_id"], not_null=["id", "album_id", "title"]
     )
@@ -310,6 +606,8 @@ def save_plays_batch(db: Database, plays: list):
     if not plays:
         return
     logger.debug("Saving batch of {} plays", len(plays))
+    if _upsert_batch(db, "plays", plays):
+        return
     db["plays"].upsert_all(
         plays, pk=["timestamp", "track_id"], foreign_keys=["track_id"]
     )
@@ -353,13 +651,35 @@ TIMESTAMP_FORMATS = [
 ]
 
 
+# Reverse lookup of FIELD_ALIASES; the first canonical listing an alias wins
+_ALIAS_TO_CANONICAL: Dict[str, str] = {}
+for _canonical, _aliases in FIELD_ALIASES.items():
+    for _alias in _aliases:
+        _ALIAS_TO_CANONICAL.setdefault(_alias, _canonical)
+
+
+@functools.lru_cache(maxsize=256)
 def normalize_field_name(field: str) -> str:
     """Normalize field name to canonical form using aliases."""
-    field_lower = field.lower().strip()
-    for canonical, aliases in FIELD_ALIASES.items():
-        if field_lower in aliases:
-            return canonical
-    return field  # Unknown field, keep as-is
+    # Unknown fields are kept as-is
+    return _ALIAS_TO_CANONICAL.get(field.lower().strip(), field)
+
+
+# Maps every digit to "0" so strings in the same layout share a shape
+_TIMESTAMP_SHAPE = str.maketrans("0123456789", "0000000000")
+_TIMESTAMP_SHAPE_CACHE_SIZE = 64
+_timestamp_format_by_shape: Dict[str, str] = {}
+
+# Formats that only match once an earlier format of the same shape has
+# rejected the values (13/02/2024 is not %m/%d), so they are never cached
+_VALUE_DEPENDENT_FORMATS = {"%d/%m/%Y %H:%M:%S"}
+
+
+def _as_utc(parsed: dt.datetime) -> dt.datetime:
+    """Assume UTC for naive datetimes and convert aware ones to UTC."""
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
 
 
 def parse_timestamp(timestamp_str: str) -> dt.datetime:
@@ -371,7 +691,23 @@ def parse_timestamp(timestamp_str: str) -> dt.datetime:
 
     All returned timestamps are timezone-aware and in UTC.
     """
-    # Try Unix timestamp first (interpret as UTC)
+    # Try the format that last parsed a string of the same shape first;
+    # imported files are homogeneous, so this nearly always hits. Cached
+    # shapes always hold separators, so they never shadow Unix timestamps,
+    # and date strings skip the failing float() below.
+    shape = (
+        timestamp_str.translate(_TIMESTAMP_SHAPE)
+        if isinstance(timestamp_str, str)
+        else None
+    )
+    fmt = _timestamp_format_by_shape.get(shape)
+    if fmt is not None:
+        try:
+            return _as_utc(dt.datetime.strptime(timestamp_str, fmt))
+        except ValueError:
+            pass
+
+    # Try Unix timestamp (interpret as UTC)
     try:
         return dt.datetime.fromtimestamp(float(timestamp_str), tz=timezone.utc)
     except (ValueError, TypeError):
@@ -381,22 +717,18 @@ def parse_timestamp(timestamp_str: str) -> dt.datetime:
     for fmt in TIMESTAMP_FORMATS:
         try:
             parsed = dt.datetime.strptime(timestamp_str, fmt)
-            # If naive, assume UTC
-            if parsed.tzinfo is None:
-                return parsed.replace(tzinfo=timezone.utc)
-            # If timezone-aware, convert to UTC
-            return parsed.astimezone(timezone.utc)
         except (ValueError, TypeError):
             continue
+        if (
+            fmt not in _VALUE_DEPENDENT_FORMATS
+            and len(_timestamp_format_by_shape) < _TIMESTAMP_SHAPE_CACHE_SIZE
+        ):
+            _timestamp_format_by_shape[shape] = fmt
+        return _as_utc(parsed)
 
     # Fallback to dateutil.parser
     try:
-        parsed = dateutil.parser.parse(timestamp_str)
-        # If naive, assume UTC
-        if parsed.tzinfo is None:
-            return parsed.replace(tzinfo=timezone.utc)
-        # If timezone-aware, convert to UTC
-        return parsed.astimezone(timezone.utc)
+        return _as_utc(dateutil.parser.parse(timestamp_str))
     except (ValueError, TypeError, AttributeError):
         raise ValueError(f"Unable to parse timestamp: {timestamp_str}")
 
@@ -412,31 +744,32 @@ def synthesize_mbids(
     Returns:
         Tuple of (artist_mbid, album_mbid, track_mbid)
     """
-    # Generate artist MBID
-    artist_mbid = "md5:" + hashlib.md5(artist_name.encode("utf8")).hexdigest()
+    artist_mbid = _synth_artist_mbid(artist_name)
+    album_mbid = _synth_album_mbid(artist_mbid, album_title)
+    track_mbid = _synth_track_mbid(album_mbid, track_title)
+    return artist_mbid, album_mbid, track_mbid
 
-    # Generate album MBID
-    h = hashlib.md5()
-    h.update(artist_mbid.encode("utf8"))
-    h.update(album_title.encode("utf8"))
-    album_mbid = "md5:" + h.hexdigest()
 
-    # Generate track MBID
-    h = hashlib.md5()
-    h.update(album_mbid.encode("utf8"))
-    h.update(track_title.encode("utf8"))
-    track_mbid = "md5:" + h.hexdigest()
+def field_map(fields: Iterable[str]) -> Dict[str, str]:
+    """
+    Map each of a set of field names to its canonical form.
 
-    return artist_mbid, album_mbid, track_mbid
+    Rows that share a header (CSV/TSV) can pass this to parse_scrobble_dict
+    so their keys are normalized once for the file rather than per row.
+    """
+    return {field: normalize_field_name(field) for field in fields if field is not None}
 
 
-def parse_scrobble_dict(data: Dict, line_num: int = None) -> Dict:
+def parse_scrobble_dict(
+    data: Dict, line_num: int = None, fields: Dict[str, str] = None
+) -> Dict:
     """
     Parse a dictionary (from JSON or CSV) into scrobble data structure.
 
     Args:
         data: Dictionary with scrobble fields
         line_num: Optional line number for error messages
+        fields: Optional field_map() of data's keys, for rows sharing a header
 
     Returns:
         Dictionary with 'artist', 'album', 'track', 'play' keys
@@ -445,10 +778,10 @@ def parse_scrobble_dict(data: Dict, line_num: int = None) -> Dict:
         ValueError: If required fields are missing or invalid
     """
     # Normalize field names
-    normalized = {}
-    for key, value in data.items():
-        norm_key = normalize_field_name(key)
-        normalized[norm_key] = value
+    if fields is not None:
+        normalized = {fields.get(key, key): value for key, value in data.items()}
+    else:
+        normalized = {normalize_field_name(key): value for key, value in data.items()}
 
     # Build error prefix for messages
     error_prefix = f"Line {line_num}: " if line_num else ""
@@ -511,7 +844,7 @@ def parse_scrobble_jsonl(line: str, line_num: int = None) -> Dict:
     error_prefix = f"Line {line_num}: " if line_num else ""
 
     try:
-        data = json.loads(line)
+        data = _json_loads(line)
     except json.JSONDecodeError as e:
         raise ValueError(f"{error_prefix}Invalid JSON: {e}")
 
@@ -532,13 +865,10 @@ def detect_format(first_line: str) -> str:
     """
     stripped = first_line.strip()
 
-    # Try JSON
-    if stripped.startswith("{"):
-        try:
-            json.loads(stripped)
-            return "jsonl"
-        except (json.JSONDecodeError, ValueError):
-            pass
+    # A JSON object; checked by shape, as parsing a large first record
+    # only to classify it is wasted work (parse_input parses it again)
+    if stripped.startswith("{") and stripped.endswith("}"):
+        return "jsonl"
 
     # Check for TSV (has tabs)
     if "\t" in stripped:
@@ -552,6 +882,10 @@ def detect_format(first_line: str) -> str:
     return "jsonl"
 
 
+# Scrobbles add_scrobbles() buffers before writing them to the database
+ADD_SCROBBLES_BATCH_SIZE = 500
+
+
 def add_scrobbles(
     db: Database,
     scrobbles_iter: Iterator[Dict],
@@ -560,6 +894,7 @@ def add_scrobbles(
     sample: Optional[float] = None,
     seed: Optional[int] = None,
     no_duplicates: bool = False,
+    bulk: bool = False,
 ) -> Dict:
     """
     Add scrobbles to database with optional sampling and limiting.
@@ -572,6 +907,8 @@ def add_scrobbles(
         sample: Probability (0.0-1.0) to include each record
         seed: Random seed for reproducible sampling
         no_duplicates: Skip scrobbles with duplicate timestamp+track
+        bulk: Drop the search index triggers while adding and rebuild the
+            index once at the end (also on error)
 
     Returns:
         Statistics dictionary with:
@@ -582,9 +919,9 @@ def add_scrobbles(
         - errors: List of error messages
         - limit_reached: Whether limit was hit
     """
-    # Set random seed if provided
-    if seed is not None:
-        random.seed(seed)
+    # A private generator, so sampling neither depends on nor disturbs the
+    # global random state; seeded, it draws the same sequence random.seed did
+    draw = random.Random(seed).random
 
     stats = {
         "total_processed": 0,
@@ -595,60 +932,236 @@ def add_scrobbles(
         "limit_reached": False,
     }
 
-    # Get existing plays for duplicate detection
-    existing_plays = set()
-    if no_duplicates and "plays" in db.table_names():
-        for row in db["plays"].rows:
-            existing_plays.add((str(row["timestamp"]), row["track_id"]))
+    # Duplicates are looked up in plays through its (timestamp, track_id)
+    # primary key; plays still waiting in the batch are held in batch_keys
+    plays_exists = "plays" in db.table_names()
+    batch_keys = set()
+
+    def is_duplicate(timestamp_str, track_id):
+        if (timestamp_str, track_id) in batch_keys:
+            return True
+        return plays_exists and db.conn.execute(
+            "SELECT 1 FROM plays WHERE timestamp = ? AND track_id = ?",
+            [timestamp_str, track_id],
+        ).fetchone() is not None
+
+    # Scrobbles are buffered and written ADD_SCROBBLES_BATCH_SIZE at a time,
+    # four upsert_all() calls per batch instead of four upserts per scrobble.
+    # Artists, albums and tracks are keyed on id, so each is written once per
+    # batch (the last version seen wins, as with one upsert after another).
+    batch = {"artists": {}, "albums": {}, "tracks": {}}
+    pending = []
+    written = False
+
+    def flush():
+        nonlocal plays_exists, written
+        written = True
+        try:
+            with transaction(db):
+                save_artists_batch(db, list(batch["artists"].values()))
+                save_albums_batch(db, list(batch["albums"].values()))
+                save_tracks_batch(db, list(batch["tracks"].values()))
+                save_plays_batch(db, [scrobble["play"] for scrobble in pending])
+        except Exception:
+            # The batch was rolled back: save it one scrobble at a time, so
+            # the scrobbles before a bad one are kept either way, and with
+            # skip_errors the ones after it too
+            for scrobble in pending:
+                try:
+                    with transaction(db):
+                        save_artist(db, scrobble["artist"])
+                        save_album(db, scrobble["album"])
+                        save_track(db, scrobble["track"])
+                        save_play(db, scrobble["play"])
+                except Exception as e:
+                    if not skip_errors:
+                        raise
+                    stats["added"] -= 1
+                    stats["errors"].append(str(e))
+        for buffer in batch.values():
+            buffer.clear()
+        pending.clear()
+        batch_keys.clear()
+        plays_exists = "plays" in db.table_names()
+
+    # Search index triggers are dropped for the duration and the index
+    # rebuilt in one pass, even if adding fails part way
+    if bulk:
+        drop_fts5_triggers(db)
+    try:
+        for scrobble in scrobbles_iter:
+            stats["total_processed"] += 1
 
-    for scrobble in scrobbles_iter:
-        stats["total_processed"] += 1
+            # Apply sampling if enabled
+            if sample is not None:
+                if draw() >= sample:
+                    continue  # Skip this record
+                stats["sampled"] += 1
 
-        # Apply sampling if enabled
-        if sample is not None:
-            if random.random() >= sample:
-                continue  # Skip this record
-            stats["sampled"] += 1
+            # Check limit
+            if limit is not None and stats["added"] >= limit:
+                stats["limit_reached"] = True
+                break
 
-        # Check limit
-        if limit is not None and stats["added"] >= limit:
-            stats["limit_reached"] = True
-            break
+            try:
+                track_id = scrobble["track"]["id"]
+
+                # Check for duplicate
+                if no_duplicates:
+                    # Use isoformat() to match database storage format
+                    timestamp = scrobble["play"]["timestamp"]
+                    timestamp_str = (
+                        timestamp.isoformat()
+                        if isinstance(timestamp, dt.datetime)
+                        else str(timestamp)
+                    )
+                    if is_duplicate(timestamp_str, track_id):
+                        stats["skipped"] += 1
+                        continue
+
+                # Add to the batch
+                batch["artists"][scrobble["artist"]["id"]] = scrobble["artist"]
+                batch["albums"][scrobble["album"]["id"]] = scrobble["album"]
+                batch["tracks"][track_id] = scrobble["track"]
+                pending.append(scrobble)
+
+                # Track as existing for duplicate detection
+                if no_duplicates:
+                    batch_keys.add((timestamp_str, track_id))
+
+                stats["added"] += 1
+
+            except Exception as e:
+                error_msg = str(e)
+                stats["errors"].append(error_msg)
+
+                if not skip_errors:
+                    # Scrobbles before the bad one are still saved
+                    flush()
+                    raise
+
+            if len(pending) >= ADD_SCROBBLES_BATCH_SIZE:
+                flush()
+
+        if pending:
+            flush()
+    finally:
+        _log_mbid_cache_stats()
+        if bulk:
+            setup_fts5(db)
+            if written:
+                with transaction(db):
+                    rebuild_fts5(db)
 
-        try:
-            # Check for duplicate
-            # Use isoformat() to match database storage format
-            timestamp_str = (
-                scrobble["play"]["timestamp"].isoformat()
-                if isinstance(scrobble["play"]["timestamp"], dt.datetime)
-                else str(scrobble["play"]["timestamp"])
-            )
-            track_id = scrobble["track"]["id"]
+    return stats
+
+
+# Secondary indexes on the child -> parent join columns. Each also carries
+# the child's key, so joins and per-parent lookups (plays of a track, tracks
+# on an album, albums by an artist) are answered from the index alone.
+INDEXES = {
+    "plays": ["track_id", "timestamp"],
+    "tracks": ["album_id", "id"],
+    "albums": ["artist_id", "id"],
+}
 
-            if no_duplicates and (timestamp_str, track_id) in existing_plays:
-                stats["skipped"] += 1
-                continue
 
-            # Add to database
-            save_artist(db, scrobble["artist"])
-            save_album(db, scrobble["album"])
-            save_track(db, scrobble["track"])
-            save_play(db, scrobble["play"])
+def setup_indexes(db: Database):
+    """
+    Create the secondary indexes the query commands rely on.
+
+    Idempotent, and skips tables that don't exist yet, so it is safe to
+    call after every ingest or import.
+    """
+    table_names = db.table_names()
+    for table, columns in INDEXES.items():
+        if table in table_names:
+            db[table].create_index(columns, if_not_exists=True)
+    if "artists" in table_names:
+        # Case-insensitive exact and prefix lookups by artist name
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS artists_name_nocase "
+            "ON artists (name COLLATE NOCASE)"
+        )
 
-            # Track as existing for duplicate detection
-            if no_duplicates:
-                existing_plays.add((timestamp_str, track_id))
 
-            stats["added"] += 1
+# Trigram indexes over the name columns, named {table}_{column}_fts. They
+# let substring filters (LIKE '%x%') find rows through the index instead of
+# scanning the table. External content, so the text isn't stored twice.
+# They are keyed on the implicit rowid, which VACUUM may renumber in these
+# tables (their ids are TEXT, not INTEGER PRIMARY KEY), so a VACUUM must be
+# followed by rebuild_name_indexes(); `scrobbledb sql query` does this itself.
+NAME_INDEXES = (
+    ("artists", "name"),
+    ("albums", "title"),
+    ("tracks", "title"),
+)
 
-        except Exception as e:
-            error_msg = str(e)
-            stats["errors"].append(error_msg)
 
-            if not skip_errors:
-                raise
+def setup_name_indexes(db: Database):
+    """
+    Create trigram FTS5 indexes and sync triggers for the name columns.
 
-    return stats
+    Skipped for tables that don't exist yet, and entirely on SQLite builds
+    without the trigram tokenizer (before 3.34); queries fall back to LIKE.
+    An index is populated when it is new, or when its triggers were missing
+    (see drop_fts5_triggers()) and it may have missed writes.
+    """
+    table_names = db.table_names()
+    triggers = {
+        row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    }
+    with transaction(db):  # the rebuild is DML; commit it with the DDL
+        for table, column in NAME_INDEXES:
+            if table not in table_names:
+                continue
+            index = f"{table}_{column}_fts"
+            in_sync = index in table_names and all(
+                f"{index}_{event}" in triggers for event in ("ai", "au", "ad")
+            )
+            try:
+                db.execute(
+                    f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+                        {column},
+                        content='{table}',
+                        content_rowid='rowid',
+                        tokenize='trigram'
+                    )
+                """
+                )
+            except sqlite3.OperationalError:
+                logger.warning("SQLite lacks the FTS5 trigram tokenizer; name indexes disabled")
+                return
+            if not in_sync:
+                # Index rows already in the table; the triggers cover new ones
+                db.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+            db.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {index} (rowid, {column}) VALUES (new.rowid, new.{column});
+                END;
+            """
+            )
+            db.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {index} ({index}, rowid, {column})
+                    VALUES ('delete', old.rowid, old.{column});
+                END;
+            """
+            )
+            db.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE ON {table}
+                WHEN old.{column} IS NOT new.{column} BEGIN
+                    INSERT INTO {index} ({index}, rowid, {column})
+                    VALUES ('delete', old.rowid, old.{column});
+                    INSERT INTO {index} (rowid, {column}) VALUES (new.rowid, new.{column});
+                END;
+            """
+            )
 
 
 def setup_fts5(db: Database):
@@ -657,7 +1170,15 @@ def setup_fts5(db: Database):
 
     Creates a virtual FTS5 table and triggers to keep it synchronized with
     the main tables. This should be called after the database schema is created.
+
+    The triggers skip upserts that leave the indexed columns unchanged, and
+    inserts of artists and albums that have no tracks yet; both used to
+    rescan the index. Existing triggers are replaced with these versions.
     """
+    # Name index triggers that are still in place mean the index is in sync
+    drop_fts5_triggers(db, name_indexes=False)
+    setup_name_indexes(db)
+
     # Create FTS5 virtual table - stores its own copy of the indexed content
     db.execute(
         """
@@ -680,7 +1201,8 @@ def setup_fts5(db: Database):
         # Trigger for artist inserts/updates
         db.execute(
             """
-            CREATE TRIGGER IF NOT EXISTS artists_ai AFTER INSERT ON artists BEGIN
+            CREATE TRIGGER IF NOT EXISTS artists_ai AFTER INSERT ON artists
+            WHEN EXISTS (SELECT 1 FROM albums WHERE albums.artist_id = new.id) BEGIN
                 DELETE FROM tracks_fts WHERE artist_id = new.id;
                 INSERT INTO tracks_fts (artist_name, album_title, track_title, artist_id, album_id, track_id)
                 SELECT new.name, albums.title, tracks.title, new.id, albums.id, tracks.id
@@ -692,7 +1214,8 @@ def setup_fts5(db: Database):
 
         db.execute(
             """
-            CREATE TRIGGER IF NOT EXISTS artists_au AFTER UPDATE ON artists BEGIN
+            CREATE TRIGGER IF NOT EXISTS artists_au AFTER UPDATE ON artists
+            WHEN old.name IS NOT new.name OR old.id IS NOT new.id BEGIN
                 DELETE FROM tracks_fts WHERE artist_id = new.id;
                 INSERT INTO tracks_fts (artist_name, album_title, track_title, artist_id, album_id, track_id)
                 SELECT new.name, albums.title, tracks.title, new.id, albums.id, tracks.id
@@ -714,7 +1237,8 @@ def setup_fts5(db: Database):
         # Trigger for album inserts/updates
         db.execute(
             """
-            CREATE TRIGGER IF NOT EXISTS albums_ai AFTER INSERT ON albums BEGIN
+            CREATE TRIGGER IF NOT EXISTS albums_ai AFTER INSERT ON albums
+            WHEN EXISTS (SELECT 1 FROM tracks WHERE tracks.album_id = new.id) BEGIN
                 DELETE FROM tracks_fts WHERE album_id = new.id;
                 INSERT INTO tracks_fts (artist_name, album_title, track_title, artist_id, album_id, track_id)
                 SELECT artists.name, new.title, tracks.title, new.artist_id, new.id, tracks.id
@@ -726,7 +1250,9 @@ def setup_fts5(db: Database):
 
         db.execute(
             """
-            CREATE TRIGGER IF NOT EXISTS albums_au AFTER UPDATE ON albums BEGIN
+            CREATE TRIGGER IF NOT EXISTS albums_au AFTER UPDATE ON albums
+            WHEN old.title IS NOT new.title OR old.id IS NOT new.id
+                OR old.artist_id IS NOT new.artist_id BEGIN
                 DELETE FROM tracks_fts WHERE album_id = new.id;
                 INSERT INTO tracks_fts (artist_name, album_title, track_title, artist_id, album_id, track_id)
                 SELECT artists.name, new.title, tracks.title, new.artist_id, new.id, tracks.id
@@ -759,7 +1285,9 @@ def setup_fts5(db: Database):
 
         db.execute(
             """
-            CREATE TRIGGER IF NOT EXISTS tracks_au AFTER UPDATE ON tracks BEGIN
+            CREATE TRIGGER IF NOT EXISTS tracks_au AFTER UPDATE ON tracks
+            WHEN old.title IS NOT new.title OR old.id IS NOT new.id
+                OR old.album_id IS NOT new.album_id BEGIN
                 DELETE FROM tracks_fts WHERE track_id = new.id;
                 INSERT INTO tracks_fts (artist_name, album_title, track_title, artist_id, album_id, track_id)
                 SELECT artists.name, albums.title, new.title, artists.id, albums.id, new.id
@@ -778,6 +1306,40 @@ def setup_fts5(db: Database):
         )
 
 
+def drop_fts5_triggers(db: Database, name_indexes: bool = True):
+    """
+    Drop the triggers that keep the search indexes in sync.
+
+    For bulk loads: the per-row triggers are far slower than one
+    rebuild_fts5() at the end. Call setup_fts5() afterwards to recreate them.
+    With name_indexes=False the name index triggers are left in place.
+    """
+    with transaction(db):
+        for table in ("artists", "albums", "tracks"):
+            for event in ("ai", "au", "ad"):
+                db.execute(f"DROP TRIGGER IF EXISTS {table}_{event}")
+        if not name_indexes:
+            return
+        for table, column in NAME_INDEXES:
+            for event in ("ai", "au", "ad"):
+                db.execute(f"DROP TRIGGER IF EXISTS {table}_{column}_fts_{event}")
+
+
+def rebuild_name_indexes(db: Database):
+    """
+    Repopulate the trigram name indexes straight from their content tables.
+
+    setup_name_indexes() keeps them in sync on its own; this is for after
+    a VACUUM, which may renumber the rowids they are keyed on.
+    """
+    table_names = db.table_names()
+    with transaction(db):
+        for table, column in NAME_INDEXES:
+            index = f"{table}_{column}_fts"
+            if index in table_names:
+                db.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+
 def rebuild_fts5(db: Database):
     """
     Rebuild the FTS5 index from existing data.
@@ -800,6 +1362,51 @@ def rebuild_fts5(db: Database):
     )
 
 
+# search_tracks() statements, built once. The plays variant collects the
+# full-text matches first so play statistics are only aggregated for the
+# matched tracks, through the plays.track_id index.
+_SEARCH_TRACKS_PLAYS_SQL = """
+    WITH matches AS (
+        SELECT track_id, track_title, album_id, album_title,
+               artist_id, artist_name, rank
+        FROM tracks_fts
+        WHERE tracks_fts MATCH ?
+    )
+    SELECT
+        matches.track_id,
+        matches.track_title,
+        matches.album_id,
+        matches.album_title,
+        matches.artist_id,
+        matches.artist_name,
+        COUNT(plays.timestamp) as play_count,
+        MAX(plays.timestamp) as last_played,
+        matches.rank
+    FROM matches
+    LEFT JOIN plays ON matches.track_id = plays.track_id
+    GROUP BY matches.track_id, matches.album_id, matches.artist_id
+    ORDER BY matches.rank, play_count DESC
+    LIMIT ?
+"""
+
+_SEARCH_TRACKS_SQL = """
+    SELECT
+        tracks_fts.track_id,
+        tracks_fts.track_title,
+        tracks_fts.album_id,
+        tracks_fts.album_title,
+        tracks_fts.artist_id,
+        tracks_fts.artist_name,
+        0 as play_count,
+        NULL as last_played,
+        tracks_fts.rank
+    FROM tracks_fts
+    WHERE tracks_fts MATCH ?
+    ORDER BY tracks_fts.rank
+    LIMIT ?
+"""
+
+
 def search_tracks(db: Database, query: str, limit: int = None):
     """
     Search for tracks using FTS5 full-text search.
@@ -819,47 +1426,11 @@ def search_tracks(db: Database, query: str, limit: int = None):
         - rank (search relevance score)
     """
     # Check if plays table exists to include play statistics
-    has_plays = "plays" in db.table_names()
-
-    if has_plays:
-        sql = """
-            SELECT
-                tracks_fts.track_id,
-                tracks_fts.track_title,
-                tracks_fts.album_id,
-                tracks_fts.album_title,
-                tracks_fts.artist_id,
-                tracks_fts.artist_name,
-                COUNT(plays.timestamp) as play_count,
-                MAX(plays.timestamp) as last_played,
-                tracks_fts.rank
-            FROM tracks_fts
-            LEFT JOIN plays ON tracks_fts.track_id = plays.track_id
-            WHERE tracks_fts MATCH ?
-            GROUP BY tracks_fts.track_id, tracks_fts.album_id, tracks_fts.artist_id
-            ORDER BY tracks_fts.rank, play_count DESC
-        """
-    else:
-        sql = """
-            SELECT
-                tracks_fts.track_id,
-                tracks_fts.track_title,
-                tracks_fts.album_id,
-                tracks_fts.album_title,
-                tracks_fts.artist_id,
-                tracks_fts.artist_name,
-                0 as play_count,
-                NULL as last_played,
-                tracks_fts.rank
-            FROM tracks_fts
-            WHERE tracks_fts MATCH ?
-            ORDER BY tracks_fts.rank
-        """
-
-    if limit:
-        sql += f" LIMIT {limit}"
+    sql = _SEARCH_TRACKS_PLAYS_SQL if "plays" in db.table_names() else _SEARCH_TRACKS_SQL
 
-    results = db.execute(sql, [query]).fetchall()
+    # The limit is bound so repeat searches reuse one cached statement
+    # (-1 means no limit)
+    results = db.execute(sql, [query, int(limit) if limit else -1]).fetchall()
 
     # Convert to list of dictionaries
     return [
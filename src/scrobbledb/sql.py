@@ -7,6 +7,9 @@ automatically defaulting to the scrobbledb database in the XDG data directory.
 
 import click
 import re
+import sqlite_utils
+
+from . import lastfm
 
 # Import sqlite-utils CLI commands
 from sqlite_utils.cli import (
@@ -22,6 +25,10 @@ from sqlite_utils.cli import (
 )
 
 
+# VACUUM may renumber the rowids the trigram name indexes are keyed on
+_VACUUM = re.compile(r"\bVACUUM\b", re.IGNORECASE)
+
+
 def _is_safe_order_clause(order_clause):
     """
     Validate ORDER BY clause to prevent SQL injection.
@@ -232,6 +239,8 @@ def query(ctx, sql_query, **kwargs):
     """
     path = ctx.obj['database']
     ctx.invoke(sqlite_query, path=path, sql=sql_query, **kwargs)
+    if _VACUUM.search(sql_query):
+        lastfm.rebuild_name_indexes(sqlite_utils.Database(path))
 
 
 @sql.command()
@@ -278,6 +278,7 @@ class ScrobbleBrowser(App):
 
     def action_refresh(self) -> None:
         """Refresh the data."""
+        self.adapter.clear_caches()
         self.load_data()
 
     def action_focus_filter(self) -> None:
@@ -58,6 +58,36 @@ class TestScrobbleDataAdapter:
         count = adapter.get_total_count()
         assert count == 6
 
+    def test_get_total_count_cached_until_data_changes(self, sample_db):
+        """Test repeated counts are served from the cache until a write."""
+        adapter = ScrobbleDataAdapter(sample_db)
+        counted = []
+        count_tracks = adapter._count_tracks
+        adapter._count_tracks = lambda *args: counted.append(args) or count_tracks(*args)
+
+        assert adapter.get_total_count(filter_text="the") == 5
+        assert adapter.get_total_count(filter_text="the") == 5
+        assert len(counted) == 1
+
+        sample_db["tracks"].insert({"id": "track7", "title": "The End", "album_id": "album1"})
+        assert adapter.get_total_count(filter_text="the") == 6
+        assert len(counted) == 2
+
+        adapter.clear_caches()
+        assert adapter.get_total_count(filter_text="the") == 6
+        assert len(counted) == 3
+
+    def test_get_total_count_sees_other_connection_writes(self, tmp_path):
+        """Test a commit from another connection invalidates cached counts."""
+        path = str(tmp_path / "scrobbles.db")
+        writer = Database(path)
+        writer["tracks"].insert({"id": "track1", "title": "Time", "album_id": "album1"})
+        adapter = ScrobbleDataAdapter(Database(path))
+
+        assert adapter.get_total_count() == 1
+        writer["tracks"].insert({"id": "track2", "title": "Money", "album_id": "album1"})
+        assert adapter.get_total_count() == 2
+
     def test_get_total_count_with_filter(self, sample_db):
         """Test getting filtered track count."""
         adapter = ScrobbleDataAdapter(sample_db)
@@ -5,7 +5,7 @@ import os
 import json
 from pathlib import Path
 from click.testing import CliRunner
-from scrobbledb import cli, lastfm
+from scrobbledb import cli, export, lastfm
 import sqlite_utils
 
 
@@ -185,6 +185,36 @@ def test_export_artists_preset(populated_db):
     assert 'play_count' in first_artist
 
 
+def test_export_leaves_database_unchanged(populated_db):
+    """Test exporting adds no indexes and keeps the journal mode."""
+    db, path = populated_db
+    schema = db.execute("SELECT sql FROM sqlite_master").fetchall()
+    journal_mode = db.execute("PRAGMA journal_mode").fetchone()[0]
+    runner = CliRunner()
+
+    result = runner.invoke(cli.cli, ['export', '--database', path, 'artists'])
+
+    assert result.exit_code == 0, f"Command failed: {result.output}"
+    reopened = sqlite_utils.Database(path)
+    assert reopened.execute("SELECT sql FROM sqlite_master").fetchall() == schema
+    assert reopened.execute("PRAGMA journal_mode").fetchone()[0] == journal_mode
+
+
+def test_export_connection_is_read_only(populated_db):
+    """Test that export refuses SQL that would modify the database."""
+    db, path = populated_db
+    runner = CliRunner()
+
+    result = runner.invoke(cli.cli, [
+        'export', '--database', path,
+        '--sql', 'DELETE FROM plays RETURNING *'
+    ])
+
+    assert result.exit_code != 0
+    assert 'readonly' in result.output
+    assert db.execute("SELECT COUNT(*) FROM plays").fetchone()[0] == 3
+
+
 def test_export_with_limit(populated_db):
     """Test exporting with --limit option."""
     db, path = populated_db
@@ -218,6 +248,27 @@ def test_export_with_columns(populated_db):
     assert set(data[0].keys()) == {'timestamp', 'artist_name'}
 
 
+def test_apply_column_filter_flattens_presets(populated_db):
+    """Test preset column filters rewrite the select list, same rows as wrapping."""
+    db, path = populated_db
+    cases = {
+        "plays": ("artist_name", "timestamp"),
+        "albums": ("title", "track_count"),
+        "artists": ("name", "play_count", "album_count"),
+    }
+    for preset, columns in cases.items():
+        query = export.PRESET_QUERIES[preset]
+        flat = export.apply_column_filter(query, columns)
+        wrapped = f"SELECT {', '.join(f'[{c}]' for c in columns)} FROM ({query})"
+
+        assert "FROM (" not in flat
+        assert list(db.query(flat)) == list(db.query(wrapped))
+
+    # Unknown columns fall back to wrapping
+    query = export.PRESET_QUERIES["plays"]
+    assert "FROM (" in export.apply_column_filter(query, ("nope",))
+
+
 def test_export_custom_sql(populated_db):
     """Test exporting with custom SQL query."""
     db, path = populated_db
@@ -298,6 +349,57 @@ def test_export_to_file(populated_db):
         os.unlink(output_path)
 
 
+def test_export_failure_keeps_existing_file(populated_db, tmp_path):
+    """Test a query that fails part way leaves the output file untouched."""
+    db, path = populated_db
+    runner = CliRunner()
+    output = tmp_path / "plays.jsonl"
+    output.write_text("previous export\n")
+
+    result = runner.invoke(cli.cli, [
+        'export', '--database', path, '--output', str(output),
+        '--sql', "SELECT CASE WHEN rowid > 1 THEN json('{') END FROM plays"
+    ])
+
+    assert result.exit_code != 0
+    assert output.read_text() == "previous export\n"
+    assert list(tmp_path.iterdir()) == [output]
+
+
+def test_export_to_dev_null(populated_db):
+    """Test exporting to a device writes to it rather than replacing it."""
+    db, path = populated_db
+    runner = CliRunner()
+
+    result = runner.invoke(cli.cli, [
+        'export', '--database', path, 'plays', '--output', os.devnull
+    ])
+
+    assert result.exit_code == 0, f"Command failed: {result.output}"
+    assert Path(os.devnull).is_char_device()
+
+
+def test_export_through_symlink(populated_db, tmp_path):
+    """Test exporting to a symlink updates its target and keeps the link."""
+    db, path = populated_db
+    runner = CliRunner()
+    target = tmp_path / "plays.jsonl"
+    target.write_text("previous export\n")
+    target.chmod(0o640)
+    link = tmp_path / "latest.jsonl"
+    link.symlink_to(target)
+
+    result = runner.invoke(cli.cli, [
+        'export', '--database', path, 'plays', '--output', str(link)
+    ])
+
+    assert result.exit_code == 0, f"Command failed: {result.output}"
+    assert link.is_symlink()
+    assert len(target.read_text().strip().split('\n')) == 3
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert sorted(tmp_path.iterdir()) == [link, target]
+
+
 def test_export_no_headers_csv(populated_db):
     """Test CSV export with --no-headers option."""
     db, path = populated_db
@@ -354,6 +456,22 @@ def test_export_sample_with_seed_reproducible(populated_db):
     assert result1.output == result2.output
 
 
+def test_apply_sample_filters_in_sql(populated_db):
+    """Test that sampling is a SQL predicate, seeded draws are reproducible."""
+    db, path = populated_db
+    query = export.PRESET_QUERIES["plays"]
+    all_rows = list(db.execute(query))
+
+    sampled = export.apply_sample(db, query, 1.0)
+    assert "random()" in sampled
+    assert list(db.execute(sampled)) == all_rows
+
+    first = list(db.execute(export.apply_sample(db, query, 0.5, seed=7)))
+    second = list(db.execute(export.apply_sample(db, query, 0.5, seed=7)))
+    assert first == second
+    assert all(row in all_rows for row in first)
+
+
 def test_export_no_preset_no_sql_error(populated_db):
     """Test that export fails without preset or SQL."""
     db, path = populated_db
@@ -473,3 +591,93 @@ def test_export_with_limit_and_columns(populated_db):
     data = json.loads(result.output)
     assert len(data) == 1
     assert set(data[0].keys()) == {'artist_name'}
+
+
+def test_write_output_streams_same_text_as_format_output():
+    """Test streaming writer output matches the buffered formatter."""
+    from io import StringIO
+
+    rows = [{"id": 1, "name": "a,b"}, {"id": 2, "name": None}]
+    for fmt in ("json", "jsonl", "csv", "tsv"):
+        out = StringIO()
+        assert export.write_output(iter(rows), fmt, out) == 2
+        assert out.getvalue() == export.format_output(rows, fmt)
+        assert export.format_output([], fmt) in ("", "[]")
+
+        # Cursor-style tuples with the column names give the same text
+        tuples = StringIO()
+        values = [tuple(row.values()) for row in rows]
+        assert export.write_output(iter(values), fmt, tuples, columns=["id", "name"]) == 2
+        assert tuples.getvalue() == out.getvalue()
+    assert json.loads(export.format_output(rows, "json")) == rows
+
+
+def test_jsonl_serializer_matches_dict_encoding():
+    """Test the per-column serializer emits the same text as encoding a dict."""
+    columns = ("id", "name", "score", "missing", "raw")
+    rows = [
+        (1, "Björk \"quoted\"", 0.1, None, b"\x00"),
+        (2, "", -3.5e20, None, b""),
+    ]
+    serialize = export._jsonl_serializer(columns)
+
+    for row in rows:
+        assert serialize(row) == json.dumps(dict(zip(columns, row)), default=str)
+
+
+def test_validate_sql_matches_whole_identifiers():
+    """Test table names only count as identifiers, not substrings or literals."""
+    assert export.validate_sql("SELECT * FROM main.PLAYS")
+    assert export.validate_sql('SELECT * FROM "tracks" JOIN [albums] USING (id)')
+    assert not export.validate_sql("SELECT * FROM plays_archive")
+    assert not export.validate_sql("SELECT 'plays' -- from artists")
+
+
+def test_export_sqlite_format(populated_db, tmp_path):
+    """Test --format sqlite copies the results into a table in another database."""
+    db, path = populated_db
+    runner = CliRunner()
+    output = tmp_path / "out.db"
+
+    result = runner.invoke(cli.cli, [
+        'export', '--database', path, 'plays',
+        '--columns', 'timestamp,artist_name',
+        '--format', 'sqlite', '--output', str(output)
+    ])
+
+    assert result.exit_code == 0, f"Command failed: {result.output}"
+    assert 'Exported 3 rows' in result.output
+    exported = sqlite_utils.Database(output)
+    assert exported["export"].columns_dict.keys() == {"timestamp", "artist_name"}
+    assert exported["export"].count == 3
+
+    result = runner.invoke(cli.cli, ['export', '--database', path, 'plays', '--format', 'sqlite'])
+    assert result.exit_code != 0
+    assert '--format sqlite requires --output' in result.output
+
+
+def test_write_output_parallel_matches_write_output(populated_db):
+    """Test parallel chunked encoding writes the same text as write_output."""
+    from io import StringIO
+
+    db, path = populated_db
+    query = export.PRESET_QUERIES["plays"]
+    for fmt in ("json", "jsonl", "csv", "tsv"):
+        for no_headers in (False, True):
+            cursor = db.execute(query)
+            columns = [desc[0] for desc in cursor.description]
+            expected = StringIO()
+            export.write_output(cursor, fmt, expected, no_headers, columns)
+
+            cursor = db.execute(query)
+            out = StringIO()
+            count = export.write_output_parallel(
+                cursor, fmt, out, no_headers, columns, jobs=2, chunk_size=2
+            )
+            assert count == 3
+            assert out.getvalue() == expected.getvalue()
+
+    empty = StringIO()
+    cursor = db.execute(f"{query} LIMIT 0")
+    assert export.write_output_parallel(cursor, "json", empty, False, columns, jobs=2) == 0
+    assert empty.getvalue() == "[]"
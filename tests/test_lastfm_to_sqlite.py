@@ -1,5 +1,7 @@
 from xml.dom import minidom
 import pytest
+import random
+import sqlite3
 import logging
 from unittest.mock import Mock
 from scrobbledb import lastfm
@@ -104,6 +106,28 @@ def test_extract_track_data(track_node: minidom.Node):
     }
 
 
+def test_extract_track_data_matches_pylast_extract():
+    """Test child lookups agree with pylast._extract on text and entities."""
+    track = minidom.parseString(
+        """
+        <track>
+            <artist mbid="">AC&amp;DC</artist>
+            <name> Highway to Hell </name>
+            <mbid></mbid>
+            <album mbid="">Highway &#8211; to Hell</album>
+            <date uts="1213031819">9 Jun 2008, 17:16</date>
+        </track>
+        """
+    ).documentElement
+
+    data = lastfm._extract_track_data(track)
+
+    assert data["artist"]["name"] == pylast._extract(track, "artist") == "AC&DC"
+    assert data["track"]["title"] == pylast._extract(track, "name") == "Highway to Hell"
+    assert data["album"]["title"] == pylast._extract(track, "album")
+    assert data["track"]["id"].startswith("md5:")
+
+
 def test_save_artist(temp_db, sample_artist_data):
     """Test saving artist data to database."""
     lastfm.save_artist(temp_db, sample_artist_data)
@@ -133,6 +157,32 @@ def test_save_artist_upsert(temp_db, sample_artist_data):
     assert artists[0]["name"] == "Aretha Louise Franklin"
 
 
+def test_save_album_partial_upsert(temp_db, sample_artist_data, sample_album_data):
+    """Test that saving a partial album only updates the columns it carries."""
+    lastfm.save_artist(temp_db, sample_artist_data)
+    lastfm.save_album(temp_db, sample_album_data)
+
+    lastfm.save_album(temp_db, {"id": sample_album_data["id"], "title": "Who's Zoomin' Who? (Remaster)"})
+
+    album = temp_db["albums"].get(sample_album_data["id"])
+    assert album["title"] == "Who's Zoomin' Who? (Remaster)"
+    assert album["artist_id"] == sample_album_data["artist_id"]
+
+    # Mixed batches apply in order, partial rows keeping the other columns
+    lastfm.save_albums_batch(temp_db, [
+        {"id": "album-456", "title": "Aretha", "artist_id": "artist-123"},
+        {"id": "album-456", "title": "Aretha (1986)"},
+        {"id": sample_album_data["id"], "artist_id": "artist-456"},
+    ])
+    assert temp_db["albums"].get("album-456")["title"] == "Aretha (1986)"
+    assert temp_db["albums"].get("album-456")["artist_id"] == "artist-123"
+    assert temp_db["albums"].get(sample_album_data["id"])["title"] == "Who's Zoomin' Who? (Remaster)"
+
+    # A new album still needs every NOT NULL column
+    with pytest.raises(sqlite3.IntegrityError):
+        lastfm.save_album(temp_db, {"id": "album-789", "title": "Aretha Now"})
+
+
 def test_save_album(temp_db, sample_artist_data, sample_album_data):
     """Test saving album data to database."""
     # First save the artist (foreign key dependency)
@@ -252,6 +302,22 @@ def test_save_multiple_plays_same_track(temp_db, sample_artist_data, sample_albu
     assert timestamps == sorted(timestamps)
 
 
+def test_setup_indexes(temp_db, sample_artist_data, sample_album_data, sample_track_data, sample_play_data):
+    """Test join indexes are created once the tables exist, and only once."""
+    lastfm.setup_indexes(temp_db)  # No tables yet: nothing to do
+
+    lastfm.save_artist(temp_db, sample_artist_data)
+    lastfm.save_album(temp_db, sample_album_data)
+    lastfm.save_track(temp_db, sample_track_data)
+    lastfm.save_play(temp_db, sample_play_data)
+    lastfm.setup_indexes(temp_db)
+    lastfm.setup_indexes(temp_db)
+
+    for table, columns in lastfm.INDEXES.items():
+        assert [index.columns for index in temp_db[table].indexes
+                if not index.name.startswith("sqlite_autoindex")] == [columns]
+
+
 def test_setup_fts5(temp_db, sample_artist_data, sample_album_data, sample_track_data):
     """Test setting up FTS5 virtual table and triggers."""
     # Save some data first
@@ -275,6 +341,75 @@ def test_setup_fts5(temp_db, sample_artist_data, sample_album_data, sample_track
     assert "track_id" in columns
 
 
+def test_name_indexes_track_table_changes(temp_db, sample_artist_data, sample_album_data, sample_track_data):
+    """Test trigram name indexes cover existing rows, inserts and updates."""
+    lastfm.save_artist(temp_db, sample_artist_data)
+    lastfm.save_album(temp_db, sample_album_data)
+    lastfm.save_track(temp_db, sample_track_data)
+    lastfm.setup_fts5(temp_db)
+
+    def matches(pattern):
+        return [row[0] for row in temp_db.execute(
+            "SELECT artists.id FROM artists WHERE artists.rowid IN "
+            "(SELECT rowid FROM artists_name_fts WHERE name LIKE ?)",
+            [pattern],
+        ).fetchall()]
+
+    assert matches("%franklin%") == ["artist-123"]
+
+    lastfm.save_artist(temp_db, {"id": "artist-123", "name": "Lady Soul"})
+    lastfm.save_artist(temp_db, {"id": "artist-456", "name": "Kirk Franklin"})
+    assert matches("%franklin%") == ["artist-456"]
+    assert matches("%y so%") == ["artist-123"]
+
+
+def test_name_indexes_rebuilt_once(temp_db, sample_artist_data, sample_album_data, sample_track_data):
+    """Test setting up and rebuilding the search indexes fills each name index once."""
+    lastfm.save_artist(temp_db, sample_artist_data)
+    lastfm.save_album(temp_db, sample_album_data)
+    lastfm.save_track(temp_db, sample_track_data)
+    statements = []
+    temp_db.conn.set_trace_callback(statements.append)
+
+    lastfm.setup_fts5(temp_db)
+    lastfm.rebuild_fts5(temp_db)
+    lastfm.setup_fts5(temp_db)  # In sync: nothing to rebuild
+    temp_db.conn.set_trace_callback(None)
+
+    rebuilds = [s for s in statements if "_fts) VALUES ('rebuild')" in s]
+    assert sorted(rebuilds) == sorted(
+        f"INSERT INTO {table}_{column}_fts ({table}_{column}_fts) VALUES ('rebuild')"
+        for table, column in lastfm.NAME_INDEXES
+    )
+
+    # Writes made while the triggers were dropped are picked up on setup
+    lastfm.drop_fts5_triggers(temp_db)
+    lastfm.save_artist(temp_db, {"id": "artist-456", "name": "Kirk Franklin"})
+    lastfm.setup_fts5(temp_db)
+    assert temp_db.execute(
+        "SELECT COUNT(*) FROM artists_name_fts WHERE name LIKE '%kirk%'"
+    ).fetchone()[0] == 1
+
+
+def test_fts5_triggers_skip_unchanged_upserts(temp_db, sample_artist_data, sample_album_data, sample_track_data):
+    """Test the search index triggers only rewrite the index when indexed columns change."""
+    lastfm.save_artist(temp_db, sample_artist_data)
+    lastfm.save_album(temp_db, sample_album_data)
+    lastfm.save_track(temp_db, sample_track_data)
+    lastfm.setup_fts5(temp_db)
+    lastfm.rebuild_fts5(temp_db)
+
+    before = temp_db.conn.total_changes
+    lastfm.save_artists_batch(temp_db, [sample_artist_data])
+    lastfm.save_tracks_batch(temp_db, [sample_track_data])
+    # Only the two upserted rows themselves
+    assert temp_db.conn.total_changes - before == 2
+
+    lastfm.save_artists_batch(temp_db, [dict(sample_artist_data, name="Lady Soul")])
+    assert [r["artist_name"] for r in lastfm.search_tracks(temp_db, "Soul")] == ["Lady Soul"]
+    assert lastfm.search_tracks(temp_db, "Franklin") == []
+
+
 def test_rebuild_fts5(temp_db, sample_artist_data, sample_album_data, sample_track_data):
     """Test rebuilding FTS5 index from existing data."""
     # Save test data
@@ -300,6 +435,36 @@ def test_rebuild_fts5(temp_db, sample_artist_data, sample_album_data, sample_tra
     assert result[2] == "Sisters Are Doing It For Themselves"
 
 
+def test_add_scrobbles_bulk_rebuilds_fts5(temp_db, sample_artist_data, sample_album_data, sample_track_data):
+    """Test bulk mode drops the index triggers while adding and rebuilds once."""
+    lastfm.save_artist(temp_db, sample_artist_data)
+    lastfm.save_album(temp_db, sample_album_data)
+    lastfm.save_track(temp_db, sample_track_data)
+    lastfm.setup_fts5(temp_db)
+    lastfm.rebuild_fts5(temp_db)
+    triggers = "SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+    expected = temp_db.execute(triggers).fetchall()
+
+    seen = []
+
+    def scrobbles():
+        seen.append(temp_db.execute(triggers).fetchall())
+        yield {
+            "artist": {"id": "artist-1", "name": "The Beatles"},
+            "album": {"id": "album-1", "title": "Abbey Road", "artist_id": "artist-1"},
+            "track": {"id": "track-1", "title": "Come Together", "album_id": "album-1"},
+            "play": {"track_id": "track-1", "timestamp": dt.datetime(2024, 1, 15, tzinfo=timezone.utc)},
+        }
+
+    stats = lastfm.add_scrobbles(temp_db, scrobbles(), bulk=True)
+
+    assert stats["added"] == 1
+    assert seen == [[]]
+    assert temp_db.execute(triggers).fetchall() == expected
+    assert [r["track_title"] for r in lastfm.search_tracks(temp_db, "Together")] == ["Come Together"]
+    assert temp_db.execute("SELECT COUNT(*) FROM tracks_fts").fetchone()[0] == 2
+
+
 def test_search_tracks_basic(temp_db, sample_artist_data, sample_album_data, sample_track_data, sample_play_data):
     """Test basic track search functionality."""
     # Save test data
@@ -531,6 +696,23 @@ def test_parse_timestamp_various_formats():
         assert result.day == 15
 
 
+def test_parse_timestamp_format_cache_keeps_precedence():
+    """Test a cached format never overrides the order of TIMESTAMP_FORMATS."""
+    assert lastfm.parse_timestamp("13/02/2024 10:00:00").month == 2
+    assert lastfm.parse_timestamp("01/02/2024 10:00:00").month == 1
+    assert lastfm.parse_timestamp("13/02/2024 10:00:00").day == 13
+    assert lastfm.parse_timestamp("2024-01-15T14:30:00").hour == 14
+    assert lastfm.parse_timestamp("2024-01-15T14:30:00.250").microsecond == 250000
+
+
+def test_parse_timestamp_format_cache_keeps_unix():
+    """Test Unix timestamps still parse as such once date formats are cached."""
+    lastfm.parse_timestamp("2024-01-15 14:30:00")
+    lastfm.parse_timestamp("2024-01-15")
+    assert lastfm.parse_timestamp("1705329000") == dt.datetime(2024, 1, 15, 14, 30, tzinfo=timezone.utc)
+    assert lastfm.parse_timestamp("1705329000.5").microsecond == 500000
+
+
 def test_parse_timestamp_invalid():
     """Test parsing invalid timestamp raises error."""
     import pytest
@@ -558,6 +740,25 @@ def test_synthesize_mbids():
     assert track_mbid == track_mbid2
 
 
+def test_synthesize_mbids_stable_ids():
+    """Test synthesized ids keep the chained digest stored in existing databases."""
+    import hashlib
+
+    artist_mbid, album_mbid, track_mbid = lastfm.synthesize_mbids(
+        "Sigur Rós", "Ágætis byrjun", "Svefn-g-englar"
+    )
+
+    assert artist_mbid == "md5:" + hashlib.md5("Sigur Rós".encode()).hexdigest()
+    h = hashlib.md5()
+    h.update(artist_mbid.encode())
+    h.update("Ágætis byrjun".encode())
+    assert album_mbid == "md5:" + h.hexdigest()
+    h = hashlib.md5()
+    h.update(album_mbid.encode())
+    h.update(b"Svefn-g-englar")
+    assert track_mbid == "md5:" + h.hexdigest()
+
+
 def test_synthesize_mbids_different_inputs():
     """Test that different inputs generate different MBIDs."""
     artist1_mbid, _, _ = lastfm.synthesize_mbids("Artist 1", "Album", "Track")
@@ -629,6 +830,19 @@ def test_parse_scrobble_dict_field_aliases():
     assert result["track"]["title"] == "Come Together"
 
 
+def test_parse_scrobble_dict_field_map():
+    """Test parsing rows with a field map computed once for their header."""
+    rows = [
+        {"Time": "2024-01-15T14:30:00", "artist_name": "The Beatles", "song": "Come Together"},
+        {"Time": "2024-01-15T14:35:00", "artist_name": "The Beatles", "song": "Something"},
+    ]
+    fields = lastfm.field_map(rows[0].keys())
+
+    assert fields == {"Time": "timestamp", "artist_name": "artist", "song": "track"}
+    for line_num, row in enumerate(rows, start=2):
+        assert lastfm.parse_scrobble_dict(row, line_num, fields) == lastfm.parse_scrobble_dict(row, line_num)
+
+
 def test_parse_scrobble_dict_missing_artist():
     """Test parsing scrobble with missing artist raises error."""
     import pytest
@@ -814,6 +1028,27 @@ def test_add_scrobbles_with_sample_seed_reproducible(temp_db):
     assert stats1['sampled'] == stats2['sampled']
 
 
+def test_add_scrobbles_sample_leaves_global_random_state(temp_db):
+    """Test that seeded sampling does not reseed the random module."""
+    scrobbles = [
+        {
+            "artist": {"id": f"artist-{i}", "name": f"Artist {i}"},
+            "album": {"id": f"album-{i}", "title": f"Album {i}", "artist_id": f"artist-{i}"},
+            "track": {"id": f"track-{i}", "title": f"Track {i}", "album_id": f"album-{i}"},
+            "play": {"track_id": f"track-{i}", "timestamp": dt.datetime(2024, 1, 15, 14, i, tzinfo=timezone.utc)},
+        }
+        for i in range(20)
+    ]
+    state = random.getstate()
+
+    stats = lastfm.add_scrobbles(temp_db, iter(scrobbles), sample=0.5, seed=42)
+
+    assert random.getstate() == state
+    # Same selection as drawing from random.seed(42)
+    rng = random.Random(42)
+    assert stats['sampled'] == sum(rng.random() < 0.5 for _ in scrobbles)
+
+
 def test_add_scrobbles_no_duplicates(temp_db):
     """Test duplicate detection."""
     # Add initial scrobble
@@ -841,6 +1076,26 @@ def test_add_scrobbles_no_duplicates(temp_db):
     assert temp_db["plays"].count == 1
 
 
+def test_add_scrobbles_no_duplicates_across_batches(temp_db, monkeypatch):
+    """Test duplicates are caught in the database, the pending batch and a new table."""
+    def scrobble(n):
+        return {
+            "artist": {"id": "artist-1", "name": "The Beatles"},
+            "album": {"id": "album-1", "title": "Abbey Road", "artist_id": "artist-1"},
+            "track": {"id": f"track-{n}", "title": f"Track {n}", "album_id": "album-1"},
+            "play": {"track_id": f"track-{n}", "timestamp": dt.datetime(2024, 1, n, tzinfo=timezone.utc)},
+        }
+
+    monkeypatch.setattr(lastfm, "ADD_SCROBBLES_BATCH_SIZE", 2)
+    scrobbles = [scrobble(1), scrobble(1), scrobble(2), scrobble(3), scrobble(1), scrobble(3)]
+
+    stats = lastfm.add_scrobbles(temp_db, iter(scrobbles), no_duplicates=True)
+
+    assert stats["added"] == 3
+    assert stats["skipped"] == 3
+    assert temp_db["plays"].count == 3
+
+
 def test_add_scrobbles_skip_errors(temp_db):
     """Test skip errors mode."""
     # Note: We can't easily test database constraint errors in unit tests
@@ -865,6 +1120,97 @@ def test_add_scrobbles_skip_errors(temp_db):
     assert len(stats['errors']) == 0
 
 
+def test_save_batches_upsert(temp_db):
+    """Test the prepared batch upserts insert new rows and update existing ones."""
+    artists = [{"id": "artist-1", "name": "The Beatles"}]
+    albums = [{"id": "album-1", "title": "Abbey Road", "artist_id": "artist-1"}]
+    tracks = [{"id": "track-1", "title": "Come Together", "album_id": "album-1"}]
+    plays = [{"track_id": "track-1", "timestamp": dt.datetime(2024, 1, 15, 14, 30, tzinfo=timezone.utc)}]
+
+    def save_all():
+        with lastfm.transaction(temp_db):
+            lastfm.save_artists_batch(temp_db, artists)
+            lastfm.save_albums_batch(temp_db, albums)
+            lastfm.save_tracks_batch(temp_db, tracks)
+            lastfm.save_plays_batch(temp_db, plays)
+
+    # The first batches create the tables through sqlite-utils
+    save_all()
+    artists[0] = {"id": "artist-1", "name": "Beatles, The"}
+    tracks.append({"id": "track-2", "title": "Something", "album_id": "album-1"})
+    plays.append({"track_id": "track-2", "timestamp": dt.datetime(2024, 1, 15, 14, 35, tzinfo=timezone.utc)})
+    save_all()
+
+    assert list(temp_db["artists"].rows) == [{"id": "artist-1", "name": "Beatles, The"}]
+    assert list(temp_db["albums"].rows) == albums
+    assert list(temp_db["tracks"].rows) == tracks
+    assert list(temp_db["plays"].rows) == [
+        {"timestamp": "2024-01-15T14:30:00+00:00", "track_id": "track-1"},
+        {"timestamp": "2024-01-15T14:35:00+00:00", "track_id": "track-2"},
+    ]
+
+
+def test_add_scrobbles_batch_errors(temp_db, monkeypatch):
+    """Test a failing batch is retried per scrobble to skip only the bad ones."""
+    def scrobble(n, title):
+        return {
+            "artist": {"id": "artist-1", "name": "The Beatles"},
+            "album": {"id": "album-1", "title": "Abbey Road", "artist_id": "artist-1"},
+            "track": {"id": f"track-{n}", "title": title, "album_id": "album-1"},
+            "play": {"track_id": f"track-{n}", "timestamp": dt.datetime(2024, 1, n, tzinfo=timezone.utc)},
+        }
+
+    lastfm.add_scrobbles(temp_db, iter([scrobble(1, "Come Together")]))
+    scrobbles = [scrobble(2, "Something"), scrobble(3, None), scrobble(4, "Oh! Darling")]
+
+    stats = lastfm.add_scrobbles(temp_db, iter(scrobbles), skip_errors=True)
+
+    assert stats["added"] == 2
+    assert len(stats["errors"]) == 1
+    assert temp_db["plays"].count == 3
+
+    # Without skip_errors the error propagates, after the scrobbles before
+    # the bad one in its batch are saved
+    scrobbles = [scrobble(11, "Because"), scrobble(12, "Sun King"), scrobble(5, None), scrobble(13, "Her Majesty")]
+    with pytest.raises(sqlite3.IntegrityError, match="NOT NULL constraint failed: tracks.title"):
+        lastfm.add_scrobbles(temp_db, iter(scrobbles))
+    assert {row["track_id"] for row in temp_db["plays"].rows} == {
+        "track-1", "track-2", "track-4", "track-11", "track-12"
+    }
+    assert temp_db["tracks"].get("track-11")["title"] == "Because"
+    assert "track-5" not in {row["id"] for row in temp_db["tracks"].rows}
+
+    # Scrobbles spanning several batches are all written
+    monkeypatch.setattr(lastfm, "ADD_SCROBBLES_BATCH_SIZE", 2)
+    stats = lastfm.add_scrobbles(temp_db, iter(scrobble(n, f"Track {n}") for n in range(6, 11)))
+    assert stats["added"] == 5
+    assert temp_db["plays"].count == 10
+
+
+def test_add_scrobbles_commits_once_per_batch(temp_db, monkeypatch):
+    """Test each batch of scrobbles is written in a single transaction."""
+    def scrobble(n):
+        return {
+            "artist": {"id": f"artist-{n}", "name": f"Artist {n}"},
+            "album": {"id": f"album-{n}", "title": f"Album {n}", "artist_id": f"artist-{n}"},
+            "track": {"id": f"track-{n}", "title": f"Track {n}", "album_id": f"album-{n}"},
+            "play": {"track_id": f"track-{n}", "timestamp": dt.datetime(2024, 1, n, tzinfo=timezone.utc)},
+        }
+
+    # The first batch creates the tables through sqlite-utils
+    lastfm.add_scrobbles(temp_db, iter([scrobble(1)]))
+    monkeypatch.setattr(lastfm, "ADD_SCROBBLES_BATCH_SIZE", 2)
+    statements = []
+    temp_db.conn.set_trace_callback(statements.append)
+
+    stats = lastfm.add_scrobbles(temp_db, iter(scrobble(n) for n in range(2, 6)))
+
+    temp_db.conn.set_trace_callback(None)
+    assert stats["added"] == 4
+    assert [s for s in statements if s.strip().upper() == "COMMIT"] == ["COMMIT"] * 2
+    assert temp_db["plays"].count == 5
+
+
 def test_add_scrobbles_combined_options(temp_db):
     """Test combining multiple options."""
     scrobbles = [
@@ -960,7 +1306,8 @@ def test_config_init_then_ingest_workflow(temp_db):
         'SELECT name FROM sqlite_master WHERE type="trigger"'
     ).fetchall()]
 
-    assert len(triggers) == 9  # 3 triggers per table × 3 tables
+    # 3 tracks_fts triggers + 3 name index triggers per table × 3 tables
+    assert len(triggers) == 18
     assert "artists_ai" in triggers
     assert "artists_au" in triggers
     assert "artists_ad" in triggers
@@ -970,6 +1317,9 @@ def test_config_init_then_ingest_workflow(temp_db):
     assert "tracks_ai" in triggers
     assert "tracks_au" in triggers
     assert "tracks_ad" in triggers
+    assert "artists_name_fts_ai" in triggers
+    assert "albums_title_fts_au" in triggers
+    assert "tracks_title_fts_ad" in triggers
 
     # Step 5: Verify FTS5 is populated
     fts_count = temp_db.execute("SELECT COUNT(*) FROM tracks_fts").fetchone()[0]
@@ -1003,6 +1353,12 @@ def test_config_init_then_ingest_workflow(temp_db):
 
 # Tests for retry functionality
 
+@pytest.fixture(autouse=True)
+def fresh_retry_budget(monkeypatch):
+    """Give each test a full retry budget; it's shared module state."""
+    monkeypatch.setattr(lastfm, "_retry_budget", lastfm._RetryBudget(capacity=10, refill_rate=0.1))
+
+
 def test_api_request_with_retry_success_on_first_attempt():
     """Test that successful API calls don't retry."""
     mock_user = Mock()
@@ -1109,6 +1465,30 @@ def test_api_request_with_retry_propagates_non_wserror():
     assert mock_user._request.call_count == 1
 
 
+def test_api_request_with_retry_skips_permanent_errors():
+    """Test that errors a retry can't fix are raised without retrying."""
+    mock_user = Mock()
+    mock_user._request.side_effect = pylast.WSError("network", "10", "Invalid API key")
+
+    with pytest.raises(pylast.WSError):
+        lastfm._api_request_with_retry(mock_user, "user.getRecentTracks", params={"page": 1})
+
+    assert mock_user._request.call_count == 1
+
+
+def test_retry_backoff_budget_and_rate_limit(monkeypatch):
+    """Test the retry hook's rate-limit wait and shared retry budget."""
+    monkeypatch.setattr(lastfm, "_retry_budget", lastfm._RetryBudget(capacity=2, refill_rate=0))
+    server_error = pylast.WSError("network", "8", "Operation failed")
+    rate_limited = pylast.WSError("network", "29", "Rate limit exceeded")
+
+    assert lastfm._retry_backoff(ValueError("nope")) is False
+    assert lastfm._retry_backoff(rate_limited) == lastfm.RATE_LIMIT_WAIT
+    assert lastfm._retry_backoff(server_error) is True
+    # Budget spent: further failures are not retried
+    assert lastfm._retry_backoff(server_error) is False
+
+
 def test_recent_tracks_count_uses_retry():
     """Test that recent_tracks_count uses retry logic."""
     mock_user = Mock()
@@ -1116,7 +1496,7 @@ def test_recent_tracks_count_uses_retry():
     # Create a minimal valid XML response
     xml_response = """<?xml version="1.0" encoding="utf-8"?>
     <lfm status="ok">
-        <recenttracks user="testuser" page="1" perPage="1" totalPages="10" total="100">
+        <recenttracks user="testuser" page="1" perPage="1" totalPages="10" total="10">
         </recenttracks>
     </lfm>"""
 
@@ -1134,7 +1514,7 @@ def test_recent_tracks_count_uses_retry():
 
     # Should have retried once
     assert mock_user._request.call_count == 2
-    # Should return the calculated count (10 pages * 1 per page)
+    # Should return the total attribute
     assert count == 10
 
 
@@ -1177,6 +1557,71 @@ def test_recent_tracks_uses_retry():
     assert tracks[0]["track"]["title"] == "Test Track"
 
 
+def test_recent_tracks_unlinks_each_page():
+    """Test that each page's DOM is released once its tracks are yielded."""
+    def page(number):
+        return minidom.parseString(f"""<?xml version="1.0" encoding="utf-8"?>
+        <lfm status="ok">
+            <recenttracks user="testuser" page="{number}" perPage="1" totalPages="2" total="2">
+                <track>
+                    <artist mbid="artist-123">Test Artist</artist>
+                    <name>Track {number}</name>
+                    <mbid>track-{number}</mbid>
+                    <album mbid="album-123">Test Album</album>
+                    <date uts="121303181{number}">9 Jun 2008, 17:16</date>
+                </track>
+            </recenttracks>
+        </lfm>""")
+
+    mock_user = Mock()
+    mock_user._get_params.return_value = {}
+    pages = [page(1), page(2)]
+    mock_user._request.side_effect = pages
+
+    tracks = lastfm.recent_tracks(mock_user, None)
+    assert next(tracks)["track"]["title"] == "Track 1"
+    assert pages[0].documentElement is not None
+    assert next(tracks)["track"]["title"] == "Track 2"
+    assert pages[0].documentElement is None
+    assert list(tracks) == []
+    assert pages[1].documentElement is None
+
+    # Stopping early at the limit releases the page too
+    pages = [page(1), page(2)]
+    mock_user._request.reset_mock()
+    mock_user._request.side_effect = pages
+    assert len(list(lastfm.recent_tracks(mock_user, None, limit=1))) == 1
+    assert pages[0].documentElement is None
+    # ...and doesn't prefetch pages the limit never reaches
+    assert mock_user._request.call_count == 1
+
+
+def test_recent_tracks_prefetches_pages_in_order():
+    """Test background page fetches request each page once, yielded in order."""
+    def page(number):
+        return minidom.parseString(f"""<?xml version="1.0" encoding="utf-8"?>
+        <lfm status="ok">
+            <recenttracks user="testuser" page="{number}" perPage="1" totalPages="4" total="4">
+                <track>
+                    <artist mbid="artist-123">Test Artist</artist>
+                    <name>Track {number}</name>
+                    <album mbid="album-123">Test Album</album>
+                    <date uts="121303181{number}">9 Jun 2008, 17:16</date>
+                </track>
+            </recenttracks>
+        </lfm>""")
+
+    mock_user = Mock()
+    mock_user._get_params.return_value = {}
+    mock_user._request.side_effect = lambda method, cacheable, params: page(params["page"])
+
+    tracks = list(lastfm.recent_tracks(mock_user, None))
+
+    assert [t["track"]["title"] for t in tracks] == [f"Track {n}" for n in range(1, 5)]
+    requested = sorted(call.kwargs["params"]["page"] for call in mock_user._request.call_args_list)
+    assert requested == [1, 2, 3, 4]
+
+
 # Tests for logging functionality
 
 def test_save_artist_logs_debug(temp_db, sample_artist_data, caplog, setup_loguru_for_caplog):
@@ -1426,3 +1871,30 @@ def test_save_complete_batch(temp_db):
         assert row[3] == f"Artist {i}"
 
 
+
+
+def test_get_network_cache_path(monkeypatch, tmp_path):
+    """Test get_network passes the cache path to pylast's shelve cache."""
+    network_cls = Mock()
+    monkeypatch.setattr(pylast, "LastFMNetwork", network_cls)
+    cache_path = str(tmp_path / "lastfm-cache")
+
+    network = lastfm.get_network("lastfm", key="key", secret="secret", cache_path=cache_path)
+
+    network_cls.assert_called_once_with(api_key="key", api_secret="secret")
+    network.enable_caching.assert_called_once_with(file_path=cache_path)
+    network.enable_rate_limit.assert_called_once_with()
+
+
+def test_add_scrobbles_logs_mbid_cache_stats(temp_db, caplog, setup_loguru_for_caplog):
+    """Test that add_scrobbles logs the synthesized id cache hit rates."""
+    scrobble = lastfm.parse_scrobble_dict(
+        {"timestamp": "2024-01-15T14:30:00", "artist": "The Beatles", "track": "Come Together"}
+    )
+
+    with caplog.at_level(logging.INFO, logger="loguru"):
+        lastfm.add_scrobbles(temp_db, iter([scrobble]))
+
+    log_messages = [record.message for record in caplog.records]
+    for name in ("artist", "album", "track"):
+        assert any(f"Synthesized {name} id cache" in msg for msg in log_messages)
@@ -153,6 +153,23 @@ def test_sql_query_command(populated_db):
     assert 'The Beatles' in result.output
 
 
+def test_sql_query_vacuum_rebuilds_name_indexes(populated_db):
+    """Test a VACUUM through sql query resyncs the rowid-keyed name indexes."""
+    db, path = populated_db
+    # Renumber the rowid the way VACUUM may; the index still has the old one
+    db.execute("UPDATE artists SET rowid = rowid + 100")
+    db.conn.commit()
+    runner = CliRunner()
+
+    result = runner.invoke(cli.cli, ['sql', '--database', path, 'query', 'VACUUM'])
+
+    assert result.exit_code == 0, f"Command failed: {result.output}"
+    assert sqlite_utils.Database(path).execute(
+        "SELECT id FROM artists WHERE rowid IN "
+        "(SELECT rowid FROM artists_name_fts WHERE name LIKE '%beatles%')"
+    ).fetchall() == [("artist-1",)]
+
+
 def test_sql_rows_command(populated_db):
     """Test the sql rows command."""
     db, path = populated_db
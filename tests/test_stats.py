@@ -4,16 +4,36 @@ import pytest
 import json
 import tempfile
 import os
-from datetime import datetime, timedelta
+import sqlite3
+from datetime import datetime, timedelta, timezone
 from click.testing import CliRunner
 import sqlite_utils
 
-from scrobbledb import cli
+from scrobbledb import cli, lastfm
 from scrobbledb.domain_queries import (
+    _rollups_fresh,
+    get_album_details,
+    get_album_tracks,
+    get_albums_by_search,
+    get_artist_details,
+    get_artists_by_search,
+    get_artists_with_stats,
+    get_dashboard_bundle,
     get_overview_stats,
     get_monthly_rollup,
+    get_plays_with_filters,
     get_yearly_rollup,
+    get_top_artists,
+    get_top_tracks,
+    get_track_details,
+    get_track_plays,
+    get_tracks_plays,
+    get_tracks_by_search,
+    iter_plays_with_filters,
+    parse_period_to_dates,
     parse_relative_time,
+    refresh_rollups,
+    tune_connection,
 )
 from scrobbledb.domain_format import (
     format_output,
@@ -177,6 +197,33 @@ class TestDomainQueries:
         assert stats["first_scrobble"] is None
         assert stats["last_scrobble"] is None
 
+    def test_tune_connection(self, populated_db):
+        """Test read pragmas are applied to the connection."""
+        path, db = populated_db
+        tune_connection(db)
+
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert db.execute("PRAGMA temp_store").fetchone()[0] == 2
+
+    def test_tune_connection_query_only(self, populated_db):
+        """Test read-only tuning makes the connection refuse writes."""
+        path, db = populated_db
+        tune_connection(db, query_only=True)
+
+        assert get_overview_stats(db)["total_scrobbles"] == 10
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] != "wal"
+        with pytest.raises(sqlite3.OperationalError):
+            db.execute("DELETE FROM plays")
+
+    def test_queries_leave_connection_untuned(self, populated_db):
+        """Test the query functions don't change the database's journal mode."""
+        path, db = populated_db
+        get_overview_stats(db)
+        get_monthly_rollup(db)
+        get_yearly_rollup(db)
+
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] != "wal"
+
     def test_get_monthly_rollup(self, populated_db):
         """Test monthly rollup query."""
         path, db = populated_db
@@ -197,6 +244,12 @@ class TestDomainQueries:
 
         assert len(rows) == 3
 
+    def test_get_monthly_rollup_rejects_non_positive_limit(self, populated_db):
+        """Test monthly rollup rejects a zero limit."""
+        path, db = populated_db
+        with pytest.raises(ValueError):
+            get_monthly_rollup(db, limit=0)
+
     def test_get_monthly_rollup_with_since(self, populated_db):
         """Test monthly rollup with since filter."""
         path, db = populated_db
@@ -208,6 +261,15 @@ class TestDomainQueries:
         for row in rows:
             assert row["year"] == 2024
 
+    def test_get_monthly_rollup_reversed_range(self, populated_db):
+        """Test monthly rollup returns nothing when since is after until."""
+        path, db = populated_db
+        rows = get_monthly_rollup(
+            db, since=datetime(2024, 3, 1), until=datetime(2023, 1, 1)
+        )
+
+        assert rows == []
+
     def test_get_yearly_rollup(self, populated_db):
         """Test yearly rollup query."""
         path, db = populated_db
@@ -231,6 +293,344 @@ class TestDomainQueries:
         assert len(rows) == 1
         assert rows[0]["year"] == 2024
 
+    def test_get_yearly_rollup_reversed_range(self, populated_db):
+        """Test yearly rollup returns nothing when since is after until."""
+        path, db = populated_db
+        rows = get_yearly_rollup(
+            db, since=datetime(2024, 3, 1), until=datetime(2023, 1, 1)
+        )
+
+        assert rows == []
+
+    def test_get_yearly_rollup_zero_limit_is_unbounded(self, populated_db):
+        """Test yearly rollup treats a non-positive limit as no limit."""
+        path, db = populated_db
+        rows = get_yearly_rollup(db, limit=0)
+
+        assert len(rows) == 2
+
+    def test_refreshed_rollups_match_live_queries(self, populated_db):
+        """Test materialized rollups give the same answers as scanning plays."""
+        path, db = populated_db
+        ranges = [
+            {},
+            {"since": datetime(2024, 1, 1)},
+            {"since": datetime(2024, 1, 10), "until": datetime(2024, 3, 15)},
+            {"until": datetime(2023, 6, 15, 10, 30)},
+            {"since": datetime(2023, 6, 20), "until": datetime(2023, 6, 30)},
+        ]
+        live = [
+            (get_monthly_rollup(db, **r), get_yearly_rollup(db, **r)) for r in ranges
+        ]
+
+        refresh_rollups(db)
+        assert "rollup_month" in db.table_names()
+        assert not [i for i in db["plays"].indexes if "month" in i.name]
+        for r, (monthly, yearly) in zip(ranges, live):
+            assert get_monthly_rollup(db, **r) == monthly
+            assert get_yearly_rollup(db, **r) == yearly
+        assert get_monthly_rollup(db, limit=2) == live[0][0][:2]
+
+    def test_rollups_stale_after_deleting_older_play(self, populated_db):
+        """Test deleting any play, not just the newest, invalidates rollups."""
+        path, db = populated_db
+        refresh_rollups(db)
+        assert _rollups_fresh(db.conn)
+
+        db.execute(
+            "DELETE FROM plays WHERE timestamp = (SELECT MIN(timestamp) FROM plays)"
+        )
+        db.conn.commit()
+        db.close()
+
+        reopened = sqlite_utils.Database(path)
+        try:
+            assert not _rollups_fresh(reopened.conn)
+            assert sum(row["scrobbles"] for row in get_yearly_rollup(reopened)) == 9
+            assert get_overview_stats(reopened)["total_scrobbles"] == 9
+        finally:
+            reopened.close()
+
+    def test_refresh_rebuilds_only_touched_months(self, populated_db):
+        """Test an incremental refresh matches a full build of the same data."""
+        path, db = populated_db
+        lastfm.setup_indexes(db)
+        refresh_rollups(db)
+
+        db.execute(
+            "INSERT INTO plays (timestamp, track_id) VALUES ('2024-05-01T09:00:00', 't1')"
+        )
+        db.execute("DELETE FROM plays WHERE timestamp = '2023-06-16T11:00:00'")
+        # Moves t3's plays from Artist One to Artist Two
+        db.execute("UPDATE tracks SET album_id = 'alb3' WHERE id = 't3'")
+        # Renames don't change any rollup
+        db.execute("UPDATE artists SET name = 'Renamed' WHERE id = 'a2'")
+        db.conn.commit()
+
+        assert not _rollups_fresh(db.conn)
+        dirty = db.execute("SELECT month FROM rollup_dirty_months ORDER BY month")
+        assert [row[0] for row in dirty] == ["2023-06", "2023-12", "2024-03", "2024-05"]
+
+        tables = [
+            "rollup_month",
+            "rollup_year",
+            "agg_artist_month",
+            "agg_track_month",
+            "artist_stats",
+            "track_stats",
+        ]
+
+        def snapshot():
+            return {
+                table: sorted(db.execute(f"SELECT * FROM {table}").fetchall())
+                for table in tables
+            }
+
+        refresh_rollups(db)
+        assert _rollups_fresh(db.conn)
+        incremental = snapshot()
+
+        db.execute("DROP TABLE rollup_state")
+        refresh_rollups(db)
+        assert snapshot() == incremental
+        assert incremental["artist_stats"] == [
+            ("a1", 5, 2, 1, "2023-06-15T10:00:00", "2024-05-01T09:00:00"),
+            ("a2", 5, 3, 1, "2023-12-25T08:00:00", "2024-03-25T20:00:00"),
+        ]
+
+    def test_get_top_artists_percentages(self, populated_db):
+        """Test top artist percentages are shares of all plays in period."""
+        path, db = populated_db
+        rows = get_top_artists(db, limit=10, since=datetime(2024, 1, 1))
+
+        assert [row["play_count"] for row in rows] == [3, 3]
+        assert sum(row["percentage"] for row in rows) == pytest.approx(100)
+        assert get_top_artists(db, limit=1)[0]["percentage"] == pytest.approx(70)
+
+    def test_get_dashboard_bundle_matches_separate_queries(self, populated_db):
+        """Test the one-query dashboard agrees with the individual queries."""
+        path, db = populated_db
+        bundle = get_dashboard_bundle(db, limit=3)
+
+        assert bundle["overview"] == get_overview_stats(db)
+        expected_artists = get_top_artists(db, limit=3)
+        for row in expected_artists:
+            del row["avg_plays_per_day"]
+        assert bundle["top_artists"] == expected_artists
+        assert [
+            (row["play_count"], row["percentage"]) for row in bundle["top_tracks"]
+        ] == [
+            (row["play_count"], row["percentage"]) for row in get_top_tracks(db, limit=3)
+        ]
+
+        ranged = get_dashboard_bundle(db, since=datetime(2024, 1, 1))
+        assert ranged["overview"]["total_scrobbles"] == 6
+        assert [row["play_count"] for row in ranged["top_artists"]] == [3, 3]
+
+    def test_get_plays_with_filters_pages_with_before(self, populated_db):
+        """Test walking pages by the last timestamp yields every play once."""
+        path, db = populated_db
+        pages = []
+        before = None
+        while True:
+            page = get_plays_with_filters(db, limit=3, before=before)
+            if not page:
+                break
+            pages.append(page)
+            before = page[-1]["timestamp"]
+
+        assert [len(page) for page in pages] == [3, 3, 3, 1]
+        assert [play for page in pages for play in page] == get_plays_with_filters(
+            db, limit=50
+        )
+
+    def test_aware_range_bounds_compare_in_utc(self, populated_db):
+        """Test offset-carrying bounds select the same plays as their UTC time."""
+        path, db = populated_db
+        eastern = timezone(timedelta(hours=-5))
+        since = datetime(2023, 12, 31, 20, 0, tzinfo=eastern)
+
+        assert get_plays_with_filters(db, since=since) == get_plays_with_filters(
+            db, since=datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc)
+        )
+        assert len(get_plays_with_filters(db, since=since)) == 5
+
+    def test_name_filters_through_trigram_indexes(self, populated_db):
+        """Test substring filters give the same rows with and without name indexes."""
+        path, db = populated_db
+
+        def snapshot():
+            return (
+                get_plays_with_filters(db, limit=50, artist="artist o", track="tr"),
+                get_tracks_by_search(db, "TRACK T"),
+                get_albums_by_search(db, "album", artist="two"),
+                get_top_tracks(db, artist="t_o"),
+                get_album_details(db, album_title="three", artist_name="two"),
+                get_track_details(
+                    db, track_title="fou", artist_name="Two", album_title="bum"
+                ),
+            )
+
+        expected = snapshot()
+        lastfm.setup_fts5(db)
+        assert "artists_name_fts" in db.table_names()
+        assert snapshot() == expected
+        assert len(expected[0]) == 7
+        assert [row["track_title"] for row in expected[1]] == ["Track Three", "Track Two"]
+        assert expected[4]["album_id"] == "alb3"
+        assert expected[5]["track_id"] == "t4"
+        with pytest.raises(ValueError, match="Multiple albums"):
+            get_album_details(db, album_title="album")
+
+    def test_iter_plays_with_filters_streams_rows(self, populated_db):
+        """Test plays stream lazily as rows keyed by column alias."""
+        path, db = populated_db
+        plays = iter_plays_with_filters(db, limit=50, since=datetime(2024, 3, 1))
+
+        first = next(plays)
+        assert isinstance(first, sqlite3.Row)
+        assert first["artist_name"] == "Artist Two"
+        assert dict(first) == {
+            "timestamp": "2024-03-25T20:00:00",
+            "artist_name": "Artist Two",
+            "track_title": "Track Four",
+            "album_title": "Album Three",
+        }
+        assert len(list(plays)) == 2
+        # The shared connection still hands out tuples
+        assert db.execute("SELECT 1").fetchone() == (1,)
+
+    def test_get_artists_by_search(self, populated_db):
+        """Test artist search expands matched ids into play statistics."""
+        path, db = populated_db
+        rows = get_artists_by_search(db, "artist")
+
+        assert {row["artist_name"] for row in rows} == {"Artist One", "Artist Two"}
+        by_name = {row["artist_name"]: row for row in rows}
+        assert by_name["Artist One"]["play_count"] == 7
+        assert by_name["Artist Two"]["album_count"] == 1
+        assert get_artists_by_search(db, "nobody") == []
+
+    def test_get_tracks_plays_matches_per_track_queries(self, populated_db):
+        """Test the batched play history matches one query per track."""
+        path, db = populated_db
+        db["tracks"].insert({"id": "t6", "title": "Track Unplayed", "album_id": "alb3"})
+        track_ids = ["t1", "t3", "t6"]
+
+        for limit in (None, 1, 2):
+            batched = get_tracks_plays(db, track_ids, limit=limit)
+            assert batched == {
+                t: get_track_plays(db, t, limit=limit) for t in track_ids
+            }
+        assert batched["t6"] == []
+
+    def test_refreshed_cubes_match_live_top_queries(self, populated_db):
+        """Test top artists/tracks read from the cubes match scanning plays."""
+        path, db = populated_db
+        ranges = [
+            {},
+            {"since": datetime(2024, 1, 10)},
+            {"since": datetime(2023, 6, 16), "until": datetime(2024, 3, 15)},
+        ]
+
+        def snapshot(r):
+            return (
+                get_top_artists(db, limit=5, **r),
+                get_top_tracks(db, limit=5, **r),
+                get_top_tracks(db, limit=5, artist="One", **r),
+                get_artists_with_stats(db, **r),
+            )
+
+        live = [snapshot(r) for r in ranges]
+        refresh_rollups(db)
+        for r, expected in zip(ranges, live):
+            assert snapshot(r) == expected
+
+    def test_artist_stats_match_live_details(self, populated_db):
+        """Test artist details read from artist_stats match scanning plays."""
+        path, db = populated_db
+        db["artists"].insert({"id": "a3", "name": "Artist Unplayed"})
+
+        def snapshot():
+            return (
+                [get_artist_details(db, artist_id=a) for a in ("a1", "a2", "a3")],
+                get_artists_with_stats(db, sort_by="name", order="asc"),
+                get_artists_with_stats(db, min_plays=4),
+            )
+
+        live = snapshot()
+        refresh_rollups(db)
+        assert snapshot() == live
+        assert live[0][2]["play_count"] == 0
+
+    def test_track_stats_match_live_details(self, populated_db):
+        """Test album and track details read from track_stats match scanning plays."""
+        path, db = populated_db
+        db["albums"].insert({"id": "alb4", "title": "Album Unplayed", "artist_id": "a2"})
+        db["tracks"].insert({"id": "t6", "title": "Track Unplayed", "album_id": "alb3"})
+
+        def snapshot():
+            return (
+                [get_album_details(db, album_id=a) for a in ("alb1", "alb3", "alb4")],
+                [get_album_tracks(db, album_id=a) for a in ("alb1", "alb3")],
+                [get_track_details(db, track_id=t) for t in ("t1", "t6")],
+            )
+
+        live = snapshot()
+        refresh_rollups(db)
+        assert snapshot() == live
+        assert live[0][2]["play_count"] == 0
+        assert live[2][1]["play_count"] == 0
+
+    def test_get_track_details_by_artist_and_album_id(self, populated_db):
+        """Test artist/album ids narrow title matches by key, over names."""
+        path, db = populated_db
+
+        track = get_track_details(db, track_title="Four", artist_id="a2", album_id="alb3")
+        assert track["track_id"] == "t4"
+        assert get_track_details(db, track_title="Three", artist_id="a2") is None
+        assert (
+            get_track_details(db, track_title="Three", artist_name="Nobody", artist_id="a1")
+            ["track_id"] == "t3"
+        )
+        with pytest.raises(ValueError, match="Multiple tracks"):
+            get_track_details(db, track_title="Track F", album_id="alb3")
+
+    def test_get_artist_details_name_lookup(self, populated_db):
+        """Test exact and prefix name matches win before substring matches."""
+        path, db = populated_db
+        db["artists"].insert({"id": "a3", "name": "Artist One Tribute"})
+
+        assert get_artist_details(db, artist_name="artist one")["artist_id"] == "a1"
+        assert get_artist_details(db, artist_name="Artist Tw")["artist_id"] == "a2"
+        assert get_artist_details(db, artist_name="Tribute")["artist_id"] == "a3"
+        assert get_artist_details(db, artist_name="Nobody") is None
+        with pytest.raises(ValueError, match="Multiple artists"):
+            get_artist_details(db, artist_name="Artist O")
+
+    def test_refresh_rollups_replaces_old_table_layouts(self, populated_db):
+        """Test a refresh rebuilds rollup tables created with older columns."""
+        path, db = populated_db
+        db.execute("CREATE TABLE agg_track_month (period TEXT, track_id, plays INTEGER)")
+        expected = get_artists_with_stats(db, since=datetime(2024, 1, 10))
+
+        refresh_rollups(db)
+        assert "artist_id" in db["agg_track_month"].columns_dict
+        assert get_artists_with_stats(db, since=datetime(2024, 1, 10)) == expected
+
+    def test_stale_rollups_are_ignored(self, populated_db):
+        """Test plays added after a refresh still show up in rollups."""
+        path, db = populated_db
+        refresh_rollups(db)
+        db.execute(
+            "INSERT INTO plays (timestamp, track_id) VALUES ('2024-04-01T12:00:00', 't5')"
+        )
+        db.conn.commit()
+
+        rows = get_monthly_rollup(db)
+        assert (rows[0]["year"], rows[0]["month"]) == (2024, 4)
+        assert get_yearly_rollup(db)[0]["scrobbles"] == 7
+
 
 class TestParseRelativeTime:
     """Tests for relative time parsing."""
@@ -316,6 +716,31 @@ class TestParseRelativeTime:
         assert result.hour == 14
         assert result.minute == 30
 
+    def test_parse_iso_datetime_utc_suffix(self):
+        """Test parsing ISO 8601 datetime with a Z suffix."""
+        result = parse_relative_time("2024-06-15T14:30:00Z")
+        assert result == datetime(2024, 6, 15, 14, 30, tzinfo=timezone.utc)
+
+    def test_parse_non_iso_date(self):
+        """Test non-ISO dates still fall back to dateutil."""
+        result = parse_relative_time("June 15 2024")
+        assert result == datetime(2024, 6, 15)
+
+    def test_parse_relative_is_not_frozen_by_cache(self):
+        """Test repeated relative expressions are measured from the current time."""
+        first = parse_relative_time("7 days ago")
+        second = parse_relative_time("7 days ago")
+        assert second >= first
+        assert abs((second - (datetime.now() - timedelta(days=7))).total_seconds()) < 1
+
+    def test_parse_period_to_dates(self):
+        """Test named periods map to since/until ranges."""
+        since, until = parse_period_to_dates(" Quarter ")
+        assert (until - since).days == 90
+        assert parse_period_to_dates("all-time") == (None, None)
+        with pytest.raises(ValueError):
+            parse_period_to_dates("decade")
+
     def test_parse_invalid_returns_none(self):
         """Test that invalid strings return None."""
         result = parse_relative_time("invalid date string xyz")
@@ -386,6 +811,36 @@ class TestStatsCommands:
         assert isinstance(output, list)
         assert output[0]["total_scrobbles"] == 10
 
+    def test_stats_overview_top(self, runner, populated_db):
+        """Test stats overview --top adds the top artists and tracks."""
+        path, db = populated_db
+        result = runner.invoke(
+            cli.cli,
+            ["stats", "overview", "-d", path, "-s", "2024-01-01", "-t", "2", "-f", "json"],
+        )
+
+        assert result.exit_code == 0
+        output = json.loads(result.output)
+        assert output["overview"]["total_scrobbles"] == 6
+        assert [row["play_count"] for row in output["top_artists"]] == [3, 3]
+        assert len(output["top_tracks"]) == 2
+
+        result = runner.invoke(cli.cli, ["stats", "overview", "-d", path, "-t", "2"])
+        assert result.exit_code == 0
+        assert "Top Artists" in result.output
+        assert "Top Tracks" in result.output
+
+    def test_stats_overview_until(self, runner, populated_db):
+        """Test stats overview --until counts only plays in range."""
+        path, db = populated_db
+        result = runner.invoke(
+            cli.cli, ["stats", "overview", "-d", path, "-u", "2023-12-31", "-f", "json"]
+        )
+
+        assert result.exit_code == 0
+        output = json.loads(result.output)
+        assert output[0]["total_scrobbles"] == 4
+
     def test_stats_monthly(self, runner, populated_db):
         """Test stats monthly command."""
         path, db = populated_db
@@ -467,6 +922,35 @@ class TestStatsCommands:
         for row in output:
             assert row["year"] == 2023
 
+    def test_albums_show_plays(self, runner, populated_db):
+        """Test albums show --show-plays lists each track's recent plays."""
+        path, db = populated_db
+        result = runner.invoke(
+            cli.cli,
+            ["albums", "show", "-d", path, "--album-id", "alb1", "--show-plays", "--format", "json"],
+        )
+
+        assert result.exit_code == 0
+        output = json.loads(result.output)
+        plays = {track["track_id"]: track["plays"] for track in output["tracks"]}
+        assert plays == {
+            "t1": [
+                {"timestamp": "2024-02-14T18:00:00"},
+                {"timestamp": "2023-07-01T12:00:00"},
+                {"timestamp": "2023-06-15T10:00:00"},
+            ],
+            "t2": [
+                {"timestamp": "2024-03-10T09:00:00"},
+                {"timestamp": "2023-06-16T11:00:00"},
+            ],
+        }
+
+        result = runner.invoke(
+            cli.cli, ["albums", "show", "-d", path, "--album-id", "alb1", "--show-plays"]
+        )
+        assert result.exit_code == 0
+        assert "Recent Plays" in result.output
+
     def test_stats_missing_database(self, runner):
         """Test stats command with missing database."""
         result = runner.invoke(